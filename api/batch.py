@@ -0,0 +1,101 @@
+"""
+Run blog generation requests from a JSONL file and stream the results out as JSONL.
+
+Each input line is a JSON object with "purpose" and an optional "language"; any other fields
+(e.g. an "id") are copied to the matching output line. Results are written as soon as each
+request finishes, so the output order follows completion order and carries the input "index".
+
+Usage:
+    python -m api.batch requests.jsonl -o results.jsonl --concurrency 4
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import argparse
+import asyncio
+import json
+from pydantic import ValidationError
+from api.models.requests import BlogGenerationRequest
+from api.services.blog_service import BlogService
+from api.services.job_service import run_request
+from src.config.settings import JOB_CONCURRENCY
+
+
+async def run_batch(blog_service: BlogService, lines, output, concurrency: int, tenant_id: str = None) -> int:
+    """
+    Process JSONL request lines with a bounded pool of workers.
+
+    Args:
+        blog_service (BlogService): Service that runs the generation pipeline
+        lines (iterable): JSONL input lines, read lazily
+        output (file): Text stream the JSONL results are written to
+        concurrency (int): Number of requests in flight
+        tenant_id (str, optional): Tenant whose corpus & tone are used
+
+    Returns:
+        int: Number of failed requests
+    """
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    failed = 0
+
+    def write(record):
+        nonlocal failed
+        failed += "error" in record
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, fields, request = item
+            try:
+                result = await run_request(blog_service, request.purpose, request.language, tenant_id)
+            except Exception as e:
+                # a dead worker would leave the producer blocked on the full queue
+                print(f"Request {index} failed: {e!r}", file=sys.stderr)
+                result = {"error": f"Internal error: {e}"}
+            write({"index": index, **fields, **result})
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+            request = BlogGenerationRequest(**fields)
+        except (ValueError, TypeError, ValidationError) as e:
+            write({"index": index, "error": f"invalid request: {e}"})
+            continue
+        await queue.put((index, {k: v for k, v in fields.items() if k not in ("purpose", "language")}, request))
+
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of requests, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the results, '-' for stdout")
+    parser.add_argument("--concurrency", type=int, default=JOB_CONCURRENCY, help="requests in flight against Ollama")
+    parser.add_argument("--tenant", default=None, help="tenant whose PDFs (in TENANTS_DIR) are used as context")
+    args = parser.parse_args()
+
+    blog_service = BlogService()
+    source = sys.stdin if args.input == "-" else open(args.input, 'r')
+    output = sys.stdout if args.output == "-" else open(args.output, 'w')
+    try:
+        failed = asyncio.run(run_batch(blog_service, source, output, args.concurrency, args.tenant))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
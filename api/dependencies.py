@@ -1,4 +1,61 @@
+from fastapi import HTTPException, Header
 from api.services.blog_service import BlogService
+from api.services.job_service import JobService
+from src.config.paths import TENANTS_DIR
+from src.config.settings import READY_TIMEOUT, REQUEST_TIMEOUT
+from src.tenants import DEFAULT_TENANT, valid_tenant_id
+from typing import Optional
+import asyncio
 
 # singleton instance shared across routers for stateless memory 
+# (cheap to construct, the chunk corpus is loaded in the background on startup)
 blog_service = BlogService()
+
+# background batch jobs run against the same service 
+job_service = JobService(blog_service)
+
+
+async def get_blog_service() -> BlogService: 
+    """
+    Dependency of the routes that need the chunk corpus. Requests arriving while it is still
+    loading wait for up to READY_TIMEOUT seconds and are then rejected with a 503.
+    """
+    try: 
+        await asyncio.wait_for(blog_service.wait_ready(), READY_TIMEOUT)
+    except asyncio.TimeoutError: 
+        raise HTTPException(status_code=503, detail="Service is starting, the chunk corpus is still loading", headers={"Retry-After": str(max(int(READY_TIMEOUT), 1))})
+    except Exception as e: 
+        raise HTTPException(status_code=503, detail=f"Could not load the chunk corpus: {e}", headers={"Retry-After": str(max(int(READY_TIMEOUT), 1))})
+    return blog_service
+
+
+def get_tenant_id(x_tenant_id: Optional[str] = Header(None)) -> str: 
+    """
+    Tenant of a request, from the X-Tenant-ID header. Requests without it use the default tenant (PDF_DIR).
+    """
+    tenant_id = x_tenant_id or DEFAULT_TENANT
+    if not valid_tenant_id(tenant_id): 
+        raise HTTPException(status_code=400, detail="Invalid X-Tenant-ID, expected letters, digits, '-' or '_'")
+    if tenant_id != DEFAULT_TENANT and not (TENANTS_DIR / tenant_id).is_dir(): 
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id}")
+    return tenant_id
+
+
+def get_session_id(x_session_id: Optional[str] = Header(None)) -> Optional[str]: 
+    """
+    Optional session of a request, from the X-Session-ID header, scopes the tone setting.
+    """
+    if x_session_id is not None and not 0 < len(x_session_id) <= 128: 
+        raise HTTPException(status_code=400, detail="Invalid X-Session-ID, expected 1 to 128 characters")
+    return x_session_id
+
+
+def get_request_timeout(x_request_timeout: Optional[float] = Header(None)) -> Optional[float]: 
+    """
+    Deadline of a generation request in seconds: REQUEST_TIMEOUT, or less if the X-Request-Timeout header asks for it.
+    None if neither sets one.
+    """
+    if x_request_timeout is not None and x_request_timeout <= 0: 
+        raise HTTPException(status_code=400, detail="Invalid X-Request-Timeout, expected a positive number of seconds")
+    timeouts = [timeout for timeout in (x_request_timeout, REQUEST_TIMEOUT) if timeout]
+    return min(timeouts) if timeouts else None
@@ -3,15 +3,68 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from pathlib import Path
 import sys 
-from fastapi import FastAPI
-from api.routers import generate, settings 
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, Depends
+from fastapi.responses import JSONResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from api.routers import generate, settings, jobs, admin 
+from api.dependencies import blog_service, job_service, get_blog_service
+from api.services.blog_service import BlogService
+from src.admission import Overloaded
+from src.deadline import DeadlineExceeded
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI): 
+    # load the corpus & preload models in the background (so health checks answer right away)
+    # & keep the models warm while traffic is expected 
+    blog_service.start()
+    # start batch workers & resume jobs that were unfinished at the last shutdown 
+    job_service.start()
+    yield
+    await job_service.stop()
+    await blog_service.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc: Overloaded): 
+    # fast rejection, the client should come back after Retry-After 
+    return JSONResponse({"detail": str(exc)}, status_code=exc.status_code, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request, exc: DeadlineExceeded): 
+    return JSONResponse({"detail": str(exc)}, status_code=504)
 
 # include routers
 app.include_router(settings.router)
 app.include_router(generate.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
 
 @app.get("/health")
 def health_check(): 
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/ready")
+def readiness_check(): 
+    # 503 until the chunk corpus is loaded and both models answered a warm-up 
+    readiness = blog_service.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["status"] == "ready" else 503)
+
+@app.get("/stats")
+def stats(blog_service: BlogService = Depends(get_blog_service)): 
+    return {
+        "validation": blog_service.blog_generator.validation_stats, 
+        "candidates": blog_service.blog_generator.candidate_policy.stats(), 
+        "result_cache": blog_service.blog_generator.result_cache.stats(), 
+        "tenants": blog_service.tenants.stats(), 
+        "backends": blog_service.blog_generator.backend_pool.stats(), 
+        "admission": blog_service.admission.stats(), 
+        "in_flight": {"requests": blog_service.requests_in_flight.stats(), "stages": blog_service.blog_generator.in_flight.stats()}, 
+    }
+
+@app.get("/metrics")
+def metrics(): 
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
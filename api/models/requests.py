@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
 
 
 class ToneRequest(BaseModel): 
@@ -6,4 +7,11 @@ class ToneRequest(BaseModel):
 
 class BlogGenerationRequest(BaseModel): 
     purpose: str
-    language: str = "english"
\ No newline at end of file
+    language: str = "english"
+
+class MultiLanguageBlogRequest(BaseModel): 
+    purpose: str
+    languages: List[str] = Field(min_length=1)
+
+class BatchJobRequest(BaseModel): 
+    requests: List[BlogGenerationRequest] = Field(min_length=1)
\ No newline at end of file
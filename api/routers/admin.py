@@ -0,0 +1,17 @@
+from fastapi import APIRouter, HTTPException, Depends
+from api.dependencies import get_blog_service, get_tenant_id
+from api.services.blog_service import BlogService
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.post("/reload", response_model=None)
+async def reload_corpus(blog_service: BlogService = Depends(get_blog_service), tenant_id: str = Depends(get_tenant_id)): 
+    """
+    Re-chunk added, changed or removed PDFs and swap the new corpus in, without a restart.
+    The X-Tenant-ID header selects a tenant's corpus.
+    """
+    try: 
+        return await blog_service.reload(tenant_id)
+    except Exception as e: 
+        # the previous corpus stays live 
+        raise HTTPException(status_code=500, detail=f"Could not reload the corpus: {e}")
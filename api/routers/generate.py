@@ -1,11 +1,112 @@
-from fastapi import APIRouter, HTTPException
-from api.models.requests import BlogGenerationRequest
-from api.dependencies import blog_service
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from typing import Optional, Any, AsyncIterator, Awaitable
+from fastapi.responses import StreamingResponse
+from api.models.requests import BlogGenerationRequest, MultiLanguageBlogRequest
+from api.dependencies import get_blog_service, get_tenant_id, get_session_id, get_request_timeout
+from api.services.blog_service import BlogService
+from src.deadline import deadline_scope, DeadlineExceeded
 
 router = APIRouter()
 
+# status of answers nobody reads, the client went away (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def _wait_disconnect(request: Request) -> None: 
+    # the body has been read, the next message is the disconnect 
+    while (await request.receive())["type"] != "http.disconnect": 
+        pass
+
+
+async def _until_disconnected(request: Request, awaitable: Awaitable) -> Any: 
+    """
+    Await a route's work, cancelling it when the client disconnects first.
+    Returns:
+        The work's result, or an empty 499 response if the client disconnected
+    """
+    work = asyncio.ensure_future(awaitable)
+    disconnected = asyncio.ensure_future(_wait_disconnect(request))
+    try: 
+        await asyncio.wait({work, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally: 
+        # also when the route itself is cancelled 
+        work.cancel()
+        disconnected.cancel()
+    if not work.done() or work.cancelled(): 
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    return work.result()
+
+
+async def _events_until_disconnected(request: Request, events: AsyncIterator) -> AsyncIterator: 
+    """
+    Iterate a route's event stream, closing it (which cancels the inference) when the client disconnects,
+    also while no event is being sent.
+    """
+    disconnected = asyncio.ensure_future(_wait_disconnect(request))
+    step = None
+    try: 
+        while True: 
+            step = asyncio.ensure_future(events.__anext__())
+            await asyncio.wait({step, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done(): 
+                return
+            try: 
+                yield step.result()
+            except StopAsyncIteration: 
+                return
+    finally: 
+        # no awaiting here, the response task may itself be cancelled (Starlette's own disconnect listener) 
+        disconnected.cancel()
+        if step is not None and not step.done(): 
+            # cancelling the pending step ends the stream 
+            step.cancel()
+        else: 
+            asyncio.ensure_future(events.aclose())
+
+
 @router.post("/generate", response_model=None)
-def generate_blog_post(request: BlogGenerationRequest): 
-    return blog_service.generate_blog(request.purpose, request.language)
+async def generate_blog_post(request: BlogGenerationRequest, http_request: Request, blog_service: BlogService = Depends(get_blog_service), tenant_id: str = Depends(get_tenant_id), session_id: Optional[str] = Depends(get_session_id), timeout: Optional[float] = Depends(get_request_timeout)): 
+    with deadline_scope(timeout): 
+        return await _until_disconnected(http_request, blog_service.generate_blog(request.purpose, request.language, tenant_id, session_id))
     
 
+@router.post("/generate/multi", response_model=None)
+async def generate_blog_post_multi(request: MultiLanguageBlogRequest, http_request: Request, blog_service: BlogService = Depends(get_blog_service), tenant_id: str = Depends(get_tenant_id), session_id: Optional[str] = Depends(get_session_id), timeout: Optional[float] = Depends(get_request_timeout)): 
+    with deadline_scope(timeout): 
+        return await _until_disconnected(http_request, blog_service.generate_blog_multi(request.purpose, request.languages, tenant_id, session_id))
+
+
+@router.post("/generate/stream", response_model=None)
+async def stream_blog_post(request: BlogGenerationRequest, http_request: Request, blog_service: BlogService = Depends(get_blog_service), tenant_id: str = Depends(get_tenant_id), session_id: Optional[str] = Depends(get_session_id), timeout: Optional[float] = Depends(get_request_timeout)): 
+    """
+    Server-Sent Events variant of /generate: stage progress events, then the final stage's tokens as they arrive.
+    """
+    stream = blog_service.stream_blog(request.purpose, request.language, tenant_id, session_id)
+    with deadline_scope(timeout): 
+        # the first event comes after admission, so a rejection is still a plain 429/503 response, 
+        # and a client leaving while queued gives up its place right away 
+        first = await _until_disconnected(http_request, stream.__anext__())
+    if isinstance(first, Response): 
+        # cancelling the pending first step has ended the stream 
+        return first
+
+    async def events(): 
+        try: 
+            yield first
+            async for event in stream: 
+                yield event
+        finally: 
+            await stream.aclose()
+
+    async def sse(): 
+        try: 
+            async for event in _events_until_disconnected(http_request, events()): 
+                name = event.pop("event")
+                yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+        except (RuntimeError, ValueError, DeadlineExceeded) as e: 
+            # the response has already started, so errors are reported in-band 
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
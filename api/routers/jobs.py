@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException, Depends
+from api.models.requests import BatchJobRequest
+from api.dependencies import job_service, get_tenant_id
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.post("", response_model=None, status_code=202)
+async def submit_job(request: BatchJobRequest, tenant_id: str = Depends(get_tenant_id)): 
+    return job_service.submit([item.model_dump() for item in request.requests], tenant_id)
+
+@router.get("/{job_id}", response_model=None)
+async def get_job(job_id: str, tenant_id: str = Depends(get_tenant_id)): 
+    try: 
+        return job_service.status(job_id, tenant_id)
+    except KeyError: 
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@router.get("/{job_id}/results", response_model=None)
+async def get_job_results(job_id: str, tenant_id: str = Depends(get_tenant_id)): 
+    try: 
+        return {**job_service.status(job_id, tenant_id), "results": job_service.results(job_id, tenant_id)}
+    except KeyError: 
+        raise HTTPException(status_code=404, detail="Job not found")
\ No newline at end of file
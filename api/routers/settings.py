@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
 from api.models.requests import ToneRequest
-from api.dependencies import blog_service
+from api.dependencies import blog_service, get_tenant_id, get_session_id
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 @router.post("/tone", response_model=None)
-def set_tone(request: ToneRequest): 
-    return blog_service.set_tone(request.tone)
\ No newline at end of file
+async def set_tone(request: ToneRequest, tenant_id: str = Depends(get_tenant_id), session_id: Optional[str] = Depends(get_session_id)): 
+    # scoped to the session if X-Session-ID is sent, otherwise to the whole tenant 
+    return blog_service.set_tone(request.tone, tenant_id, session_id)
\ No newline at end of file
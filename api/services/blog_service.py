@@ -1,34 +1,281 @@
-from src.blog_generation import BlogGenerator
-from src.chunking import PdfChunker
-from typing import Dict, Any
+from src.config.paths import TENANTS_DIR, TENANT_CHUNKS_DIR
+from src.config.settings import TRANSLATION_CONCURRENCY, ADMISSION_CONCURRENCY, ADMISSION_QUEUE_DEPTH, HEARTBEAT_INTERVAL, KEEP_WARM_WINDOW, CORPUS_WATCH_INTERVAL, OLLAMA_HEALTH_INTERVAL, TENANT_CACHE_MB, SESSION_SETTINGS_MAX
+from src import metrics
+from src.admission import AdmissionController
+from src.deadline import check_deadline, current_deadline, with_deadline
+from src.result_cache import normalize_text
+from src.single_flight import SingleFlight
+from src.tenants import TenantRegistry, SessionSettings, DEFAULT_TENANT
+import asyncio
+import time
+from typing import Dict, Any, AsyncIterator, List
 
 class BlogService:
     """
     Orchestrates blog generation tasks across API endpoints.
-    Keeps track of current tone, language, and other session parameters.
+    Keeps track of the tone per tenant or session, and other session parameters.
+
+    The default tenant uses PDF_DIR, every other tenant has its own PDF directory in TENANTS_DIR.
+    Tenant corpora are loaded on first use into an LRU bounded by TENANT_CACHE_MB, while the
+    models, result cache and connection pools are shared by all tenants.
+
+    The chunk corpus and generator are built lazily, on a worker thread, by start() or the first
+    request, so constructing the service (and importing the API) does no PDF parsing and does not
+    import pdfplumber or ollama. reload() (or the PDF_DIR watcher) re-chunks changed PDFs and swaps
+    the new corpus into the live generator without interrupting in-flight requests.
     """
 
-    def __init__(self):
-        self.pdf_chunker = PdfChunker()
-        self.chunks = self.pdf_chunker.chunk(save_results=True) 
+    def __init__(self, blog_generator=None):
+        self.pdf_chunker = None
+        self.chunks = None
+        self.blog_generator = blog_generator
+
+        # tones set per tenant or per session 
+        self.settings = SessionSettings(max_sessions=SESSION_SETTINGS_MAX)
+        self.tenants = TenantRegistry(self._load_tenant, max_bytes=int(TENANT_CACHE_MB * 2**20))
+
+        # identical generate requests in flight 
+        self.requests_in_flight = SingleFlight()
+        # bounds the pipelines running against Ollama & the requests waiting for one 
+        self.admission = AdmissionController(ADMISSION_CONCURRENCY, ADMISSION_QUEUE_DEPTH)
+
+        # set once both models answered a warm-up 
+        self.models_warm = False
+
+        # traffic is expected right after startup 
+        self.last_request = time.monotonic()
+        self._load_task = None
+        self._keep_warm_task = None
+        self._watch_task = None
+        self._health_task = None
+        self._reload_lock = asyncio.Lock()
+        # PDF_DIR fingerprints of the live corpus 
+        self._fingerprints = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.blog_generator is not None
+
+    @property
+    def tone(self) -> str:
+        # tenant-wide tone of the default tenant
+        return self.settings.get(DEFAULT_TENANT)
+
+    @tone.setter
+    def tone(self, tone: str) -> None:
+        self.settings.set(DEFAULT_TENANT, None, tone)
+
+    def start(self) -> None:
+        """
+        Load the corpus and preload both models in the background, then keep the models warm with
+        periodic heartbeats while traffic is expected (until KEEP_WARM_WINDOW seconds after the last request).
+        The Ollama backends are health checked every OLLAMA_HEALTH_INTERVAL seconds.
+        """
+        if self._keep_warm_task is None:
+            self._keep_warm_task = asyncio.create_task(self._keep_warm())
+        if self._watch_task is None and CORPUS_WATCH_INTERVAL > 0:
+            self._watch_task = asyncio.create_task(self._watch())
+        if self._health_task is None and OLLAMA_HEALTH_INTERVAL > 0:
+            self._health_task = asyncio.create_task(self._health_checks())
+
+    async def stop(self) -> None:
+        """
+        Stop the keep-warm heartbeats, the PDF_DIR watcher and the Ollama backend health checks.
+        """
+        tasks = [task for task in (self._keep_warm_task, self._watch_task, self._health_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._keep_warm_task = None
+        self._watch_task = None
+        self._health_task = None
+
+    async def wait_ready(self) -> None:
+        """
+        Wait until the chunk corpus and generator are loaded, starting the load if needed.
+        The load runs on a worker thread so the event loop keeps answering health checks meanwhile.
+
+        Raises:
+            Exception: The error of a failed load, the next call retries it
+        """
+        if self.blog_generator is not None:
+            return
+        if self._load_task is None or (self._load_task.done() and self._load_task.exception() is not None):
+            self._load_task = asyncio.ensure_future(asyncio.to_thread(self._load))
+        # shielded, a caller giving up on waiting must not cancel the load for everyone else
+        await asyncio.shield(self._load_task)
+
+    def _load(self) -> None:
+        # heavy imports are deferred to the first load
+        from src.blog_generation import BlogGenerator
+        from src.chunking import PdfChunker
 
+        self.pdf_chunker = PdfChunker()
+        self._fingerprints = self.pdf_chunker.scan()
+        # the generator reads texts lazily from the store, which is only rebuilt if the PDFs changed
+        self.chunks = self.pdf_chunker.chunk_store()
         self.blog_generator = BlogGenerator(chunks=self.chunks)
 
-        self.tone = None
+    async def reload(self, tenant_id: str = None) -> Dict[str, Any]:
+        """
+        Re-chunk PDF_DIR and swap the new corpus into the live generator.
+        Only added or modified PDFs are parsed, unchanged ones are read from the parse cache. The swap
+        is atomic: requests in flight finish on the corpus they started with.
+
+        Args:
+            tenant_id (str, optional): Reload a tenant's corpus instead of the default one
 
-    def set_tone(self, tone: str) -> Dict[str, str]:
+        Returns:
+            dict: Whether the corpus changed, the added, changed & removed files, and the new chunk count & corpus hash
+        """
+        await self.wait_ready()
+        if tenant_id is not None and tenant_id != DEFAULT_TENANT:
+            return await self._reload_tenant(tenant_id)
+        # one reload at a time, a reload racing another could swap in an older corpus last
+        async with self._reload_lock:
+            return await asyncio.to_thread(self._reload)
+
+    def _reload(self) -> Dict[str, Any]:
+        from src.chunking import PdfChunker
+        from src.corpus import Corpus
+
+        if self.pdf_chunker is None:
+            self.pdf_chunker = PdfChunker()
+        previous = self._fingerprints or {}
+        fingerprints = self.pdf_chunker.scan()
+        chunks = self.pdf_chunker.chunk_store()
+        # index & hash are built before the swap, so new requests never see a half-built corpus
+        corpus = Corpus(chunks)
+
+        reloaded = corpus.corpus_hash != self.blog_generator.corpus_hash
+        if reloaded:
+            self.chunks = chunks
+            self.blog_generator.set_corpus(corpus)
+        self._fingerprints = fingerprints
+
+        return {
+            "reloaded": reloaded,
+            "added": sorted(path for path in fingerprints if path not in previous),
+            "changed": sorted(path for path in fingerprints if path in previous and fingerprints[path] != previous[path]),
+            "removed": sorted(path for path in previous if path not in fingerprints),
+            "chunks": len(chunks),
+            "corpus_hash": corpus.corpus_hash,
+        }
+
+    async def _reload_tenant(self, tenant_id: str) -> Dict[str, Any]:
+        # requests holding the old snapshot keep it, the next ones get the re-chunked corpus
+        previous = self.tenants.peek(tenant_id)
+        self.tenants.invalidate(tenant_id)
+        corpus = await self.tenants.get(tenant_id)
+        return {
+            "tenant": tenant_id,
+            "reloaded": previous is None or previous.corpus_hash != corpus.corpus_hash,
+            "chunks": len(corpus.chunks),
+            "corpus_hash": corpus.corpus_hash,
+        }
+
+    async def _watch(self) -> None:
+        # poll PDF_DIR and reload once a change has settled (two identical scans), so a file
+        # that is still being copied is not parsed half-written
+        last_scan = None
+        while True:
+            await asyncio.sleep(CORPUS_WATCH_INTERVAL)
+            if not self.loaded or self.pdf_chunker is None:
+                continue
+            scan = await asyncio.to_thread(self.pdf_chunker.scan)
+            if scan != self._fingerprints and scan == last_scan:
+                try:
+                    changes = await self.reload()
+                    print(f"Reloaded the chunk corpus: {len(changes['added'])} added, {len(changes['changed'])} changed, {len(changes['removed'])} removed")
+                except Exception as e:
+                    print(f"Could not reload the chunk corpus: {e}")
+            last_scan = scan
+
+    def _load_tenant(self, tenant_id: str):
+        from src.chunking import PdfChunker
+        from src.corpus import Corpus
+
+        pdf_dir = TENANTS_DIR / tenant_id
+        if not pdf_dir.is_dir():
+            raise FileNotFoundError(f"Unknown tenant: {tenant_id}")
+        # unchanged PDFs come from the parse cache, which is shared by all tenants
+        chunker = PdfChunker(pdf_dir=pdf_dir, chunks_dir=TENANT_CHUNKS_DIR / tenant_id)
+        return Corpus(chunker.chunk_store())
+
+    async def corpus_for(self, tenant_id: str = None):
+        """
+        Returns the corpus snapshot of a tenant, loading it if needed.
+
+        Raises:
+            FileNotFoundError: If the tenant has no PDF directory
+        """
+        await self.wait_ready()
+        if tenant_id is None or tenant_id == DEFAULT_TENANT:
+            return self.blog_generator.corpus
+        return await self.tenants.get(tenant_id)
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Returns whether the service can answer requests at full speed: corpus loaded and models warm.
+        """
+        ready = self.loaded and self.models_warm
+        return {"status": "ready" if ready else "starting", "corpus": self.loaded, "models": self.models_warm}
+
+    async def warm_up(self) -> None:
+        """
+        Load (or refresh the keep-alive of) the generation and translation models concurrently.
+        Failures are reported but not raised, an unreachable Ollama must not take the API down.
+        Models are warmed with the num_ctx their next call uses, so the warm-up doesn't trigger a reload.
+        """
+        models = [self.blog_generator.gen_model, self.blog_generator.translation_model]
+        results = await asyncio.gather(*(model.warm_up(self.blog_generator.warm_up_options(model)) for model in models), return_exceptions=True)
+        for model, result in zip(models, results):
+            if isinstance(result, Exception):
+                print(f"Could not warm up {model.model_name}: {result}")
+        self.models_warm = not any(isinstance(result, Exception) for result in results)
+
+    async def _keep_warm(self) -> None:
+        try:
+            await self.wait_ready()
+        except Exception as e:
+            # requests retry the load, see wait_ready
+            print(f"Could not load the chunk corpus: {e}")
+            return
+        await self.warm_up()
+        while HEARTBEAT_INTERVAL > 0:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            if time.monotonic() - self.last_request < KEEP_WARM_WINDOW:
+                await self.warm_up()
+
+    async def _health_checks(self) -> None:
+        # the backend pool is created with the generator
+        try:
+            await self.wait_ready()
+        except Exception:
+            return
+        await self.blog_generator.backend_pool.run_health_checks(OLLAMA_HEALTH_INTERVAL)
+
+    def set_tone(self, tone: str, tenant_id: str = None, session_id: str = None) -> Dict[str, str]:
         """
         Set the tone for subsequent blog post generations (optional).
         
         Args:
             tone (str): Desired tone (e.g., 'professional', 'casual', 'technical')
+            tenant_id (str, optional): Tenant the tone applies to. Defaults to the default tenant.
+            session_id (str, optional): Only apply the tone to this session of the tenant
         Returns:
             dict: Confirmation response containing the set tone
         """
-        self.tone = tone
-        return {"tone": self.tone}
+        self.settings.set(tenant_id or DEFAULT_TENANT, session_id, tone)
+        return {"tone": tone}
 
-    def generate_blog(self, purpose: str, language: str) -> Dict[str, str]:
+    def get_tone(self, tenant_id: str = None, session_id: str = None) -> str:
+        """
+        Returns the tone of a session, falling back to its tenant's tone (None if neither was set).
+        """
+        return self.settings.get(tenant_id or DEFAULT_TENANT, session_id)
+
+    async def generate_blog(self, purpose: str, language: str, tenant_id: str = None, session_id: str = None, priority: str = "interactive") -> Dict[str, str]:
         """
         Generates a blog post based on the provided purpose, applies any configured
         tone modifications, and translates to the specified language if requested.
@@ -36,9 +283,16 @@ class BlogService:
         Args:
             purpose (str): The intended purpose or topic for the blog post
             language (str): Target language for translation (optional, defaults to English)
+            tenant_id (str, optional): Tenant whose corpus is used. Defaults to the default tenant.
+            session_id (str, optional): Session whose tone is applied
+            priority (str, optional): Admission priority class, "interactive" or "batch"
             
         Returns:
             dict: Generated blog post in markdown format
+
+        Raises:
+            Overloaded: If the request is not admitted (queue full or its deadline can't be met)
+            DeadlineExceeded: If the current deadline (see src.deadline) passes first, the pipeline is then cancelled
             
         Note:
             - Tone modification is only applied if tone was previously set via set_tone()
@@ -46,13 +300,137 @@ class BlogService:
             - Generated content is based on pre-processed PDF chunks
         """
 
-        blog_post = self.blog_generator.generate_blog(purpose=purpose)
+        self.last_request = time.monotonic()
+        corpus = await self.corpus_for(tenant_id)
+        tone = self.get_tone(tenant_id, session_id)
+
+        # identical requests in flight (same corpus, purpose, tone, language & priority) share one pipeline run,
+        # which takes a single admission slot
+        key = (
+            corpus.corpus_hash, normalize_text(purpose),
+            normalize_text(tone, lower=True) if tone else None, normalize_text(language, lower=True) if language else None, priority,
+        )
+        if key in self.requests_in_flight:
+            metrics.COALESCED_CALLS.labels("request").inc()
+        blog_post = await with_deadline(self.requests_in_flight.do(key, lambda: self._admitted(priority, lambda: self._run_pipeline(purpose, tone, language, corpus))))
+        return {"markdown": blog_post}
+
+    async def _admitted(self, priority: str, run):
+        async with self.admission.slot(priority):
+            return await run()
+
+    async def _run_pipeline(self, purpose: str, tone: str, language: str, corpus) -> str:
+        blog_post = await self.blog_generator.generate_blog(purpose=purpose, corpus=corpus)
 
         # Apply tone and translation if specified by user 
-        if self.tone:
-            blog_post = self.blog_generator.modify_tone(blog_post, self.tone)
+        if tone:
+            blog_post = await self.blog_generator.modify_tone(blog_post, tone)
 
         if language: 
-            blog_post = self.blog_generator.translate(blog_post, language) # returns english by default
+            blog_post = await self.blog_generator.translate(blog_post, language) # returns english by default
 
-        return {"markdown": blog_post}
+        return blog_post
+
+
+    async def generate_blog_multi(self, purpose: str, languages: List[str], tenant_id: str = None, session_id: str = None, priority: str = "interactive") -> Dict[str, List[Dict[str, str]]]:
+        """
+        Generates a blog post once and translates it into several languages concurrently.
+        The english draft and tone modification run a single time, then the translations are
+        dispatched to the translation model with at most TRANSLATION_CONCURRENCY in flight.
+
+        Args:
+            purpose (str): The intended purpose or topic for the blog post
+            languages (list): Target languages, duplicates are translated once
+            tenant_id (str, optional): Tenant whose corpus is used
+            session_id (str, optional): Session whose tone is applied
+            priority (str, optional): Admission priority class, "interactive" or "batch"
+
+        Returns:
+            dict: {"variants": [...]} one per requested language in request order, each {"language", "markdown"} or {"language", "error"} if that translation failed, with "language" as sent
+        """
+        self.last_request = time.monotonic()
+        corpus = await self.corpus_for(tenant_id)
+        tone = self.get_tone(tenant_id, session_id)
+        return await with_deadline(self._admitted(priority, lambda: self._run_multi(purpose, tone, languages, corpus)))
+
+    async def _run_multi(self, purpose: str, tone: str, languages: List[str], corpus) -> Dict[str, List[Dict[str, str]]]:
+        blog_post = await self.blog_generator.generate_blog(purpose=purpose, corpus=corpus)
+        if tone:
+            blog_post = await self.blog_generator.modify_tone(blog_post, tone)
+
+        semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+
+        async def translate(language: str) -> Dict[str, str]:
+            async with semaphore:
+                try:
+                    return {"markdown": await self.blog_generator.translate(blog_post, language)}
+                except (RuntimeError, ValueError) as e:
+                    return {"error": str(e)}
+
+        # translate each language once, but answer every requested spelling under its own name
+        keys = [normalize_text(language, lower=True) for language in languages]
+        unique = list(dict.fromkeys(keys))
+        results = dict(zip(unique, await asyncio.gather(*(translate(key) for key in unique))))
+        return {"variants": [{"language": language, **results[key]} for language, key in zip(languages, keys)]}
+
+    async def stream_blog(self, purpose: str, language: str, tenant_id: str = None, session_id: str = None, priority: str = "interactive") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_blog. Intermediate stages run to completion and are reported
+        as progress events, the stage that produces the final output streams its tokens as they arrive.
+
+        Args:
+            purpose (str): The intended purpose or topic for the blog post
+            language (str): Target language for translation (optional, defaults to English)
+            tenant_id (str, optional): Tenant whose corpus is used
+            session_id (str, optional): Session whose tone is applied
+            priority (str, optional): Admission priority class, "interactive" or "batch"
+
+        Yields:
+            dict: Events, one of
+                - {"event": "stage", "stage": "generate" | "tone" | "translate", "status": "started" | "completed"}
+                - {"event": "token", "text": <markdown piece of the final output>}
+                - {"event": "done", "markdown": <complete blog post>}
+        """
+        self.last_request = time.monotonic()
+        # the deadline is captured on the first step, later steps may run outside the scope that set it
+        deadline = current_deadline()
+        corpus = await self.corpus_for(tenant_id)
+        tone = self.get_tone(tenant_id, session_id)
+        translate = bool(language) and not self.blog_generator._is_english(language)
+        stages = ["generate"] + (["tone"] if tone else []) + (["translate"] if translate else [])
+
+        # the slot is held until the stream is exhausted or closed
+        async with self.admission.slot(priority):
+            blog_post = None
+            for stage in stages:
+                check_deadline(deadline)
+                yield {"event": "stage", "stage": stage, "status": "started"}
+
+                if stage != stages[-1]:
+                    # intermediate stages, their output only feeds the next stage
+                    if stage == "generate":
+                        blog_post = await with_deadline(self.blog_generator.generate_blog(purpose=purpose, corpus=corpus), deadline)
+                    else:
+                        blog_post = await with_deadline(self.blog_generator.modify_tone(blog_post, tone), deadline)
+                else:
+                    if stage == "generate":
+                        stream = self.blog_generator.stream_generate_blog(purpose=purpose, corpus=corpus)
+                    elif stage == "tone":
+                        stream = self.blog_generator.stream_modify_tone(blog_post, tone)
+                    else:
+                        stream = self.blog_generator.stream_translate(blog_post, language)
+
+                    parts = []
+                    try:
+                        async for text in stream:
+                            check_deadline(deadline)
+                            parts.append(text)
+                            yield {"event": "token", "text": text}
+                    finally:
+                        # closing the stream cancels the inference
+                        await stream.aclose()
+                    blog_post = "".join(parts)
+
+                yield {"event": "stage", "stage": stage, "status": "completed"}
+
+        yield {"event": "done", "markdown": blog_post}
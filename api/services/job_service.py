@@ -0,0 +1,226 @@
+from api.services.blog_service import BlogService
+from src.admission import Overloaded
+from src.config.paths import JOBS_DIR
+from src.config.settings import JOB_CONCURRENCY
+from src.tenants import DEFAULT_TENANT
+from pathlib import Path
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Dict, Any, List
+
+
+async def run_request(blog_service: BlogService, purpose: str, language: str, tenant_id: str = None) -> Dict[str, str]:
+    """
+    Run a single blog generation request at batch priority, turning failures into an error record.
+    A request that is not admitted because the service is busy with interactive traffic waits for
+    the suggested Retry-After and tries again.
+
+    Args:
+        blog_service (BlogService): Service that runs the generation pipeline
+        purpose (str): The intended purpose or topic for the blog post
+        language (str): Target language for translation
+        tenant_id (str, optional): Tenant whose corpus & tone are used
+
+    Returns:
+        dict: {"markdown": ...} on success, {"error": ...} if the pipeline failed
+    """
+    while True:
+        try:
+            return await blog_service.generate_blog(purpose, language, tenant_id=tenant_id, priority="batch")
+        except Overloaded as e:
+            await asyncio.sleep(e.retry_after)
+        except (RuntimeError, ValueError, FileNotFoundError) as e:
+            return {"error": str(e)}
+
+
+class JobService:
+    """
+    Runs batches of blog generation requests in the background.
+
+    Jobs are queued to a pool of JOB_CONCURRENCY worker tasks, which bounds the number of requests
+    in flight against Ollama regardless of how many jobs are submitted. Every job is persisted in
+    JOBS_DIR as a `<job_id>.json` file with its requests and a `<job_id>.results.jsonl` file that
+    gets one line per finished item, so after a crash or restart only unfinished items are re-run.
+    """
+
+    def __init__(self, blog_service: BlogService, jobs_dir: Path = JOBS_DIR, concurrency: int = JOB_CONCURRENCY):
+        self.blog_service = blog_service
+        self.jobs_dir = Path(jobs_dir)
+        self.concurrency = concurrency
+        self.jobs = {}
+        self._queue = None
+        self._workers = []
+
+    def start(self) -> None:
+        """
+        Start the worker pool on the running event loop and re-queue unfinished items of persisted jobs.
+        """
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._resume()
+
+    async def stop(self) -> None:
+        """
+        Cancel the worker pool. Unfinished items stay persisted and are resumed by the next start().
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, requests: List[Dict[str, Any]], tenant_id: str = None) -> Dict[str, Any]:
+        """
+        Persist a new job and queue its requests.
+
+        Args:
+            requests (list): Blog generation requests, each with "purpose" and "language"
+            tenant_id (str, optional): Tenant the job runs for
+
+        Returns:
+            dict: The job's status
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        meta = {"job_id": job_id, "created_at": time.time(), "tenant_id": tenant_id, "requests": requests}
+        tmp_path = self.jobs_dir / f"{job_id}.json.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.jobs_dir / f"{job_id}.json")
+
+        self.jobs[job_id] = {"total": len(requests), "completed": set(), "failed": 0, "tenant_id": tenant_id}
+        for index, request in enumerate(requests):
+            self._queue.put_nowait((job_id, index, request))
+        return self.status(job_id)
+
+    def status(self, job_id: str, tenant_id: str = None) -> Dict[str, Any]:
+        """
+        Returns the progress of a job.
+
+        Args:
+            job_id (str): ID returned by submit
+            tenant_id (str, optional): Tenant asking, a job of another tenant is reported as unknown
+
+        Raises:
+            KeyError: If the job is unknown
+        """
+        job = self._job(job_id, tenant_id)
+        completed = len(job["completed"])
+        return {
+            "job_id": job_id,
+            "status": "completed" if completed == job["total"] else "running",
+            "total": job["total"],
+            "completed": completed,
+            "failed": job["failed"],
+        }
+
+    def results(self, job_id: str, tenant_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Returns the finished items of a job, ordered by their position in the request.
+
+        Args:
+            job_id (str): ID returned by submit
+            tenant_id (str, optional): Tenant asking, a job of another tenant is reported as unknown
+
+        Raises:
+            KeyError: If the job is unknown
+        """
+        self._job(job_id, tenant_id)
+        return sorted(self._read_results(job_id).values(), key=lambda result: result["index"])
+
+    def _job(self, job_id: str, tenant_id: str = None) -> Dict[str, Any]:
+        job = self.jobs[job_id]
+        # jobs submitted without a tenant run on the default corpus
+        if tenant_id is not None and (job["tenant_id"] or DEFAULT_TENANT) != tenant_id:
+            raise KeyError(job_id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, index, request = await self._queue.get()
+            try:
+                tenant_id = self.jobs[job_id]["tenant_id"]
+                result = await run_request(self.blog_service, request["purpose"], request.get("language", "english"), tenant_id)
+                await self._record(job_id, index, result)
+            except Exception as e:
+                # an unexpected error fails this item only, the worker goes on with the queue
+                print(f"Job {job_id} item {index} failed: {e!r}")
+                await self._record_failure(job_id, index, e)
+            finally:
+                self._queue.task_done()
+
+    async def _record(self, job_id: str, index: int, result: Dict[str, str]) -> None:
+        # the fsync waits for the disk, keep it off the event loop
+        await asyncio.to_thread(self._append_result, job_id, json.dumps({"index": index, **result}) + "\n")
+
+        job = self.jobs[job_id]
+        job["completed"].add(index)
+        if "error" in result:
+            job["failed"] += 1
+
+    def _append_result(self, job_id: str, line: str) -> None:
+        # append & flush each finished item so a crash only loses in-flight items
+        with open(self.jobs_dir / f"{job_id}.results.jsonl", 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _record_failure(self, job_id: str, index: int, error: Exception) -> None:
+        try:
+            await self._record(job_id, index, {"error": f"Internal error: {error}"})
+        except Exception as e:
+            # not persisted, the item is re-run after a restart
+            print(f"Could not record the failure of job {job_id} item {index}: {e!r}")
+            job = self.jobs.get(job_id)
+            if job is not None and index not in job["completed"]:
+                job["completed"].add(index)
+                job["failed"] += 1
+
+    def _read_results(self, job_id: str) -> Dict[int, Dict[str, Any]]:
+        results = {}
+        try:
+            with open(self.jobs_dir / f"{job_id}.results.jsonl", 'r') as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        # partially written line from a crash, the item is re-run
+                        continue
+                    results[result["index"]] = result
+        except FileNotFoundError:
+            pass
+        return results
+
+    def _terminate_partial_line(self, job_id: str) -> None:
+        # a crash mid-write leaves an unterminated line, start the next record on a fresh line
+        path = self.jobs_dir / f"{job_id}.results.jsonl"
+        if path.exists() and path.stat().st_size:
+            with open(path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def _resume(self) -> None:
+        if not self.jobs_dir.exists():
+            return
+        for meta_path in sorted(self.jobs_dir.glob("*.json")):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            job_id = meta["job_id"]
+            results = self._read_results(job_id)
+            self._terminate_partial_line(job_id)
+            self.jobs[job_id] = {
+                "total": len(meta["requests"]),
+                "completed": set(results),
+                "failed": sum("error" in result for result in results.values()),
+                "tenant_id": meta.get("tenant_id"),
+            }
+            for index, request in enumerate(meta["requests"]):
+                if index not in results:
+                    self._queue.put_nowait((job_id, index, request))
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark of PdfChunker.parse_pdf on synthetic large PDFs.
+
+Writes a text-only PDF with headings, bold lines and body paragraphs (raw PDF syntax, no extra
+dependencies), then reports pages/second of parse_pdf for each line extraction engine and of
+parse_pdfs_parallel for the given worker counts. The parse cache is not involved.
+
+Usage:
+    python -m benchmarks.bench_parse_pdf --pages 200 --workers 2,4
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import argparse
+import random
+import tempfile
+import time
+from src.chunking import PdfChunker
+from src.line_extraction import LINE_ENGINES
+
+
+WORDS = ("energy solar grid customers contract price transition sustainable homes heat pump "
+         "savings future renewable wind battery insight market team service local").split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_content(rng: random.Random, lines: int) -> bytes:
+    """
+    Content stream of one page: a heading, a bold subheading and body lines.
+    """
+    ops = []
+    y = 790
+    for line in range(lines):
+        if line == 0:
+            font, size = "F2", 20
+        elif line % 12 == 1:
+            font, size = "F2", 14
+        else:
+            font, size = ("F2" if rng.random() < 0.1 else "F1"), 9
+        text = " ".join(rng.choice(WORDS) for _ in range(4 if size > 9 else 14))
+        ops.append(f"BT /{font} {size} Tf 50 {y} Td ({_escape(text)}) Tj ET")
+        y -= size + 4
+        if y < 40:
+            break
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: Path, pages: int, lines: int = 55, seed: int = 0) -> None:
+    """
+    Write a synthetic text PDF.
+    Args:
+        path (Path): Output file
+        pages (int): Number of pages
+        lines (int, optional): Text lines per page
+        seed (int, optional): Seed of the random text
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,   # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        content = page_content(rng, lines)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % len(objects))
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+def best_of(repeat: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=55, help="text lines per page")
+    parser.add_argument("--workers", default="2,4", help="comma separated worker counts for parse_pdfs_parallel, empty to skip")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.pdf"
+        write_pdf(path, args.pages, args.lines)
+        print(f"{args.pages} pages, {path.stat().st_size / 1e6:.1f} MB")
+
+        outputs = {}
+        for engine in LINE_ENGINES:
+            chunker = PdfChunker(engine=engine)
+            outputs[engine] = chunker.parse_pdf(path)
+            seconds = best_of(args.repeat, lambda: chunker.parse_pdf(path))
+            print(f"parse_pdf {engine:>8}: {seconds:7.3f}s  {args.pages / seconds:8.1f} pages/s")
+        assert len(set(outputs.values())) == 1, "engines produced different markdown"
+
+        chunker = PdfChunker()
+        for workers in [int(workers) for workers in args.workers.split(",") if workers]:
+            seconds = best_of(args.repeat, lambda: chunker.parse_pdfs_parallel([path], workers=workers))
+            print(f"parallel {workers:>2} workers: {seconds:7.3f}s  {args.pages / seconds:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+A local stand-in for the Ollama HTTP API, for load tests and benchmarks without GPUs.
+
+Serves /api/generate and /api/chat (streamed NDJSON or a single JSON response), /api/ps and
+/api/tags. Outputs are generated at a configurable time-to-first-token and tokens/second, a
+configurable share of requests fails with an HTTP 500 and another share answers with chatty
+non-markdown text, so the pipeline's retry & abort paths are exercised. The final response
+carries the same token counts & durations a real server reports.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11434 --ttft 0.2 --tokens-per-sec 40 --non-markdown-rate 0.1
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+WORDS = ("energy solar grid customers contract price transition sustainable homes heat pump "
+         "savings future renewable wind battery insight market team service local").split()
+NON_MARKDOWN_PREFIX = "Sure! Here is the blog post you asked for:\n\n"
+
+
+class FakeOllama():
+    """
+    Simulated Ollama server state and behaviour.
+
+    Attributes:
+        ttft (float): Seconds before the first token (prompt evaluation), also reported as prompt_eval_duration
+        tokens_per_sec (float): Decoding speed, 0 emits all tokens at once
+        output_tokens (int): Tokens per response, capped by the request's num_predict
+        failure_rate (float): Share of requests answered with an HTTP 500
+        non_markdown_rate (float): Share of responses that are not markdown
+        load_time (float): Seconds to "load" a model on its first request
+        stats (dict): Counters of served requests (requests, failures, non_markdown, in_flight, max_in_flight, tokens)
+    """
+    def __init__(self, ttft: float = 0.05, tokens_per_sec: float = 200, output_tokens: int = 120, failure_rate: float = 0.0,
+                 non_markdown_rate: float = 0.0, load_time: float = 0.0, seed: int = 0):
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.non_markdown_rate = non_markdown_rate
+        self.load_time = load_time
+        self.loaded_models = {}
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "failures": 0, "non_markdown": 0, "in_flight": 0, "max_in_flight": 0, "tokens": 0}
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/api/generate", self.generate, methods=["POST"]),
+            Route("/api/chat", self.chat, methods=["POST"]),
+            Route("/api/ps", self.ps, methods=["GET"]),
+            Route("/api/tags", self.tags, methods=["GET"]),
+            Route("/", lambda request: JSONResponse("Ollama is running"), methods=["GET"]),
+        ])
+
+    async def generate(self, request: Request):
+        body = await request.json()
+        return await self._respond(body, len(body.get("prompt", "").split()), chat=False)
+
+    async def chat(self, request: Request):
+        body = await request.json()
+        prompt_tokens = sum(len(message.get("content", "").split()) for message in body.get("messages", []))
+        return await self._respond(body, prompt_tokens, chat=True)
+
+    async def ps(self, request: Request):
+        return JSONResponse({"models": [self._model_info(name, expires_at) for name, expires_at in self.loaded_models.items()]})
+
+    async def tags(self, request: Request):
+        return JSONResponse({"models": [self._model_info(name, None) for name in self.loaded_models]})
+
+    def output_text(self, tokens: int, markdown: bool) -> List[str]:
+        """
+        Returns the pieces of a response of `tokens` tokens, each piece is one token.
+        """
+        pieces = ["#", " Blog", " post", "\n\n"] if markdown else [NON_MARKDOWN_PREFIX]
+        while len(pieces) < tokens:
+            word = self.rng.choice(WORDS)
+            pieces.append(("\n\n" if self.rng.random() < 0.08 else " ") + word)
+        return pieces[:max(tokens, 1)]
+
+    async def _respond(self, body: Dict[str, Any], prompt_tokens: int, chat: bool):
+        model = body.get("model", "")
+        stream = body.get("stream", True)
+        options = body.get("options") or {}
+        self.stats["requests"] += 1
+
+        if self.rng.random() < self.failure_rate:
+            self.stats["failures"] += 1
+            return JSONResponse({"error": "simulated failure"}, status_code=500)
+
+        load_seconds = 0.0
+        if model not in self.loaded_models:
+            load_seconds = self.load_time
+        self.loaded_models[model] = datetime.now(timezone.utc).isoformat()
+
+        is_empty = not body.get("prompt") and not body.get("messages")
+        tokens = 0 if is_empty else min(self.output_tokens, options.get("num_predict") or self.output_tokens)
+        markdown = self.rng.random() >= self.non_markdown_rate
+        if tokens and not markdown:
+            self.stats["non_markdown"] += 1
+        pieces = self.output_text(tokens, markdown) if tokens else []
+
+        async def lines():
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            started = time.perf_counter()
+            emitted = 0
+            try:
+                await asyncio.sleep(load_seconds + (self.ttft if pieces else 0))
+                decode_started = time.perf_counter()
+                for piece in pieces:
+                    emitted += 1
+                    self.stats["tokens"] += 1
+                    yield self._part(model, piece, chat, done=False)
+                    if self.tokens_per_sec:
+                        await asyncio.sleep(1 / self.tokens_per_sec)
+                yield self._part(model, "", chat, done=True, stats={
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": emitted,
+                    "load_duration": int(load_seconds * 1e9),
+                    "prompt_eval_duration": int(self.ttft * 1e9) if pieces else 0,
+                    "eval_duration": int((time.perf_counter() - decode_started) * 1e9),
+                    "total_duration": int((time.perf_counter() - started) * 1e9),
+                })
+            finally:
+                self.stats["in_flight"] -= 1
+
+        if stream:
+            return StreamingResponse((json.dumps(part) + "\n" async for part in lines()), media_type="application/x-ndjson")
+
+        # non-streamed: run to completion, then answer with the concatenated text
+        content = []
+        final = None
+        async for part in lines():
+            content.append(part["message"]["content"] if chat else part["response"])
+            final = part
+        if chat:
+            final["message"]["content"] = "".join(content)
+        else:
+            final["response"] = "".join(content)
+        return JSONResponse(final)
+
+    @staticmethod
+    def _part(model: str, piece: str, chat: bool, done: bool, stats: Dict[str, int] = None) -> Dict[str, Any]:
+        part = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+        if chat:
+            part["message"] = {"role": "assistant", "content": piece}
+        else:
+            part["response"] = piece
+        if done:
+            part["done_reason"] = "stop"
+            part.update(stats or {})
+        return part
+
+    @staticmethod
+    def _model_info(name: str, expires_at: str) -> Dict[str, Any]:
+        info = {"name": name, "model": name, "size": 0, "digest": "", "details": {}}
+        if expires_at is not None:
+            info["expires_at"] = expires_at
+            info["size_vram"] = 0
+        return info
+
+
+class ServerThread():
+    """
+    Serves an ASGI app on a free local port from a background thread.
+    """
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self.url = "http://%s:%d" % self._socket.getsockname()
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", timeout_keep_alive=30, backlog=4096))
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError(f"server on {self.url} failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self._socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FakeOllamaServer(ServerThread):
+    """
+    Runs a FakeOllama on a free local port in a background thread.
+
+    Usage:
+        with FakeOllamaServer(FakeOllama(ttft=0.1)) as server:
+            model = AsyncOllamaModel("mistral:latest", {}, host=server.url)
+    """
+    def __init__(self, fake: FakeOllama = None, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake or FakeOllama()
+        super().__init__(self.fake.app(), host, port)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the FakeOllama behaviour options to a command line parser.
+    """
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="decoding speed, 0 for instant")
+    parser.add_argument("--output-tokens", type=int, default=120, help="tokens per response (capped by num_predict)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--non-markdown-rate", type=float, default=0.0, help="share of responses that are not markdown")
+    parser.add_argument("--load-time", type=float, default=0.0, help="seconds to load a model on first use")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeOllama:
+    return FakeOllama(
+        ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, output_tokens=args.output_tokens, failure_rate=args.failure_rate,
+        non_markdown_rate=args.non_markdown_rate, load_time=args.load_time, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(from_arguments(args).app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Load test of the FastAPI app against a local fake Ollama server.
+
+Starts a FakeOllama with the given behaviour and serves the app next to it on a local port (both
+in background threads of this process), then drives it over HTTP with a closed loop of
+`concurrency` clients and reports throughput, p50/p95/p99 latency and retry amplification (LLM
+attempts per pipeline stage call). Several concurrency levels can be compared in one run.
+
+Usage:
+    python -m benchmarks.load_test --requests 200 --concurrency 1,8,32 --ttft 0.2 --tokens-per-sec 40 --non-markdown-rate 0.1
+    python -m benchmarks.load_test --endpoint /generate/stream --language dutch --max-p95 5
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, Any, List
+import httpx
+from benchmarks.fake_ollama import FakeOllamaServer, ServerThread, add_arguments, from_arguments
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of a list of values, NaN for an empty list.
+    """
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def total_attempts(validation_stats: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    return {
+        "attempts": sum(stats["attempts"] for stats in validation_stats.values()),
+        "retries": sum(stats["retries"] for stats in validation_stats.values()),
+    }
+
+
+async def run_level(url: str, blog_service, endpoint: str, requests: int, concurrency: int, language: str, distinct: int) -> Dict[str, Any]:
+    """
+    Send `requests` requests with `concurrency` clients in flight.
+
+    Returns:
+        dict: Throughput, latency percentiles (and time to first byte for streams), errors & retry amplification
+    """
+    before = total_attempts(blog_service.blog_generator.validation_stats)
+    latencies = []
+    first_bytes = []
+    errors = 0
+    counter = iter(range(requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                # distinct purposes miss the result cache, a smaller pool measures cache hits
+                payload = {"purpose": f"blog post number {i % distinct} about energy", "language": language}
+                start = time.perf_counter()
+                async with client.stream("POST", endpoint, json=payload) as response:
+                    first = None
+                    failed = response.status_code != 200
+                    async for chunk in response.aiter_bytes():
+                        if first is None:
+                            first = time.perf_counter() - start
+                        failed = failed or b"event: error" in chunk
+                latencies.append(time.perf_counter() - start)
+                first_bytes.append(first if first is not None else latencies[-1])
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    after = total_attempts(blog_service.blog_generator.validation_stats)
+    attempts = after["attempts"] - before["attempts"]
+    stage_calls = attempts - (after["retries"] - before["retries"])
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "ttfb_p50": percentile(first_bytes, 50),
+        "retry_amplification": attempts / stage_calls if stage_calls else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", default="/generate", choices=["/generate", "/generate/stream"])
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--language", default="english", help="target language, anything but english adds the translate stage")
+    parser.add_argument("--distinct", type=int, default=0, help="number of distinct purposes, 0 makes every request unique")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    parser.add_argument("--max-p95", type=float, default=0, help="exit with an error if a level's p95 latency exceeds this many seconds")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with FakeOllamaServer(from_arguments(args)) as server:
+        # the app's Ollama clients pick up the host when they are first created
+        os.environ["OLLAMA_HOST"] = server.url
+        from api.main import app
+        from api.dependencies import blog_service
+
+        results = []
+        with ServerThread(app) as app_server:
+            # the app loads its corpus & warms the models in the background on startup
+            while httpx.get(f"{app_server.url}/ready").status_code != 200:
+                time.sleep(0.1)
+            for level in [int(level) for level in args.concurrency.split(",")]:
+                blog_service.blog_generator.result_cache.clear()
+                distinct = args.distinct or args.requests
+                results.append(asyncio.run(run_level(app_server.url, blog_service, args.endpoint, args.requests, level, args.language, distinct)))
+        served = server.fake.stats
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print(f"{'concurrency':>11} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'ttfb50':>7} {'errors':>6} {'retry x':>7}")
+        for r in results:
+            print(f"{r['concurrency']:>11} {r['throughput']:>8.2f} {r['p50']:>7.3f} {r['p95']:>7.3f} {r['p99']:>7.3f} "
+                  f"{r['ttfb_p50']:>7.3f} {r['errors']:>6} {r['retry_amplification']:>7.2f}")
+        print(f"fake ollama: {served['requests']} requests, {served['failures']} failures, "
+              f"{served['non_markdown']} non-markdown, max {served['max_in_flight']} in flight")
+
+    if args.max_p95 and any(result["p95"] > args.max_p95 for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
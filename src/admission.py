@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Any
+from src import metrics
+from src.deadline import remaining
+
+
+# priority classes, lower values are admitted first
+PRIORITIES = {"interactive": 0, "batch": 1}
+_PRIORITY_NAMES = {rank: priority for priority, rank in PRIORITIES.items()}
+
+
+class Overloaded(Exception):
+    """
+    A request was not admitted. `status_code` is 429 when the queue is full (or the request was
+    pushed out by higher priority traffic) and 503 when it can't be served before its deadline.
+    """
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController():
+    """
+    Bounds the pipeline runs in flight and the requests waiting for one.
+
+    At most `concurrency` runs hold a slot, up to `max_queue` more wait for one in priority order
+    (then arrival order). A request arriving at a full queue is rejected right away instead of
+    piling up, unless a lower priority request is waiting, which it then replaces. Requests whose
+    deadline would pass before a slot frees up (estimated from the average run time) are rejected
+    right away as well. Rejections carry a Retry-After estimate.
+
+    A waiting request that is cancelled (client disconnect, deadline) leaves the queue.
+
+    Attributes:
+        concurrency (int): Runs in flight at most
+        max_queue (int): Requests waiting for a slot at most
+        running (int): Runs holding a slot
+        run_seconds (float): Moving average of the run time, None until the first run finished
+    """
+    def __init__(self, concurrency: int, max_queue: int, clock: Callable[[], float] = time.monotonic):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.clock = clock
+        self.running = 0
+        self.run_seconds = None
+        self.admitted = 0
+        self.rejected = 0
+        self._queue = []    # heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a slot is likely free for a new request, at least 1.
+        """
+        return max(1, math.ceil((self.run_seconds or 1) * (len(self._queue) + 1) / max(self.concurrency, 1)))
+
+    def _reject(self, message: str, status_code: int, priority: str) -> Overloaded:
+        self.rejected += 1
+        metrics.ADMISSION_REJECTED.labels(priority, str(status_code)).inc()
+        return Overloaded(message, status_code, self.retry_after())
+
+    async def acquire(self, priority: str = "interactive") -> None:
+        """
+        Wait for a run slot.
+        Raises:
+            Overloaded: If the request is not admitted
+        """
+        rank = PRIORITIES[priority]
+        if self.running < self.concurrency and not self._queue:
+            self.running += 1
+            self.admitted += 1
+            return
+
+        if len(self._queue) >= self.max_queue:
+            # cancelled waiters leave the queue once they run again, they don't hold a place meanwhile
+            self._queue = [entry for entry in self._queue if not entry[2].done()]
+            heapq.heapify(self._queue)
+            metrics.ADMISSION_QUEUED.set(len(self._queue))
+        if len(self._queue) >= self.max_queue:
+            lowest = max(self._queue, default=None)
+            if lowest is None or lowest[0] <= rank:
+                raise self._reject("Too many requests queued, retry later", 429, priority)
+            # interactive traffic goes ahead of queued batch requests
+            self._queue.remove(lowest)
+            heapq.heapify(self._queue)
+            lowest[2].set_exception(self._reject("Pushed out of the queue by higher priority requests", 429, _PRIORITY_NAMES[lowest[0]]))
+
+        left = remaining()
+        ahead = sum(1 for entry in self._queue if entry[0] <= rank)
+        if left is not None and self.run_seconds is not None and self.run_seconds * (ahead + 1) / max(self.concurrency, 1) > left:
+            raise self._reject("The request can't be served before its deadline", 503, priority)
+
+        queued_at = self.clock()
+        entry = (rank, next(self._arrivals), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, entry)
+        metrics.ADMISSION_QUEUED.set(len(self._queue))
+        try:
+            await entry[2]
+        except BaseException:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            elif entry[2].done() and not entry[2].cancelled() and entry[2].exception() is None:
+                # the slot was handed over just as the request was cancelled
+                self.release()
+            metrics.ADMISSION_QUEUED.set(len(self._queue))
+            raise
+        self.admitted += 1
+        metrics.ADMISSION_WAIT_SECONDS.labels(priority).observe(self.clock() - queued_at)
+
+    def release(self, seconds: float = None) -> None:
+        """
+        Free a slot, handing it to the next queued request if any.
+        Args:
+            seconds (float, optional): Run time of the slot's request, for the wait estimates
+        """
+        if seconds is not None:
+            self.run_seconds = seconds if self.run_seconds is None else 0.8 * self.run_seconds + 0.2 * seconds
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                metrics.ADMISSION_QUEUED.set(len(self._queue))
+                future.set_result(None)
+                return
+        metrics.ADMISSION_QUEUED.set(0)
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive"):
+        """
+        Hold a run slot for the duration of the block.
+        """
+        await self.acquire(priority)
+        metrics.ADMISSION_RUNNING.set(self.running)
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.release(self.clock() - start)
+            metrics.ADMISSION_RUNNING.set(self.running)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running, "queued": len(self._queue), "concurrency": self.concurrency, "max_queue": self.max_queue,
+            "admitted": self.admitted, "rejected": self.rejected, "run_seconds": self.run_seconds,
+        }
@@ -0,0 +1,215 @@
+import asyncio
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterable, List, Optional, Sequence
+import httpx
+from ollama import AsyncClient, ResponseError
+from src import metrics
+from src.config.settings import OLLAMA_MAX_CONNECTIONS
+
+
+# pooled async clients, one per (event loop, host) since httpx connections are bound to the loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(host: str = None) -> AsyncClient:
+    """
+    Returns the shared, connection-pooled async Ollama client for a host on the running event loop.
+    Args:
+        host (str, optional): Ollama server URL, defaults to the OLLAMA_HOST environment variable
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if host not in clients:
+        clients[host] = AsyncClient(
+            host=host,
+            limits=httpx.Limits(max_connections=OLLAMA_MAX_CONNECTIONS, max_keepalive_connections=OLLAMA_MAX_CONNECTIONS),
+        )
+    return clients[host]
+
+
+class OllamaUnavailableError(RuntimeError):
+    """
+    No Ollama backend serving the model could be reached (all candidates failed or are ejected).
+    """
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Whether an error is the backend's fault (unreachable, dropped connection, server error), so the
+    call may be retried on another backend. Client errors such as an unknown model are not.
+    """
+    if isinstance(error, ResponseError):
+        return error.status_code >= 500
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+def host_label(host: Optional[str]) -> str:
+    # None is the ollama client's default, OLLAMA_HOST or 127.0.0.1:11434
+    return host or "default"
+
+
+class Backend():
+    """
+    Routing state of one Ollama server, as seen by this process.
+
+    Attributes:
+        host (str): Server URL, None for the ollama client's default
+        in_flight (int): Calls of this process currently running on the server
+        requests (int): Calls routed to the server
+        failures (int): Consecutive failed calls or health checks
+        ejected_until (float): Clock time until which the server gets no traffic
+        loaded_models (set): Models the server has loaded, from /api/ps and successful calls
+    """
+    def __init__(self, host: Optional[str]):
+        self.host = host
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.loaded_models = set()
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "host": host_label(self.host), "available": self.available(now), "in_flight": self.in_flight,
+            "requests": self.requests, "failures": self.failures, "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class OllamaBackendPool():
+    """
+    Routes model calls across several Ollama servers.
+
+    Each call goes to the least-loaded available backend, where load is the number of this
+    process' calls in flight on it, plus `load_penalty` if the backend does not have the model
+    loaded yet (a cold load costs about as much as that many queued requests). Ties go to the
+    backend that served the fewest requests, so idle backends are used in turn.
+
+    Backends that fail `eject_after` consecutive calls or a health check are ejected for
+    `eject_seconds`, after which they get traffic again; one more failure ejects them again.
+    When every candidate is ejected, the one that becomes available first is still tried rather
+    than failing the call outright. Health checks (/api/ps every `health_interval` seconds, see
+    run_health_checks) eject unreachable servers before requests hit them and refresh which
+    models each server has loaded.
+
+    Attributes:
+        backends (Dict[str, Backend]): Backends by host
+        load_penalty (int): In-flight calls a cold model load is worth when picking a backend
+        eject_after (int): Consecutive failures that eject a backend
+        eject_seconds (float): How long an ejected backend gets no traffic
+        health_timeout (float): Seconds a health check may take
+    """
+    def __init__(self, hosts: Sequence[Optional[str]], load_penalty: int = 4, eject_after: int = 2, eject_seconds: float = 30,
+                 health_timeout: float = 5, clock: Callable[[], float] = time.monotonic):
+        self.backends = {host: Backend(host) for host in (hosts or [None])}
+        self.load_penalty = load_penalty
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_timeout = health_timeout
+        self.clock = clock
+
+    @property
+    def hosts(self) -> List[Optional[str]]:
+        return list(self.backends)
+
+    def choose(self, model_name: str, hosts: Iterable[Optional[str]] = None, exclude: Iterable[Optional[str]] = ()) -> Backend:
+        """
+        Pick the backend for a call, see the class docstring.
+        Args:
+            model_name (str): Model the call runs
+            hosts (Iterable[str], optional): Backends allowed to serve the model. Defaults to all.
+            exclude (Iterable[str], optional): Backends already tried by this call
+
+        Raises:
+            OllamaUnavailableError: If no allowed backend is left to try
+        """
+        exclude = set(exclude)
+        candidates = [self.backends[host] for host in (self.hosts if hosts is None else hosts) if host not in exclude]
+        if not candidates:
+            raise OllamaUnavailableError(f"No Ollama backend left to serve {model_name}")
+        now = self.clock()
+        available = [backend for backend in candidates if backend.available(now)]
+        if not available:
+            return min(candidates, key=lambda backend: backend.ejected_until)
+        return min(available, key=lambda backend: (
+            backend.in_flight + (0 if model_name in backend.loaded_models else self.load_penalty), backend.requests,
+        ))
+
+    def spare(self, hosts: Iterable[Optional[str]], max_in_flight: int) -> int:
+        """
+        Calls that could still start on the available backends among `hosts` before each has `max_in_flight` in flight.
+        """
+        now = self.clock()
+        return sum(max(max_in_flight - backend.in_flight, 0) for backend in (self.backends[host] for host in hosts) if backend.available(now))
+
+    @contextmanager
+    def lease(self, backend: Backend):
+        """
+        Count a call as in flight on a backend for the duration of the block.
+        """
+        backend.in_flight += 1
+        backend.requests += 1
+        metrics.OLLAMA_BACKEND_IN_FLIGHT.labels(host_label(backend.host)).inc()
+        try:
+            yield backend
+        finally:
+            backend.in_flight -= 1
+            metrics.OLLAMA_BACKEND_IN_FLIGHT.labels(host_label(backend.host)).dec()
+
+    def report_success(self, backend: Backend, model_name: str = None) -> None:
+        backend.failures = 0
+        if model_name is not None:
+            backend.loaded_models.add(model_name)
+
+    def report_failure(self, backend: Backend, error: BaseException = None) -> None:
+        backend.failures += 1
+        metrics.OLLAMA_BACKEND_FAILURES.labels(host_label(backend.host)).inc()
+        if backend.failures >= self.eject_after:
+            self.eject(backend, error)
+
+    def eject(self, backend: Backend, error: BaseException = None) -> None:
+        if backend.available(self.clock()):
+            metrics.OLLAMA_BACKEND_EJECTIONS.labels(host_label(backend.host)).inc()
+            print(f"Ejecting Ollama backend {host_label(backend.host)} for {self.eject_seconds:g}s: {error}")
+        backend.ejected_until = self.clock() + self.eject_seconds
+        # whatever it had loaded may be gone once it is back
+        backend.loaded_models.clear()
+
+    async def check(self, backend: Backend) -> bool:
+        """
+        Health check a backend: list its loaded models, eject it if it does not answer.
+        Returns:
+            bool: Whether the backend answered
+        """
+        try:
+            response = await asyncio.wait_for(get_async_client(backend.host).ps(), self.health_timeout)
+        except Exception as e:
+            backend.failures = max(backend.failures + 1, self.eject_after)
+            self.eject(backend, e)
+            return False
+        backend.loaded_models = {model.model for model in response.models}
+        if backend.available(self.clock()):
+            backend.failures = 0
+        return True
+
+    async def check_all(self) -> Dict[str, bool]:
+        backends = list(self.backends.values())
+        results = await asyncio.gather(*(self.check(backend) for backend in backends))
+        for backend, healthy in zip(backends, results):
+            metrics.OLLAMA_BACKEND_UP.labels(host_label(backend.host)).set(int(healthy))
+        return {host_label(backend.host): healthy for backend, healthy in zip(backends, results)}
+
+    async def run_health_checks(self, interval: float) -> None:
+        """
+        Health check every backend every `interval` seconds, until cancelled.
+        """
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self.clock()
+        return [backend.stats(now) for backend in self.backends.values()]
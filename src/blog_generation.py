@@ -3,44 +3,163 @@ import sys
 from pathlib import Path
 # sys.path.insert(0, str(Path(__file__).parent.parent))
 import json 
+import time
+import asyncio
 import requests 
-from ollama import generate, chat
 import re 
-from typing import Dict, Any 
-from src.config.paths import DATA_DIR
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional 
+from src.config.paths import DATA_DIR, RESULT_CACHE_DIR
+from src.config.settings import CONTEXT_TOP_K, MAX_NUM_CTX, NUM_CTX_BUCKETS, CONTEXT_TOKEN_MARGIN, NUM_CTX_SHRINK_AFTER, OLLAMA_HOSTS, GEN_MODEL_HOSTS, TRANSLATION_MODEL_HOSTS, OLLAMA_LOAD_PENALTY, OLLAMA_EJECT_AFTER, OLLAMA_EJECT_SECONDS, GEN_MODEL_KEEP_ALIVE, TRANSLATION_MODEL_KEEP_ALIVE, TRANSLATION_SEGMENT_TOKENS, TRANSLATION_SEGMENT_CONCURRENCY, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_DISK, RESULT_CACHE_DISK_ENTRIES, MAX_CANDIDATES, CANDIDATE_TARGET_FAILURE, CANDIDATE_MAX_LOAD
+from src import metrics
+from src.markdown_stream import MarkdownStreamFilter
+from src.markdown_segments import split_markdown, outline, clean_segment
+from src.result_cache import ResultCache, normalize_text
+from src.single_flight import SingleFlight
+from src.candidates import CandidatePolicy, candidate_seed
+from src.backend_pool import OllamaBackendPool, OllamaUnavailableError, get_async_client, host_label, is_backend_failure
+from src.context_budget import ContextBudget, estimate_messages_tokens, fit_texts, truncate_to_tokens
+from src.chunk_store import ChunkStore
+from src.corpus import Corpus
+from src.retrieval import Bm25Index
 
 
-class OllamaModel(): 
+# fixed system prompt of the generation stage, kept byte-identical across requests for Ollama's prompt cache 
+GENERATION_SYSTEM_PROMPT = """
+        You are an expert at writing blog posts (300-400 words) in markdown format only. 
+        You write engaging, informative blog posts that are informed by the company’s mission, tone, and target audience, which is described in the documents provided with each request.  
+        """
+
+# counters of Ollama's final response, recorded per pipeline stage & attempt 
+RESPONSE_STATS = ("prompt_eval_count", "eval_count", "prompt_eval_duration", "eval_duration", "load_duration", "total_duration", "done_reason")
+
+class AsyncOllamaModel(): 
     """
-    A wrapper class for Ollama language models that provides generation and chat functionality.
+    A wrapper for Ollama language models built on a shared, connection-pooled AsyncClient.
+    In-flight generations are awaited as coroutines instead of blocking a worker thread.
+    Calls are routed through an OllamaBackendPool: a call that fails because of its backend
+    (unreachable, dropped connection, server error) before producing any output is retried on
+    another backend of the model.
     Attributes:
         model_name (str): The name/identifier of the Ollama model to use
         model_parameters (Dict[str, Any]): Configuration parameters for the model
+        keep_alive (str): How long Ollama keeps the model loaded after each request (e.g. "30m", negative values keep it loaded forever)
+        pool (OllamaBackendPool): Backends the model's calls are routed across
+        hosts (List[str]): Backends of the pool that serve this model
     """
-    def __init__(self, model_name: str, model_parameters: Dict[str, Any]):
-        # generation model 
+    def __init__(self, model_name: str, model_parameters: Dict[str, Any], host: str = None, keep_alive: str = None, 
+                 pool: OllamaBackendPool = None, hosts: List[str] = None):
         self.model_name = model_name
         self.model_parameters = model_parameters
+        self.keep_alive = keep_alive
+        # a single host is a pool of one 
+        self.pool = pool if pool is not None else OllamaBackendPool([host])
+        self.hosts = list(hosts) if hosts else self.pool.hosts
+
+    def _unavailable(self) -> OllamaUnavailableError: 
+        hosts = ", ".join(host_label(host) for host in self.hosts)
+        return OllamaUnavailableError(f"Could not connect to Ollama server, check that it is listening on {hosts} (default: 127.0.0.1:11434)")
+
+    async def _call(self, request: Callable) -> Any: 
+        """
+        Run a non-streamed request on a backend of the model, failing over to the others.
+        Args:
+            request (Callable): Function taking an AsyncClient and returning the request's coroutine
+        """
+        tried = []
+        while True: 
+            backend = self.pool.choose(self.model_name, self.hosts, exclude=tried)
+            tried.append(backend.host)
+            try: 
+                with self.pool.lease(backend): 
+                    response = await request(get_async_client(backend.host))
+            except Exception as e: 
+                if not is_backend_failure(e): 
+                    raise RuntimeError(f"Ollama request for {self.model_name} failed on {host_label(backend.host)}: {e}") from e
+                self.pool.report_failure(backend, e)
+                if len(tried) >= len(self.hosts): 
+                    raise self._unavailable() from e
+                metrics.OLLAMA_FAILOVERS.labels(self.model_name).inc()
+                continue
+            self.pool.report_success(backend, self.model_name)
+            return response
 
+    async def _stream(self, request: Callable, response_stats: Dict[str, Any], content: Callable) -> AsyncIterator[str]: 
+        """
+        Stream a request from a backend of the model, failing over to the others until output started.
+        Closing the iterator early closes the connection, which cancels the generation on the server.
+        Args:
+            request (Callable): Function taking an AsyncClient and returning the request's coroutine
+            response_stats (dict): Filled with the token counts & durations of the final response, if given
+            content (Callable): Function extracting the text of a response part
+        """
+        tried = []
+        while True: 
+            backend = self.pool.choose(self.model_name, self.hosts, exclude=tried)
+            tried.append(backend.host)
+            started = False
+            try: 
+                with self.pool.lease(backend): 
+                    stream = await request(get_async_client(backend.host))
+                    try: 
+                        async for part in stream: 
+                            if part.done and response_stats is not None: 
+                                response_stats.update(self._response_stats(part))
+                            started = True
+                            yield content(part)
+                    finally: 
+                        await stream.aclose()
+            except Exception as e: 
+                if not is_backend_failure(e): 
+                    raise RuntimeError(f"Ollama request for {self.model_name} failed on {host_label(backend.host)}: {e}") from e
+                self.pool.report_failure(backend, e)
+                # text already yielded can't be taken back, the caller's retry starts over 
+                if started or len(tried) >= len(self.hosts): 
+                    raise self._unavailable() from e
+                metrics.OLLAMA_FAILOVERS.labels(self.model_name).inc()
+                continue
+            self.pool.report_success(backend, self.model_name)
+            return
 
-    def generate(self, prompt: str) -> str: 
+    async def warm_up(self, options: Dict[str, Any] = None) -> None: 
+        """
+        Load the model into memory (or refresh its keep-alive) without generating anything, on
+        every available backend of the model. An empty prompt makes Ollama load the model and return immediately.
+        Args:
+            options (dict, optional): Load options such as num_ctx, Ollama reloads the model when they differ from the next call's
+        Raises:
+            OllamaUnavailableError: If no backend could load the model
+        """
+        now = self.pool.clock()
+        backends = [self.pool.backends[host] for host in self.hosts if self.pool.backends[host].available(now)] or [self.pool.choose(self.model_name, self.hosts)]
+
+        async def load(backend): 
+            with self.pool.lease(backend): 
+                await get_async_client(backend.host).generate(model=self.model_name, prompt="", options=options, keep_alive=self.keep_alive)
+
+        results = await asyncio.gather(*(load(backend) for backend in backends), return_exceptions=True)
+        for backend, result in zip(backends, results): 
+            if isinstance(result, Exception): 
+                self.pool.report_failure(backend, result)
+            else: 
+                self.pool.report_success(backend, self.model_name)
+        if all(isinstance(result, Exception) for result in results): 
+            raise self._unavailable() from results[0]
+
+    async def generate(self, prompt: str) -> str: 
         """
         Generate text using the Ollama model's generation functionality.
         Args:
             prompt (str): The user's input prompt
         """
-        try: 
-            response = generate(
-                model=self.model_name, 
-                prompt=prompt,
-                options=self.model_parameters, 
-            )
-            return response.response
-        
-        except: 
-            raise RuntimeError("Could not connect to Ollama server, check that it is listening on 127.0.0.1:11434")
+        response = await self._call(lambda client: client.generate(
+            model=self.model_name, 
+            prompt=prompt,
+            options=self.model_parameters, 
+            keep_alive=self.keep_alive, 
+        ))
+        return response.response
     
-    def chat(self, prompt: str, system_prompt: str, example: tuple) -> str: 
+    async def chat(self, prompt: str, system_prompt: str, example: tuple) -> str: 
         """
         Generate text using the Ollama model's chat functionality with context.
         Args:
@@ -48,20 +167,67 @@ class OllamaModel():
             system_prompt (str): Context and instructions for the model's behavior
             example (tuple): A (query, response) tuple providing an example interaction            
         """
-        try: 
-            response = chat(
-                model=self.model_name, 
-                messages=[
-                        {'role': 'system', 'content': system_prompt},
-                        {'role': 'user', 'content': example[0]},
-                        {'role': 'assistant', 'content': example[1]},
-                        {'role': 'user', 'content': prompt},
-                ],
-                options=self.model_parameters, 
-            )
-            return response.message.content
-        except: 
-            raise RuntimeError("Could not connect to Ollama server, check that server it is listening on 127.0.0.1:11434")
+        response = await self._call(lambda client: client.chat(
+            model=self.model_name, 
+            messages=self._messages(prompt, system_prompt, example), 
+            options=self.model_parameters, 
+            keep_alive=self.keep_alive, 
+        ))
+        return response.message.content
+
+    def stream_generate(self, prompt: str, response_stats: Dict[str, Any] = None, options: Dict[str, Any] = None) -> AsyncIterator[str]: 
+        """
+        Stream text from the Ollama model's generation functionality as it is decoded.
+        Closing the iterator early closes the connection, which cancels the generation on the server.
+        Args:
+            prompt (str): The user's input prompt
+            response_stats (dict, optional): Filled with the token counts & durations of the final response
+            options (dict, optional): Per-call overrides of the model parameters (e.g. num_ctx)
+        """
+        return self._stream(lambda client: client.generate(
+            model=self.model_name, 
+            prompt=prompt,
+            options={**self.model_parameters, **(options or {})}, 
+            keep_alive=self.keep_alive, 
+            stream=True, 
+        ), response_stats, lambda part: part.response)
+
+    def stream_chat(self, prompt: str, system_prompt: str, example: tuple, response_stats: Dict[str, Any] = None, options: Dict[str, Any] = None) -> AsyncIterator[str]: 
+        """
+        Stream text from the Ollama model's chat functionality as it is decoded.
+        Args:
+            prompt (str): The user's input prompt
+            system_prompt (str): Context and instructions for the model's behavior
+            example (tuple): A (query, response) tuple providing an example interaction            
+            response_stats (dict, optional): Filled with the token counts & durations of the final response
+            options (dict, optional): Per-call overrides of the model parameters (e.g. num_ctx)
+        """
+        return self._stream(lambda client: client.chat(
+            model=self.model_name, 
+            messages=self._messages(prompt, system_prompt, example), 
+            options={**self.model_parameters, **(options or {})}, 
+            keep_alive=self.keep_alive, 
+            stream=True, 
+        ), response_stats, lambda part: part.message.content)
+
+    @staticmethod
+    def _response_stats(response) -> Dict[str, Any]: 
+        """
+        Token counts & durations (in nanoseconds) reported with Ollama's final response.
+        """
+        return {field: getattr(response, field, None) for field in RESPONSE_STATS}
+
+    @staticmethod
+    def _messages(prompt: str, system_prompt: str, example: tuple) -> List[Dict[str, str]]: 
+        """
+        Chat messages of a request: system prompt, one example interaction, then the user's prompt.
+        """
+        return [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': example[0]},
+            {'role': 'assistant', 'content': example[1]},
+            {'role': 'user', 'content': prompt},
+        ]
 
 
 
@@ -74,108 +240,223 @@ class BlogGenerator():
     maintain consistent brand voice and messaging across generated content.
         
     Attributes:
-        chunks (Dict[str, dict]): Company context and example data loaded from JSON
-        gen_model (OllamaModel): Primary model for blog generation and tone modification
-        translation_model (OllamaModel): Specialized model for language translation
+        corpus (Corpus): Snapshot of the chunks, their index, hash & few-shot example, replaced as a whole by set_corpus
+        chunks (Dict[str, dict]): Company context and example data of the current corpus
+        index (Bm25Index): Lexical index over the company description chunks, used to select prompt context
+        gen_model (AsyncOllamaModel): Primary model for blog generation and tone modification
+        translation_model (AsyncOllamaModel): Specialized model for language translation
+        corpus_hash (str): Hash of the chunks, part of every result cache key
+        result_cache (ResultCache): Cache of stage outputs, which are deterministic given the fixed seed
+        in_flight (SingleFlight): Coalesces identical stage calls running at the same time
+        context_budget (ContextBudget): Chooses num_ctx per call and the token budget prompts are trimmed to
+        backend_pool (OllamaBackendPool): Ollama servers the model calls are routed across
+        example (tuple): (query, response) few-shot interaction shared by every generation request
+        segment_tokens (int): Token size of the segments long posts are translated in, 0 to translate posts whole
+        segment_concurrency (int): Segment translations of one post in flight at most
+        candidate_policy (CandidatePolicy): How many candidates of a stage call are sampled concurrently
+        validation_stats (Dict[str, dict]): Per-stage attempt, retry, early-abort & failure counters of the markdown validation
     """
-    def __init__(self, chunks: Dict[str, dict] = None):
+    def __init__(self, chunks: Dict[str, dict] = None, result_cache: ResultCache = None):
         # load & store context chunks 
-        self.chunks = chunks if chunks else self._load_chunks(filename="chunks.json")
+        self.corpus = Corpus(chunks if chunks else self._load_chunks())
+
+        self.result_cache = result_cache if result_cache is not None else ResultCache(
+            max_entries=RESULT_CACHE_SIZE, 
+            ttl=RESULT_CACHE_TTL, 
+            disk_dir=RESULT_CACHE_DIR if RESULT_CACHE_DISK else None, 
+            max_disk_entries=RESULT_CACHE_DISK_ENTRIES, 
+        )
+        # identical stage calls in flight, keyed like the result cache 
+        self.in_flight = SingleFlight()
+        self.context_budget = ContextBudget(NUM_CTX_BUCKETS, MAX_NUM_CTX, margin=CONTEXT_TOKEN_MARGIN, shrink_after=NUM_CTX_SHRINK_AFTER)
+
+        # concurrent candidates instead of sequential retries, off with MAX_CANDIDATES=1 
+        self.candidate_policy = CandidatePolicy(MAX_CANDIDATES, target_failure=CANDIDATE_TARGET_FAILURE, max_load=CANDIDATE_MAX_LOAD)
+        self.segment_tokens = TRANSLATION_SEGMENT_TOKENS
+        self.segment_concurrency = TRANSLATION_SEGMENT_CONCURRENCY
+
+        self.validation_stats = {
+            stage: {"attempts": 0, "retries": 0, "aborts": 0, "failures": 0} for stage in ("generate", "tone", "translate")
+        }
+
+        # Ollama servers shared by both models, each model may be restricted to some of them 
+        self.backend_pool = OllamaBackendPool(
+            list(dict.fromkeys(OLLAMA_HOSTS + (GEN_MODEL_HOSTS or []) + (TRANSLATION_MODEL_HOSTS or []))), 
+            load_penalty=OLLAMA_LOAD_PENALTY, 
+            eject_after=OLLAMA_EJECT_AFTER, 
+            eject_seconds=OLLAMA_EJECT_SECONDS, 
+        )
 
         # -- generation model & params -- 
-        self.gen_model = OllamaModel(
+        self.gen_model = AsyncOllamaModel(
             model_name="mistral:latest",
             model_parameters= {             # https://ollama.readthedocs.io/en/modelfile/#parameter
                 "seed": 42, 
                 "temperature": 0.8,
                 "num_predict": 700, 
-            }
+            }, 
+            keep_alive=GEN_MODEL_KEEP_ALIVE, 
+            pool=self.backend_pool, 
+            hosts=GEN_MODEL_HOSTS or OLLAMA_HOSTS, 
         )
         # -- translation model & params -- 
-        self.translation_model = OllamaModel(
+        self.translation_model = AsyncOllamaModel(
             model_name="zongwei/gemma3-translator:4b",
             model_parameters= {             # https://ollama.readthedocs.io/en/modelfile/#parameter
                 "seed": 42, 
                 "temperature": 0.8,
                 "num_predict": 900, 
-            }
+            }, 
+            keep_alive=TRANSLATION_MODEL_KEEP_ALIVE, 
+            pool=self.backend_pool, 
+            hosts=TRANSLATION_MODEL_HOSTS or OLLAMA_HOSTS, 
         )
 
-    def _load_chunks(self, filename: str) -> Dict[str, dict]: 
+    @property
+    def chunks(self) -> Dict[str, dict]: 
+        return self.corpus.chunks
+
+    @property
+    def index(self) -> Bm25Index: 
+        return self.corpus.index
+
+    @property
+    def corpus_hash(self) -> str: 
+        return self.corpus.corpus_hash
+
+    @property
+    def example(self) -> tuple: 
+        return self.corpus.example
+
+    def set_corpus(self, corpus: Corpus) -> None: 
         """
-        Loads company context and example data from a JSON file.
+        Swap in a new corpus. The swap is a single reference assignment, so in-flight requests
+        finish on the snapshot they started with and new requests see the new one.
+        Result cache keys include the corpus hash, so outputs of the old corpus are never served for the new one.
         Args:
-            filename (str): Name of the JSON file in the DATA_DIR containing chunks
+            corpus (Corpus): The new corpus snapshot
         """
-        filepath = DATA_DIR / filename
-        with open(filepath, 'r') as file: 
-            data = json.load(file)
-        return data 
-        
-    def generate_blog(self, purpose: str, retries=3) -> str: 
+        self.corpus = corpus
+
+    def _load_chunks(self) -> ChunkStore: 
         """
-        Generate a new blog post based on company context and specified topic.
-        
-        Creates a 300-400 word blog post in markdown format using company information
-        as context and example blog posts as style guides. Includes validation to
-        ensure clean markdown output.
+        Opens the company context and example data of the chunk store in DATA_DIR.
+        A chunks.json left by an older version is migrated into a store on first use.
+        """
+        return ChunkStore.load(DATA_DIR)
         
+    def select_context(self, purpose: str, top_k: int = CONTEXT_TOP_K, corpus: Corpus = None, max_tokens: int = None) -> str: 
+        """
+        Select the company description chunks most relevant to the blog purpose.
+        The leading section of every document (title & introduction) is always included.
         Args:
             purpose (str): The topic or purpose for the blog post
+            top_k (int, optional): Number of retrieved chunks to include, 0 includes all. Defaults to CONTEXT_TOP_K.
+            corpus (Corpus, optional): Snapshot to select from. Defaults to the current corpus.
+            max_tokens (int, optional): Token budget of the context. Chunks are kept in priority order
+                (leading sections, then by relevance) while they fit. Defaults to no limit.
         Returns:
-            str: Generated blog post in markdown format
+            str: Selected chunks joined in corpus order
         """
-        # structure company information as context for system prompt 
-        company_context = [chunk['text'] for chunk in self.chunks.values() if chunk['type'] == 'description']
-        company_context = "\n\n".join(company_context)
-        
-        system_prompt = f"""
-        You are an expert at writing blog posts (300-400 words) in markdown format only. 
-        You write engaging, informative blog posts that are informed by the company’s mission, tone, and target audience, which is described in the documents below:  
+        corpus = corpus or self.corpus
+        index, chunks = corpus.index, corpus.chunks
+        if top_k: 
+            priority = [chunk_id for chunk_id in index.chunk_ids if chunks[chunk_id].get('section', 1) == 1]
+            leading = set(priority)
+            priority += [chunk_id for chunk_id in index.search(purpose, top_k) if chunk_id not in leading]
+        else: 
+            priority = list(index.chunk_ids)
 
-        {company_context}        
-        """
+        texts = [chunks[chunk_id]['text'] for chunk_id in priority]
+        if max_tokens is not None: 
+            kept = fit_texts(texts, max(max_tokens, 0))
+            dropped = sum(text is None for text in kept)
+            if dropped or any(text is not None and text != original for text, original in zip(kept, texts)): 
+                metrics.CONTEXT_TRIMMED.labels("generate", "chunks").inc()
+                metrics.CONTEXT_CHUNKS_DROPPED.labels("generate").inc(dropped)
+            texts = kept
+        selected = {chunk_id: text for chunk_id, text in zip(priority, texts) if text is not None}
 
-        # structure example(s) as context for user prompt & assistant response  
-        query_example = "Describe why a home battery is a good choice for energy."
-        blog_example = [chunk['text'] for chunk in self.chunks.values() if chunk['type'] == 'example']
-        blog_example = "\n\n".join(blog_example)
+        # keep document order so the context reads like the source documents 
+        company_context = [selected[chunk_id] for chunk_id in index.chunk_ids if chunk_id in selected]
+        return "\n\n".join(company_context)
 
+    def _generation_prompt(self, company_context: str, purpose: str) -> str: 
         # final user prompt 
-        prompt = f"""
+        return f"""
+        The company is described in the documents below:  
+
+        {company_context}        
+
         Now write a new blog post for this company in english. The topic of this blog post is: {purpose}
         Output only the final blog post in Markdown format, return ONLY markdown. Keep the blog post to 300-400 words. 
         """
-        # heuristic markdown output validation 
-        for _ in range(retries): 
-            blog_post = self.gen_model.chat(prompt, system_prompt, (query_example, blog_example))
-            blog_post = blog_post.strip()
-            # check for pure markdown
-            if blog_post.startswith("#"): 
-                return blog_post 
-            # Regex to match ```markdown ... ```
-            match = re.match(r"^```markdown\s*(.*?)\s*```$", blog_post, re.DOTALL)
-            if match:
-                return match.group(1).strip() # return only the inner markdown
-            # retry inference 
-            print(f"Attempt {_+1} did not return clean markdown. Retrying...")
 
-        # retries are exhausted 
-        raise ValueError("LLM output could not be parsed as markdown after retries.")
-    
+    def _fit_example(self, corpus: Corpus) -> tuple: 
+        """
+        The corpus' few-shot example, truncated to half of the context budget if it does not fit on its own.
+        Depends only on the corpus & budget settings, so the prompt prefix stays stable.
+        """
+        num_predict = self.gen_model.model_parameters.get("num_predict", 0)
+        query, blog_example = corpus.example
+        available = self.context_budget.context_tokens(estimate_messages_tokens(GENERATION_SYSTEM_PROMPT, query, self._generation_prompt("", "")), num_predict)
+        if available is None or estimate_messages_tokens(blog_example) <= available: 
+            return corpus.example
+        metrics.CONTEXT_TRIMMED.labels("generate", "example").inc()
+        return (query, truncate_to_tokens(blog_example, max(available // 2, 0)))
 
-    def modify_tone(self, blog_post: str, tone: str = None, retries=3) -> str: 
+    def _generate_blog_request(self, purpose: str, corpus: Corpus = None) -> tuple: 
         """
-        Modify the tone and style of an existing blog post while preserving content.
-                
+        Build the chat request for a new blog post.
+        The system prompt and the example interaction are identical for every request, so Ollama can
+        reuse their cached prompt evaluation; everything that varies (retrieved context, purpose) is
+        placed in the final user message, which is trimmed to the context budget.
         Args:
-            blog_post (str): Original blog post in markdown format
-            tone (str, optional): Desired tone for the blog post
+            purpose (str): The topic or purpose for the blog post
+            corpus (Corpus, optional): Snapshot to build the request from. Defaults to the current corpus.
         Returns:
-            str: Blog post with modified tone in markdown format
+            tuple: (prompt, system_prompt, example) arguments for the chat call
         """
+        corpus = corpus or self.corpus
+        example = self._fit_example(corpus)
+        num_predict = self.gen_model.model_parameters.get("num_predict", 0)
+        fixed_tokens = estimate_messages_tokens(GENERATION_SYSTEM_PROMPT, *example, self._generation_prompt("", purpose))
+        # structure the company information relevant to the purpose as context for the final user prompt 
+        company_context = self.select_context(purpose, corpus=corpus, max_tokens=self.context_budget.context_tokens(fixed_tokens, num_predict))
+        return self._generation_prompt(company_context, purpose), GENERATION_SYSTEM_PROMPT, example
 
-        prompt = f"""
+    def _call_options(self, stage: str, model: AsyncOllamaModel, *messages: str, attempt: int = 0) -> Dict[str, Any]: 
+        """
+        Per-call model options: the num_ctx bucket fitting the estimated prompt & output tokens, and
+        for retries & extra candidates a seed derived from the model's, so they don't repeat the first output.
+        """
+        seed = model.model_parameters.get("seed")
+        options = {"seed": candidate_seed(seed, attempt)} if attempt and seed is not None else {}
+        if not self.context_budget.enabled: 
+            return options or None
+        prompt_tokens = estimate_messages_tokens(*messages)
+        required = self.context_budget.required(prompt_tokens, model.model_parameters.get("num_predict", 0))
+        num_ctx = self.context_budget.num_ctx(model.model_name, required)
+        if required > num_ctx: 
+            # tone & translate embed the whole post, which can't be trimmed 
+            metrics.CONTEXT_TRIMMED.labels(stage, "overflow").inc()
+        metrics.NUM_CTX.labels(stage, model.model_name).observe(num_ctx)
+        metrics.PROMPT_TOKENS_ESTIMATED.labels(stage, model.model_name).observe(prompt_tokens)
+        options["num_ctx"] = num_ctx
+        return options
+
+    def warm_up_options(self, model: AsyncOllamaModel) -> Dict[str, Any]: 
+        """
+        Options to warm a model up with, so it is loaded with the num_ctx the next call will use.
+        """
+        num_ctx = self.context_budget.current(model.model_name)
+        return {"num_ctx": num_ctx} if num_ctx else None
+
+    def _modify_tone_prompt(self, blog_post: str, tone: str) -> str: 
+        """
+        Build the prompt that rewrites a blog post in the given tone.
+        """
+        return f"""
         You are an editor improving tone and style. Change the following markdown blog post: 
         Markdown post: 
 
@@ -183,28 +464,404 @@ class BlogGenerator():
         
         Return ONLY the markdown in the same structure, keep the same content of the blog the exact same, but change the tone to the following: {tone}. 
         """
-        # heuristic markdown output validation
-        blog_post = blog_post.strip()
-        for _ in range(retries): 
-            blog_post = self.gen_model.generate(prompt)
-            blog_post = blog_post.strip()
-            # check for pure markdown
-            if blog_post.startswith("#"): 
-                return blog_post 
-            # Regex to match ```markdown ... ```
-            match = re.match(r"^```markdown\s*(.*?)\s*```$", blog_post, re.DOTALL)
-            if match:
-                return match.group(1).strip() # return only the inner markdown
-            # retry inference 
-            print(f"Attempt {_+1} did not return clean markdown. Retrying...")
 
+    def _translate_prompt(self, blog_post: str, language: str) -> str: 
+        """
+        Build the prompt that translates a blog post into the given language.
+        """
+        return f"""
+            You are expert translation model from english to {language}.
+            Translate the following markown post into {language}, keep the structure the same, return ONLY markdown: 
+
+            {blog_post}
+            """
+
+    def _translate_segment_prompt(self, segment: str, language: str) -> str: 
+        """
+        Build the prompt that translates one segment of a blog post into the given language.
+        """
+        return f"""
+            You are expert translation model from english to {language}.
+            Translate the following excerpt of a markdown post into {language}, keep the markdown formatting the same, return ONLY the translated markdown: 
+
+            {segment}
+            """
+
+    @staticmethod
+    def _is_english(language: str) -> bool: 
+        return language.strip().lower() == "english"
+
+    def _cache_key(self, stage: str, model: AsyncOllamaModel, corpus: Corpus = None, **inputs) -> str: 
+        """
+        Result cache key of a stage call: its normalized inputs, the model & its parameters and the corpus hash.
+        """
+        corpus = corpus or self.corpus
+        return self.result_cache.make_key(stage, inputs, model.model_name, model.model_parameters, corpus.corpus_hash)
+
+    async def _cached(self, stage: str, key: str, call: Callable) -> str: 
+        """
+        Return the cached output for a key, or run the call and cache its output.
+        Identical calls in flight at the same time share one run, see SingleFlight.
+        """
+        blog_post = self.result_cache.get(key)
+        metrics.RESULT_CACHE_LOOKUPS.labels(stage, "miss" if blog_post is None else "hit").inc()
+        if blog_post is None: 
+            if key in self.in_flight: 
+                metrics.COALESCED_CALLS.labels(stage).inc()
+
+            async def run() -> str: 
+                output = await call()
+                self.result_cache.put(key, output)
+                return output
+
+            blog_post = await self.in_flight.do(key, run)
+        return blog_post
+
+    async def _cached_stream(self, stage: str, key: str, open_stream: Callable) -> AsyncIterator[str]: 
+        """
+        Streaming variant of _cached, a hit is yielded in one piece and a completed stream is cached.
+        Identical streams in flight at the same time share one run, see SingleFlight.
+        """
+        blog_post = self.result_cache.get(key)
+        metrics.RESULT_CACHE_LOOKUPS.labels(stage, "miss" if blog_post is None else "hit").inc()
+        if blog_post is not None: 
+            yield blog_post
+            return
+        if key in self.in_flight: 
+            metrics.COALESCED_CALLS.labels(stage).inc()
+
+        async def run() -> AsyncIterator[str]: 
+            parts = []
+            stream = open_stream()
+            try: 
+                async for text in stream: 
+                    parts.append(text)
+                    yield text
+            finally: 
+                await stream.aclose()
+            self.result_cache.put(key, "".join(parts))
+
+        async for text in self.in_flight.stream(key, run): 
+            yield text
+
+    def _count_attempt(self, stage: str, attempt: int) -> None: 
+        stats = self.validation_stats[stage]
+        stats["attempts"] += 1
+        if attempt: 
+            stats["retries"] += 1
+
+    def _count_rejection(self, stage: str, attempt: int, aborted: bool) -> None: 
+        if aborted: 
+            # the output was recognised as invalid from its first tokens and cancelled 
+            self.validation_stats[stage]["aborts"] += 1
+        # retry inference 
+        print(f"Attempt {attempt+1} did not return clean markdown. Retrying...")
+
+    def _count_failure(self, stage: str, model: AsyncOllamaModel) -> None: 
         # retries are exhausted 
+        self.validation_stats[stage]["failures"] += 1
+        metrics.STAGE_FAILURES.labels(stage, model.model_name).inc()
+
+    def _candidate_count(self, stage: str, model: AsyncOllamaModel, attempts_left: int) -> int: 
+        """
+        Candidates to sample concurrently in the next round of a stage call, see CandidatePolicy.
+        """
+        if not self.candidate_policy.enabled: 
+            return 1
+        return self.candidate_policy.candidates(stage, attempts_left, model.pool.spare(model.hosts, self.candidate_policy.max_load))
+
+    async def _sample(self, stage: str, model: AsyncOllamaModel, attempt: Callable, retries: int) -> Any: 
+        """
+        Make attempts of a stage call until one returns an output, at most `retries`.
+        Each round runs one attempt, or with candidate sampling several at once with different
+        seeds, where the first valid output wins and cancels the others.
+        Args:
+            stage (str): Pipeline stage, for the validation counters & metrics
+            model (AsyncOllamaModel): Model serving the stage
+            attempt (Callable): Coroutine function taking the attempt number, returning the output or None if invalid
+            retries (int): Maximum number of attempts
+        Returns:
+            The first valid output, None if every attempt was invalid
+        """
+        tried = 0
+        while tried < retries: 
+            count = self._candidate_count(stage, model, retries - tried)
+            if count == 1: 
+                output = await attempt(tried)
+            else: 
+                output = await self.candidate_policy.first_valid([attempt(tried + i) for i in range(count)])
+            tried += count
+            if output is not None: 
+                return output
+        return None
+
+    async def _run_validated(self, stage: str, model: AsyncOllamaModel, open_stream: Callable, retries: int) -> str: 
+        """
+        Run a streamed model call until its output passes the heuristic markdown validation.
+        Validation runs incrementally: an output that does not start like markdown (a heading or a
+        ```markdown fence) is cancelled after its first tokens and the next attempt starts right away.
+        With candidate sampling (MAX_CANDIDATES) several attempts run at once, see _sample.
+        Args:
+            stage (str): Pipeline stage, for the validation counters & metrics
+            model (AsyncOllamaModel): Model serving the stage
+            open_stream (Callable): Function taking a response stats dict & the attempt number and returning an async iterator over raw model output
+            retries (int): Maximum number of attempts
+        Returns:
+            str: Clean markdown output
+        """
+        async def attempt(number: int) -> Optional[str]: 
+            # extra candidates count as retries, like sequential attempts 
+            self._count_attempt(stage, number)
+            md_filter = MarkdownStreamFilter()
+            parts = []
+            aborted = False
+            valid = False
+            response_stats = {}
+            outcome = "error"
+            start = time.perf_counter()
+            stream = open_stream(response_stats, number)
+            try: 
+                async for piece in stream: 
+                    parts.append(md_filter.feed(piece))
+                    if md_filter.invalid: 
+                        aborted = True
+                        break
+                parts.append(md_filter.finish())
+                # a complete output must also close its fence, exactly like extract_markdown 
+                valid = md_filter.valid and md_filter.terminated
+                outcome = "ok" if valid else "aborted" if aborted else "invalid"
+            except asyncio.CancelledError: 
+                # another candidate was valid first 
+                outcome = "cancelled"
+                raise
+            finally: 
+                # closing the stream early cancels the generation on the server 
+                await stream.aclose()
+                metrics.record_attempt(stage, model.model_name, number + 1, outcome, time.perf_counter() - start, response_stats)
+
+            self.candidate_policy.record(stage, valid)
+            if valid: 
+                return "".join(parts)
+            self._count_rejection(stage, number, aborted)
+            return None
+
+        output = await self._sample(stage, model, attempt, retries)
+        if output is None: 
+            self._count_failure(stage, model)
+            raise ValueError("LLM output could not be parsed as markdown after retries.")
+        return output
+
+    async def _stream_validated(self, stage: str, model: AsyncOllamaModel, open_stream: Callable, retries: int) -> AsyncIterator[str]: 
+        """
+        Stream a model call through the incremental markdown filter, retrying invalid outputs.
+        Outputs are recognised as markdown (or not) from their first characters, before anything
+        is yielded, so a retry never has to retract streamed text. A fenced output that never closes
+        its fence is only known to be invalid at its end: it fails the call (and is not cached),
+        since retrying it would stream the post a second time.
+        Args:
+            stage (str): Pipeline stage, for the validation counters & metrics
+            model (AsyncOllamaModel): Model serving the stage
+            open_stream (Callable): Function taking a response stats dict & the attempt number and returning an async iterator over raw model output
+            retries (int): Maximum number of attempts
+        Yields:
+            str: Clean markdown, piece by piece
+        """
+        for attempt in range(retries): 
+            self._count_attempt(stage, attempt)
+            md_filter = MarkdownStreamFilter()
+            aborted = False
+            streamed = False
+            valid = False
+            response_stats = {}
+            outcome = "error"
+            start = time.perf_counter()
+            stream = open_stream(response_stats, attempt)
+            try: 
+                async for piece in stream: 
+                    text = md_filter.feed(piece)
+                    if md_filter.invalid: 
+                        aborted = True
+                        break
+                    if text: 
+                        streamed = True
+                        yield text
+                text = md_filter.finish()
+                # a complete output must also close its fence, exactly like _run_validated 
+                valid = md_filter.valid and md_filter.terminated
+                outcome = "ok" if valid else "aborted" if aborted else "invalid"
+            finally: 
+                # closing the stream early cancels the generation on the server 
+                await stream.aclose()
+                metrics.record_attempt(stage, model.model_name, attempt + 1, outcome, time.perf_counter() - start, response_stats)
+
+            self.candidate_policy.record(stage, valid)
+            if valid: 
+                if text: 
+                    yield text
+                return
+            if streamed: 
+                # the truncated post is already out, a retry cannot retract it 
+                self._count_failure(stage, model)
+                raise ValueError("LLM output ended inside its markdown fence.")
+            self._count_rejection(stage, attempt, aborted)
+
+        self._count_failure(stage, model)
         raise ValueError("LLM output could not be parsed as markdown after retries.")
 
+    async def _translate_segment(self, segment: str, language: str, retries: int) -> str: 
+        """
+        Translate one segment of a post, retrying until the output keeps the segment's structure.
+        A segment need not start with a heading, so instead of the markdown filter the output is
+        validated against the segment's outline (headings, lists, code blocks) and must not be truncated.
+        """
+        model = self.translation_model
+        prompt = self._translate_segment_prompt(segment, language)
+        expected = outline(segment)
+
+        async def attempt(number: int) -> Optional[str]: 
+            self._count_attempt("translate", number)
+            parts = []
+            translated = None
+            response_stats = {}
+            outcome = "error"
+            start = time.perf_counter()
+            stream = model.stream_generate(prompt, response_stats, self._call_options("translate", model, prompt, attempt=number))
+            try: 
+                async for piece in stream: 
+                    parts.append(piece)
+                translated = clean_segment("".join(parts))
+                if translated is not None and (response_stats.get("done_reason") == "length" or outline(translated) != expected): 
+                    translated = None
+                outcome = "ok" if translated is not None else "invalid"
+            except asyncio.CancelledError: 
+                outcome = "cancelled"
+                raise
+            finally: 
+                await stream.aclose()
+                metrics.record_attempt("translate", model.model_name, number + 1, outcome, time.perf_counter() - start, response_stats)
+
+            self.candidate_policy.record("translate", translated is not None)
+            if translated is None: 
+                self._count_rejection("translate", number, False)
+            return translated
+
+        translated = await self._sample("translate", model, attempt, retries)
+        if translated is None: 
+            self._count_failure("translate", model)
+            raise ValueError("Translated segment does not keep the markdown structure of its source after retries.")
+        return translated
+
+    def _segments(self, blog_post: str) -> List[tuple]: 
+        """
+        Segments a post is translated in, None if it is translated whole (segmenting disabled or a short post).
+        """
+        if not self.segment_tokens: 
+            return None
+        segments = split_markdown(blog_post, self.segment_tokens)
+        return segments if len(segments) > 1 else None
 
-    def translate(self, blog_post: str, language: str, retries=3) -> str: 
+    async def _translate_segments(self, segments: List[tuple], language: str, retries: int) -> AsyncIterator[str]: 
+        """
+        Translate the segments of a post concurrently (at most segment_concurrency in flight) and
+        yield them in order with their original separators, each as soon as it and those before it are done.
+        Every segment is cached on its own, so an edited post only translates the segments that changed,
+        and a segment that fails validation is retried without translating the others again.
+        """
+        semaphore = asyncio.Semaphore(self.segment_concurrency)
+
+        async def translate(segment: str) -> str: 
+            async def call() -> str: 
+                async with semaphore: 
+                    return await self._translate_segment(segment, language, retries)
+
+            key = self._cache_key("translate_segment", self.translation_model, segment=segment, language=language)
+            return await self._cached("translate_segment", key, call)
+
+        tasks = [asyncio.ensure_future(translate(segment)) for segment, _ in segments]
+        try: 
+            for task, (_, separator) in zip(tasks, segments): 
+                yield await task + separator
+        finally: 
+            # a failed segment (or a cancelled caller) stops the rest 
+            for task in tasks: 
+                if not task.done(): 
+                    task.cancel()
+                elif not task.cancelled(): 
+                    task.exception()
+
+    async def generate_blog(self, purpose: str, retries=3, corpus: Corpus = None) -> str: 
+        """
+        Generate a new blog post based on company context and specified topic.
+        
+        Creates a 300-400 word blog post in markdown format using company information
+        as context and example blog posts as style guides. Includes validation to
+        ensure clean markdown output.
+        
+        Args:
+            purpose (str): The topic or purpose for the blog post
+            corpus (Corpus, optional): Corpus to take the context from (e.g. a tenant's). Defaults to the current corpus.
+        Returns:
+            str: Generated blog post in markdown format
+        """
+        purpose = normalize_text(purpose)
+        # one snapshot for the prompt & the cache key, a concurrent reload must not mix corpora 
+        corpus = corpus or self.corpus
+        prompt, system_prompt, example = self._generate_blog_request(purpose, corpus)
+        key = self._cache_key("generate", self.gen_model, corpus, purpose=purpose, top_k=CONTEXT_TOP_K, max_ctx=self.context_budget.max_ctx)
+        # heuristic markdown output validation 
+        return await self._cached("generate", key, lambda: self._run_validated("generate", self.gen_model, lambda stats, attempt: self.gen_model.stream_chat(prompt, system_prompt, example, stats, self._call_options("generate", self.gen_model, system_prompt, *example, prompt, attempt=attempt)), retries))
+
+    async def stream_generate_blog(self, purpose: str, retries=3, corpus: Corpus = None) -> AsyncIterator[str]: 
+        """
+        Streaming variant of generate_blog, yields clean markdown as it is generated.
+        Args:
+            purpose (str): The topic or purpose for the blog post
+            corpus (Corpus, optional): Corpus to take the context from. Defaults to the current corpus.
+        """
+        purpose = normalize_text(purpose)
+        # one snapshot for the prompt & the cache key, a concurrent reload must not mix corpora 
+        corpus = corpus or self.corpus
+        prompt, system_prompt, example = self._generate_blog_request(purpose, corpus)
+        key = self._cache_key("generate", self.gen_model, corpus, purpose=purpose, top_k=CONTEXT_TOP_K, max_ctx=self.context_budget.max_ctx)
+        async for text in self._cached_stream("generate", key, lambda: self._stream_validated("generate", self.gen_model, lambda stats, attempt: self.gen_model.stream_chat(prompt, system_prompt, example, stats, self._call_options("generate", self.gen_model, system_prompt, *example, prompt, attempt=attempt)), retries)): 
+            yield text
+    
+
+    async def modify_tone(self, blog_post: str, tone: str = None, retries=3) -> str: 
+        """
+        Modify the tone and style of an existing blog post while preserving content.
+                
+        Args:
+            blog_post (str): Original blog post in markdown format
+            tone (str, optional): Desired tone for the blog post
+        Returns:
+            str: Blog post with modified tone in markdown format
+        """
+        tone = normalize_text(tone, lower=True)
+        prompt = self._modify_tone_prompt(blog_post, tone)
+        key = self._cache_key("tone", self.gen_model, blog_post=blog_post, tone=tone)
+        # heuristic markdown output validation
+        return await self._cached("tone", key, lambda: self._run_validated("tone", self.gen_model, lambda stats, attempt: self.gen_model.stream_generate(prompt, stats, self._call_options("tone", self.gen_model, prompt, attempt=attempt)), retries))
+
+    async def stream_modify_tone(self, blog_post: str, tone: str = None, retries=3) -> AsyncIterator[str]: 
+        """
+        Streaming variant of modify_tone, yields clean markdown as it is generated.
+        Args:
+            blog_post (str): Original blog post in markdown format
+            tone (str, optional): Desired tone for the blog post
+        """
+        tone = normalize_text(tone, lower=True)
+        prompt = self._modify_tone_prompt(blog_post, tone)
+        key = self._cache_key("tone", self.gen_model, blog_post=blog_post, tone=tone)
+        async for text in self._cached_stream("tone", key, lambda: self._stream_validated("tone", self.gen_model, lambda stats, attempt: self.gen_model.stream_generate(prompt, stats, self._call_options("tone", self.gen_model, prompt, attempt=attempt)), retries)): 
+            yield text
+
+
+    async def translate(self, blog_post: str, language: str, retries=3) -> str: 
         """
         Translate a blog post from english to the specified language while maintaining structure.
+        Posts longer than one segment are split on heading & paragraph boundaries and the segments
+        are translated concurrently, see _translate_segments.
         
         Args:
             blog_post (str): Original blog post in markdown format (assumed to be in English)
@@ -214,30 +871,44 @@ class BlogGenerator():
 
         """
         # check if desired post is in english 
-        if not language.strip().lower() == "english": 
-            prompt = f"""
-            You are expert translation model from english to {language}.
-            Translate the following markown post into {language}, keep the structure the same, return ONLY markdown: 
+        if self._is_english(language): 
+            return blog_post
 
-            {blog_post}
-            """
-            # heuristic markdown output validation 
-            for _ in range(retries): 
-                blog_post = self.translation_model.generate(prompt)
-                blog_post = blog_post.strip()
-                # check for pure markdown
-                if blog_post.startswith("#"): 
-                    return blog_post 
-                # Regex to match ```markdown ... ```
-                match = re.match(r"^```markdown\s*(.*?)\s*```$", blog_post, re.DOTALL)
-                if match:
-                    return match.group(1).strip() # return only the inner markdown
-                # retry inference 
-                print(f"Attempt {_+1} did not return clean markdown. Retrying...")
-
-            # retries are exhausted 
-            raise ValueError("LLM output could not be parsed as markdown after retries.")
+        language = normalize_text(language, lower=True)
+        segments = self._segments(blog_post)
+        if segments: 
+            key = self._cache_key("translate", self.translation_model, blog_post=blog_post, language=language, segment_tokens=self.segment_tokens)
 
-        else: 
-            return blog_post
+            async def join() -> str: 
+                return "".join([text async for text in self._translate_segments(segments, language, retries)])
+
+            return await self._cached("translate", key, join)
+
+        prompt = self._translate_prompt(blog_post, language)
+        key = self._cache_key("translate", self.translation_model, blog_post=blog_post, language=language)
+        # heuristic markdown output validation 
+        return await self._cached("translate", key, lambda: self._run_validated("translate", self.translation_model, lambda stats, attempt: self.translation_model.stream_generate(prompt, stats, self._call_options("translate", self.translation_model, prompt, attempt=attempt)), retries))
+
+    async def stream_translate(self, blog_post: str, language: str, retries=3) -> AsyncIterator[str]: 
+        """
+        Streaming variant of translate, yields clean markdown as it is generated.
+        Args:
+            blog_post (str): Original blog post in markdown format (assumed to be in English)
+            language (str): Target language for translation
+        """
+        if self._is_english(language): 
+            yield blog_post
+            return
+
+        language = normalize_text(language, lower=True)
+        segments = self._segments(blog_post)
+        if segments: 
+            key = self._cache_key("translate", self.translation_model, blog_post=blog_post, language=language, segment_tokens=self.segment_tokens)
+            async for text in self._cached_stream("translate", key, lambda: self._translate_segments(segments, language, retries)): 
+                yield text
+            return
 
+        prompt = self._translate_prompt(blog_post, language)
+        key = self._cache_key("translate", self.translation_model, blog_post=blog_post, language=language)
+        async for text in self._cached_stream("translate", key, lambda: self._stream_validated("translate", self.translation_model, lambda stats, attempt: self.translation_model.stream_generate(prompt, stats, self._call_options("translate", self.translation_model, prompt, attempt=attempt)), retries)): 
+            yield text
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+
+
+# odd 31-bit stride (golden ratio), consecutive candidates get seeds far apart
+_SEED_STRIDE = 0x9E3779B1
+
+
+def candidate_seed(seed: int, index: int) -> int:
+    """
+    Seed of a stage call's `index`-th attempt: the base seed first, then seeds derived from it.
+    Deterministic, so a retry or extra candidate with the same index samples the same output.
+    """
+    return seed if index == 0 else (seed + index * _SEED_STRIDE) % 2**31
+
+
+class CandidatePolicy():
+    """
+    Chooses how many candidates of a stage call are sampled concurrently.
+
+    Sequential retries make an unlucky request pay one full generation per invalid output. With
+    candidates, a round launches N attempts with different seeds at once and the first valid one
+    wins, the others are cancelled. N is the smallest number of candidates whose chance of all
+    failing (the stage's moving failure rate to the power N) is at most `target_failure`, capped
+    at `max_candidates`, the attempts left, and the calls the model's backends can still take
+    before they hold `max_load` calls each: under load extra candidates would only slow down
+    everybody else, so they are not launched.
+
+    Attributes:
+        max_candidates (int): Candidates per round at most, 1 disables concurrent sampling
+        target_failure (float): Acceptable probability that every candidate of a round is invalid
+        max_load (int): In-flight calls per backend up to which extra candidates are launched
+        failure_rate (Dict[str, float]): Moving failure rate of the validation, per stage
+        launched (int): Extra candidates started
+        cancelled (int): Candidates cancelled because another one was valid first
+    """
+    def __init__(self, max_candidates: int = 1, target_failure: float = 0.05, max_load: int = 2, prior: float = 0.1, smoothing: float = 0.1):
+        self.max_candidates = max_candidates
+        self.target_failure = target_failure
+        self.max_load = max_load
+        self.prior = prior
+        self.smoothing = smoothing
+        self.failure_rate = {}
+        self.launched = 0
+        self.cancelled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_candidates > 1
+
+    def record(self, stage: str, valid: bool) -> None:
+        """
+        Update the stage's failure rate with the outcome of a completed attempt.
+        """
+        rate = self.failure_rate.get(stage, self.prior)
+        self.failure_rate[stage] = (1 - self.smoothing) * rate + self.smoothing * (0.0 if valid else 1.0)
+
+    def candidates(self, stage: str, attempts_left: int, spare: int) -> int:
+        """
+        Number of candidates to launch for the next round of a stage call.
+        Args:
+            stage (str): Pipeline stage
+            attempts_left (int): Attempts the call may still make
+            spare (int): Calls the model's backends can take before reaching max_load
+        """
+        if not self.enabled:
+            return 1
+        rate = self.failure_rate.get(stage, self.prior)
+        count = 1
+        while count < self.max_candidates and rate ** count > self.target_failure:
+            count += 1
+        # the first candidate always runs, extra ones only on spare capacity
+        return max(1, min(count, attempts_left, 1 + spare))
+
+    async def first_valid(self, attempts: List[Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """
+        Run attempts concurrently and return the first result that is not None, cancelling the others.
+        Returns None if every attempt was invalid; an attempt's exception is raised.
+        """
+        tasks = [asyncio.ensure_future(attempt) for attempt in attempts]
+        self.launched += len(tasks) - 1
+        try:
+            for done in asyncio.as_completed(tasks):
+                result = await done
+                if result is not None:
+                    return result
+            return None
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            self.cancelled += len(pending)
+            for task in pending:
+                task.cancel()
+            # the losers close their streams, which cancels their generations on the server
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_candidates": self.max_candidates, "failure_rate": dict(self.failure_rate),
+            "launched": self.launched, "cancelled": self.cancelled,
+        }
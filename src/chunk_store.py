@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from src.config.settings import CHUNK_STORE_MMAP_MB
+
+
+# bump whenever the schema changes, older stores are rebuilt from their chunks.json or by re-chunking
+STORE_VERSION = 1
+STORE_FILENAME = "chunks.db"
+JSON_FILENAME = "chunks.json"
+
+# chunk fields kept in their own columns, in column order after chunk_id
+METADATA_FIELDS = ("filename", "type", "source_hash", "tokens", "section", "heading")
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE chunks (
+    position INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    type TEXT NOT NULL,
+    source_hash TEXT,
+    tokens INTEGER,
+    section INTEGER,
+    heading TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX chunks_type ON chunks (type, position);
+"""
+
+
+def corpus_hash(chunks: Dict[str, dict]) -> str:
+    """
+    Hash of a chunk dict, part of every result cache key. A store carries the hash of the chunks
+    it was written from, so migrating a chunks.json keeps cached results valid.
+    """
+    return hashlib.sha256(json.dumps(chunks, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def chunk_texts(chunks: Mapping, text_type: str) -> Iterator[Tuple[str, str]]:
+    """
+    (chunk ID, text) of the chunks of a type in corpus order, from a chunk dict or a ChunkStore.
+    """
+    if isinstance(chunks, ChunkStore):
+        yield from chunks.texts(text_type)
+        return
+    for chunk_id, chunk in chunks.items():
+        if chunk['type'] == text_type:
+            yield chunk_id, chunk['text']
+
+
+class LazyChunk(Mapping):
+    """
+    A chunk of a ChunkStore: its metadata is held in memory, its text is read from the store on access.
+    """
+    def __init__(self, store: "ChunkStore", chunk_id: str, metadata: Dict[str, Any]):
+        self._store = store
+        self._chunk_id = chunk_id
+        self._metadata = metadata
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "text":
+            return self._store.text(self._chunk_id)
+        return self._metadata[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._metadata
+        yield "text"
+
+    def __len__(self) -> int:
+        return len(self._metadata) + 1
+
+    def __repr__(self) -> str:
+        return f"LazyChunk({self._chunk_id!r}, {self._metadata!r})"
+
+
+class ChunkStore(Mapping):
+    """
+    Read-only chunk corpus in a single SQLite file, a drop-in for the chunk dict of PdfChunker.chunk.
+
+    Only the chunk metadata (filename, type, source hash, token count, section & heading) is loaded
+    into memory. Texts stay in the file and are read when a chunk's "text" is accessed or a type is
+    queried, so a process only holds the texts it is currently using. The file is opened read-only
+    and memory-mapped (CHUNK_STORE_MMAP_MB), so every worker process reading it shares one copy in
+    the OS page cache.
+
+    A store file is never modified once written: write() builds a new file and renames it over the
+    old one. A store that is already open keeps reading the file it opened, which makes it an
+    immutable snapshot like the Corpus built from it. Writing chunks identical to the file's keeps
+    the file, so worker processes chunking the same PDFs at startup all open (and share) one file.
+    The store holds the only reference to its connection and no reference cycles, so dropping the
+    last reference to a store (or its Corpus) closes the connection right away; close() does it explicitly.
+
+    Attributes:
+        path (Path): The store file
+        corpus_hash (str): Hash of the chunks the store was written from, see corpus_hash
+        sources (str): Fingerprint of the PDFs & chunking settings the chunks were built from, None if unknown (migrated)
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # immutable: the file is replaced, never changed in place, so SQLite can skip locking entirely
+        self._connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self._connection.execute(f"PRAGMA mmap_size = {CHUNK_STORE_MMAP_MB * 2**20}")
+        # one connection shared by the event loop & worker threads
+        self._lock = threading.Lock()
+
+        meta = dict(self._query("SELECT key, value FROM meta"))
+        if int(meta.get("version", 0)) != STORE_VERSION:
+            raise ValueError(f"{self.path} is a version {meta.get('version')} chunk store, expected version {STORE_VERSION}")
+        self.corpus_hash = meta["corpus_hash"]
+        self.sources = meta.get("sources")
+        self._metadata = {}
+        for row in self._query(f"SELECT chunk_id, {', '.join(METADATA_FIELDS)} FROM chunks ORDER BY position"):
+            self._metadata[row[0]] = {field: value for field, value in zip(METADATA_FIELDS, row[1:]) if value is not None}
+
+    def _query(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @classmethod
+    def open_existing(cls, path: Path) -> Optional["ChunkStore"]:
+        """
+        Open the store at `path`, None if there is none or it is unreadable or of another version.
+        """
+        if not Path(path).exists():
+            return None
+        try:
+            return cls(path)
+        except (ValueError, KeyError, sqlite3.DatabaseError):
+            return None
+
+    @classmethod
+    def write(cls, path: Path, chunks: Dict[str, dict], sources: str = None) -> "ChunkStore":
+        """
+        Write chunks to a new store file, atomically replacing the file at `path`, and open it.
+        If the file already holds these chunks it is opened instead of rewritten.
+        Args:
+            path (Path): Store file to (re)write
+            chunks (Dict[str, dict]): Chunks as produced by PdfChunker.chunk
+            sources (str, optional): Fingerprint of the PDFs & settings the chunks were built from
+        """
+        path = Path(path)
+        chunks_hash = corpus_hash(chunks)
+        existing = cls.open_existing(path)
+        if existing is not None and existing.corpus_hash == chunks_hash and existing.sources == sources:
+            return existing
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            # a private file that is renamed when complete, no journal needed
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.executescript(_SCHEMA)
+            connection.executemany(
+                f"INSERT INTO chunks (position, chunk_id, {', '.join(METADATA_FIELDS)}, text) VALUES ({', '.join('?' * (len(METADATA_FIELDS) + 3))})",
+                ((position, chunk_id, *(chunk.get(field) for field in METADATA_FIELDS), chunk['text']) for position, (chunk_id, chunk) in enumerate(chunks.items())),
+            )
+            meta = [("version", str(STORE_VERSION)), ("corpus_hash", chunks_hash)] + ([("sources", sources)] if sources is not None else [])
+            connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta)
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def migrate(cls, json_path: Path, path: Path = None) -> "ChunkStore":
+        """
+        Convert a chunks.json into a store (next to it by default). The JSON file is left in place.
+        """
+        json_path = Path(json_path)
+        with open(json_path, 'r') as file:
+            chunks = json.load(file)
+        return cls.write(path or json_path.with_name(STORE_FILENAME), chunks)
+
+    @classmethod
+    def load(cls, chunks_dir: Path) -> "ChunkStore":
+        """
+        Open the store of a chunks directory, migrating its chunks.json on first use.
+        Raises:
+            FileNotFoundError: If the directory has neither a store nor a chunks.json
+        """
+        path = Path(chunks_dir) / STORE_FILENAME
+        json_path = path.with_name(JSON_FILENAME)
+        if path.exists():
+            try:
+                return cls(path)
+            except ValueError:
+                # written by an older version, rebuilt below if its source is still around
+                if not json_path.exists():
+                    raise
+        if json_path.exists():
+            return cls.migrate(json_path, path)
+        raise FileNotFoundError(f"No {STORE_FILENAME} or {JSON_FILENAME} in {chunks_dir}")
+
+    def __getitem__(self, chunk_id: str) -> LazyChunk:
+        return LazyChunk(self, chunk_id, self._metadata[chunk_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._metadata)
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def text(self, chunk_id: str) -> str:
+        """
+        Read the text of a chunk.
+        """
+        rows = self._query("SELECT text FROM chunks WHERE chunk_id = ?", (chunk_id,))
+        if not rows:
+            raise KeyError(chunk_id)
+        return rows[0][0]
+
+    def ids(self, text_type: str = None) -> List[str]:
+        """
+        IDs of the chunks of a type (all chunks by default) in corpus order, without reading any text.
+        """
+        return [chunk_id for chunk_id, metadata in self._metadata.items() if text_type is None or metadata['type'] == text_type]
+
+    def texts(self, text_type: str = None) -> Iterator[Tuple[str, str]]:
+        """
+        (chunk ID, text) of the chunks of a type (all chunks by default) in corpus order, read in one query.
+        """
+        if text_type is None:
+            yield from self._query("SELECT chunk_id, text FROM chunks ORDER BY position")
+        else:
+            yield from self._query("SELECT chunk_id, text FROM chunks WHERE type = ? ORDER BY position", (text_type,))
+
+    def to_dict(self) -> Dict[str, dict]:
+        """
+        All chunks with their texts as plain dicts, like PdfChunker.chunk returns them.
+        """
+        return {chunk_id: {**self._metadata[chunk_id], "text": text} for chunk_id, text in self.texts()}
+
+    def estimate_bytes(self) -> int:
+        """
+        Rough resident size of the store: the metadata, texts live in the (shared) page cache.
+        """
+        size = 0
+        for chunk_id, metadata in self._metadata.items():
+            size += sys.getsizeof(chunk_id) + sum(sys.getsizeof(value) for value in metadata.values()) + sys.getsizeof(metadata)
+        return size
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert chunks.json files into chunk stores (chunks.db next to each).")
+    parser.add_argument("paths", nargs="+", help="chunks.json files, or directories holding one")
+    args = parser.parse_args()
+
+    for path in map(Path, args.paths):
+        json_path = path / JSON_FILENAME if path.is_dir() else path
+        store = ChunkStore.migrate(json_path)
+        print(f"{json_path} -> {store.path} ({len(store)} chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,17 @@ from pathlib import Path
 import pdfplumber 
 import re
 import json 
-from typing import List, Dict
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator
 from src.config.paths import DATA_DIR, PDF_DIR, ROOT_DIR
+from src import metrics
+from src.config.settings import INGEST_WORKERS, PAGES_PER_TASK, PARSE_ENGINE, SECTION_MAX_TOKENS
+from src.line_extraction import LINE_ENGINES
+from src.parse_cache import ParseCache
+from src.chunk_store import ChunkStore, STORE_FILENAME
+from src.tokens import estimate_tokens
 
 
 class PdfChunker(): 
@@ -20,15 +29,43 @@ class PdfChunker():
     
     Attributes:
         filepaths (list): List of pdf file paths 
+        pdf_dir (Path): Directory of the PDFs to chunk, defaults to PDF_DIR (tenants have their own)
+        chunks_dir (Path): Directory the chunk store (chunks.db) is saved to
+        chunks (ChunkStore): Store of the last saved chunks, texts are read from disk on access
+        engine (str): Name of the line extraction engine
+        extract_lines (callable): Line extraction engine ("python" or "numpy"), both produce identical lines
+        parse_cache (ParseCache): Content-addressed cache of parsed markdown, keyed by file hash & parser settings
     """
-    def __init__(self):
+    # bump whenever the parsing heuristics change so stale cache entries are not reused
+    PARSER_VERSION = 1
+
+    heading_font_threshold_main = 18  # large heading (H1)
+    heading_font_threshold_sub = 10   # subheading (H2)
+    merge_threshold = 18              # vertical distance threshold for merging lines
+
+    def __init__(self, engine: str = PARSE_ENGINE, pdf_dir: Path = None, chunks_dir: Path = None):
         self.chunks = None  
+        self.pdf_dir = Path(pdf_dir) if pdf_dir else PDF_DIR
+        self.chunks_dir = Path(chunks_dir) if chunks_dir else ROOT_DIR / "chunks"
+        self.engine = engine
+        self.extract_lines = LINE_ENGINES[engine]
+        self.parse_cache = ParseCache(parser_settings=self.parser_settings())
+
+    def parser_settings(self) -> Dict[str, int]: 
+        """
+        Returns the parser version and heuristic thresholds that determine the markdown output.
+        """
+        return {
+            "parser_version": self.PARSER_VERSION, 
+            "heading_font_threshold_main": self.heading_font_threshold_main, 
+            "heading_font_threshold_sub": self.heading_font_threshold_sub, 
+            "merge_threshold": self.merge_threshold, 
+        }
 
     def parse_pdf(self, filepath: str) -> str:
         """
         Parse a single PDF file and convert it to markdown format using pdfplumber & heuristic formatting. 
-        NOTE: Currently treats each PDF as a single chunk. Tables and images
-              are not processed in the current implementation.
+        NOTE: Tables and images are not processed in the current implementation.
         
         Args:
             filepath (str): Path to the PDF file to be parsed
@@ -36,154 +73,459 @@ class PdfChunker():
         Returns:
             str: Markdown-formatted text content of the entire PDF
         """
+        return "".join(self.iter_markdown(filepath))
+
+
+    def iter_markdown(self, filepath: str) -> Iterator[str]:
+        """
+        Stream the markdown of a PDF file page by page.
+        Each page's cached pdfplumber objects are released as soon as it is converted, so peak memory
+        stays flat on long documents. Joining the yielded strings gives exactly parse_pdf's output.
+
+        Args:
+            filepath (str): Path to the PDF file to be parsed
+
+        Yields:
+            str: Markdown text of consecutive pages
+        """
+        with pdfplumber.open(filepath) as pdf:
+            yield from self._collapse_blank_lines(self._iter_pages(pdf.pages))
+
+
+    def parse_pages(self, filepath: str, start: int = 0, stop: int = None) -> List[str]:
+        """
+        Parse a range of pages of a PDF file into per-page markdown.
+        Pages are independent of each other (paragraph merging never crosses a page break),
+        so page ranges can be parsed separately and concatenated in order.
+
+        Args:
+            filepath (str): Path to the PDF file to be parsed
+            start (int, optional): Index of the first page to parse. Defaults to 0.
+            stop (int, optional): Index after the last page to parse. Defaults to the end of the document.
+
+        Returns:
+            list: Markdown text of each parsed page, in page order
+        """
+        with pdfplumber.open(filepath) as pdf:
+            return list(self._iter_pages(pdf.pages[start:stop]))
+
+
+    def _iter_pages(self, pages) -> Iterator[str]:
+        """
+        Convert pdfplumber pages to markdown one at a time, releasing each page's caches afterwards.
+        Args:
+            pages (list): pdfplumber pages to convert
+        """
+        for page in pages:
+            try:
+                yield self._parse_page(page)
+            finally:
+                page.close()
+
 
-        md_text = ""
-        heading_font_threshold_main = 18  # large heading (H1)
-        heading_font_threshold_sub = 10   # subheading (H2)
-        merge_threshold = 18              # vertical distance threshold for merging lines
+    def _parse_page(self, page) -> str:
+        """
+        Convert a single pdfplumber page to markdown using the heading, list & paragraph heuristics.
+        Args:
+            page (pdfplumber.page.Page): The page to convert
+        """
+        parts = []
+        heading_font_threshold_main = self.heading_font_threshold_main
+        heading_font_threshold_sub = self.heading_font_threshold_sub
+        merge_threshold = self.merge_threshold
 
         bullet_pattern = re.compile(r"^(\*|-|•)\s+")
         numbered_pattern = re.compile(r"^\d+[\.\)]\s+")
 
-        with pdfplumber.open(filepath) as pdf:
-            for page in pdf.pages:
-                chars = page.chars
-                lines = {}
-
-                # Group characters by approximate y-position
-                for c in chars:
-                    y = round(c["top"])
-                    if y not in lines:
-                        lines[y] = []
-                    lines[y].append(c)
-
-                # Sort lines top-to-bottom
-                sorted_lines = sorted(lines.items(), key=lambda kv: kv[0])
-
-                prev_y = None
-                prev_line_type = None
-                buffer_line = ""
-
-                for y, line_chars in sorted_lines:
-                    # Sort left-to-right within the line
-                    line_chars = sorted(line_chars, key=lambda x: x["x0"])
-                    line_text = "".join([c["text"] for c in line_chars]).strip()
-                    if not line_text:
-                        continue
-
-                    # Determine font attributes
-                    font_sizes = [c["size"] for c in line_chars]
-                    max_font = max(font_sizes)
-                    bold = any("Bold" in c["fontname"] for c in line_chars)
-
-                    # Detect list items
-                    is_bullet = bool(bullet_pattern.match(line_text))
-                    is_numbered = bool(numbered_pattern.match(line_text))
-
-                    # Classify line type
-                    if max_font >= heading_font_threshold_main:
-                        line_type = "heading_main"
-                    elif max_font >= heading_font_threshold_sub:
-                        line_type = "heading_sub"
-                    elif is_bullet or is_numbered:
-                        line_type = "list_item"
-                    elif bold:
-                        line_type = "bold"
-                    else:
-                        line_type = "text"
-
-                    # Merge consecutive text lines that belong to the same paragraph
-                    if (
-                        prev_y is not None
-                        and abs(y - prev_y) < merge_threshold
-                        and line_type == prev_line_type == "text"
-                    ):
-                        buffer_line += " " + line_text
-                    elif (
-                        prev_y is not None
-                        and abs(y - prev_y) < merge_threshold
-                        and line_type == prev_line_type == "list_item"
-                    ):
-                        # Continuation of a bullet/numbered list item
-                        md_text = md_text.rstrip()
-                        md_text += " " + line_text + "\n"
-                    else:
-                        # Flush the previous buffered paragraph before writing new block
-                        if buffer_line:
-                            md_text += buffer_line + "\n\n"
-                            buffer_line = ""
-
-                        # Write based on line type
-                        if line_type == "heading_main":
-                            md_text += f"# {line_text}\n\n"
-                        elif line_type == "heading_sub":
-                            md_text += f"## {line_text}\n\n"
-                        elif line_type == "bold":
-                            md_text += f"**{line_text}**\n\n"
-                        elif line_type == "list_item":
-                            md_text += f"{line_text}\n"
-                        else:
-                            buffer_line = line_text  # start a new paragraph
-
-                    prev_y = y
-                    prev_line_type = line_type
-
-                # Flush any remaining buffered text
+        prev_y = None
+        prev_line_type = None
+        buffer_line = ""
+
+        for y, line_text, max_font, bold in self.extract_lines(page.chars):
+            # Detect list items
+            is_bullet = bool(bullet_pattern.match(line_text))
+            is_numbered = bool(numbered_pattern.match(line_text))
+
+            # Classify line type
+            if max_font >= heading_font_threshold_main:
+                line_type = "heading_main"
+            elif max_font >= heading_font_threshold_sub:
+                line_type = "heading_sub"
+            elif is_bullet or is_numbered:
+                line_type = "list_item"
+            elif bold:
+                line_type = "bold"
+            else:
+                line_type = "text"
+
+            # Merge consecutive text lines that belong to the same paragraph
+            if (
+                prev_y is not None
+                and abs(y - prev_y) < merge_threshold
+                and line_type == prev_line_type == "text"
+            ):
+                buffer_line += " " + line_text
+            elif (
+                prev_y is not None
+                and abs(y - prev_y) < merge_threshold
+                and line_type == prev_line_type == "list_item"
+            ):
+                # Continuation of a bullet/numbered list item
+                while parts and not parts[-1].rstrip():
+                    parts.pop()
+                parts[-1] = parts[-1].rstrip() + " " + line_text + "\n"
+            else:
+                # Flush the previous buffered paragraph before writing new block
                 if buffer_line:
-                    md_text += buffer_line + "\n\n"
+                    parts.append(buffer_line + "\n\n")
+                    buffer_line = ""
+
+                # Write based on line type
+                if line_type == "heading_main":
+                    parts.append(f"# {line_text}\n\n")
+                elif line_type == "heading_sub":
+                    parts.append(f"## {line_text}\n\n")
+                elif line_type == "bold":
+                    parts.append(f"**{line_text}**\n\n")
+                elif line_type == "list_item":
+                    parts.append(f"{line_text}\n")
+                else:
+                    buffer_line = line_text  # start a new paragraph
+
+            prev_y = y
+            prev_line_type = line_type
+
+        # Flush any remaining buffered text
+        if buffer_line:
+            parts.append(buffer_line + "\n\n")
+
+        return "".join(parts)
+
+
+    def _collapse_blank_lines(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Cleanup: remove excess blank lines (more than 2), including runs spanning page breaks.
+        Trailing newlines of a page are held back until the next page shows how long the run is,
+        so the result equals collapsing the joined document in one pass.
+
+        Args:
+            pages (iterable): Markdown text of each page, in page order
+        """
+        pending_newlines = 0
+        for text in pages:
+            body = text.rstrip("\n")
+            if not body.strip("\n"):
+                # page without content, its newlines extend the current run
+                pending_newlines += len(text)
+                continue
+
+            leading_newlines = len(body) - len(body.lstrip("\n"))
+            run = pending_newlines + leading_newlines
+            yield "\n" * (2 if run > 2 else run) + re.sub(r"\n{3,}", "\n\n", body[leading_newlines:])
+            pending_newlines = len(text) - len(body)
+
+        if pending_newlines:
+            yield "\n" * (2 if pending_newlines > 2 else pending_newlines)
+
+
+    def _parse_pdf_timed(self, filepath: str) -> str: 
+        started = time.perf_counter()
+        text = self.parse_pdf(filepath)
+        metrics.PDF_PARSE_SECONDS.labels(self.engine).observe(time.perf_counter() - started)
+        return text
+
+    def parse_pdfs_parallel(self, filepaths: List[str], workers: int, pages_per_task: int = PAGES_PER_TASK) -> Dict[str, str]:
+        """
+        Parse several PDF files across a process pool.
+        Files are split into page ranges of at most `pages_per_task` pages so large documents
+        are spread over several workers. Page ranges are reassembled in page order, so the
+        output is identical to calling parse_pdf on each file serially.
+
+        Args:
+            filepaths (list): Paths of the PDF files to parse
+            workers (int): Number of worker processes
+            pages_per_task (int, optional): Maximum number of pages handled by a single task
+
+        Returns:
+            dict: Markdown text of each file, keyed by its path
+        """
+        # tasks get module-level functions & plain arguments, pickling the chunker would also ship
+        # its chunks (and can't ship the open chunk store) to every task
+        parser_settings = self.parser_settings()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            page_counts = list(pool.map(_count_pages, filepaths))
+
+            # submit page ranges of every file, remembering their position for ordered reassembly
+            futures = {}
+            for filepath, page_count in zip(filepaths, page_counts):
+                for start in range(0, max(page_count, 1), pages_per_task):
+                    futures[(filepath, start)] = pool.submit(_parse_pages_timed, filepath, start, start + pages_per_task, self.engine, parser_settings)
+
+            results = {}
+            for filepath, page_count in zip(filepaths, page_counts):
+                pages = []
+                seconds = 0.0
+                for start in range(0, max(page_count, 1), pages_per_task):
+                    range_pages, range_seconds = futures[(filepath, start)].result()
+                    pages.extend(range_pages)
+                    seconds += range_seconds
+                results[filepath] = "".join(self._collapse_blank_lines(pages))
+                # parse time summed over the file's page ranges, as if it was parsed serially
+                metrics.PDF_PARSE_SECONDS.labels(self.engine).observe(seconds)
+
+        return results
+
+
+    def split_sections(self, md_text: str, max_tokens: int = SECTION_MAX_TOKENS) -> List[Dict[str, Any]]: 
+        """
+        Split markdown into heading-bounded sections of at most `max_tokens` estimated tokens.
+        Sections that exceed the limit are split on paragraph boundaries (or on words for a single
+        oversized paragraph), and every part repeats its heading so it stays self-describing.
 
-        # Cleanup: remove excess blank lines (more than 2)
-        md_text = re.sub(r"\n{3,}", "\n\n", md_text)
+        Args:
+            md_text (str): Markdown text of a document
+            max_tokens (int, optional): Token limit of a section. Defaults to SECTION_MAX_TOKENS.
 
-        return md_text
+        Returns:
+            list: Sections in document order, each with "heading", "text" and "tokens"
+        """
+        # group lines into (heading, paragraphs) sections 
+        sections = []
+        heading = ""
+        paragraphs = []
+        paragraph_lines = []
+        for line in md_text.split("\n") + [""]: 
+            if line.startswith("#") or not line.strip(): 
+                if paragraph_lines: 
+                    paragraphs.append("\n".join(paragraph_lines))
+                    paragraph_lines = []
+                if line.startswith("#") and not paragraphs: 
+                    # consecutive headings (e.g. a title followed by its first subheading) share a section 
+                    heading = "\n\n".join(filter(None, [heading, line.strip()]))
+                elif line.startswith("#"): 
+                    sections.append((heading, paragraphs))
+                    heading = line.strip()
+                    paragraphs = []
+            else: 
+                paragraph_lines.append(line.strip())
+        if heading or paragraphs: 
+            sections.append((heading, paragraphs))
+
+        # pack paragraphs into token-limited parts 
+        results = []
+        for heading, paragraphs in sections: 
+            heading_tokens = estimate_tokens(heading)
+            budget = max(max_tokens - heading_tokens, 1)
+            blocks = []
+            for paragraph in paragraphs: 
+                blocks.extend(self._split_words(paragraph, budget))
+
+            parts = [[]]
+            part_tokens = 0
+            for block in blocks: 
+                block_tokens = estimate_tokens(block)
+                if parts[-1] and part_tokens + block_tokens > budget: 
+                    parts.append([])
+                    part_tokens = 0
+                parts[-1].append(block)
+                part_tokens += block_tokens
+
+            for part in parts: 
+                text = "\n\n".join(([heading] if heading else []) + part)
+                if text: 
+                    results.append({"heading": heading, "text": text, "tokens": estimate_tokens(text)})
+
+        return results
+
+
+    def _split_words(self, paragraph: str, max_tokens: int) -> List[str]: 
+        """
+        Split a paragraph that exceeds the token limit into consecutive word windows.
+        Args:
+            paragraph (str): Paragraph text
+            max_tokens (int): Token limit of a window
+        """
+        if estimate_tokens(paragraph) <= max_tokens: 
+            return [paragraph]
+
+        windows = [[]]
+        window_tokens = 0
+        for word in paragraph.split(): 
+            word_tokens = estimate_tokens(word)
+            if windows[-1] and window_tokens + word_tokens > max_tokens: 
+                windows.append([])
+                window_tokens = 0
+            windows[-1].append(word)
+            window_tokens += word_tokens
+        return [" ".join(window) for window in windows]
+
+
+    def _entries(self) -> List[tuple]: 
+        # iterate through files in the pdf dir, chunk IDs are derived from each file's position
+        entries = []
+        for root, dirs, files in os.walk(self.pdf_dir):
+            for i, filename in enumerate(files): 
+                entries.append((i, filename, self.pdf_dir / filename))
+        return entries
 
+    def scan(self) -> Dict[str, tuple]: 
+        """
+        Cheap fingerprint of the PDF directory, used to detect added, changed or removed files without reading them.
+        Returns:
+            dict: (size, modification time) of each file, keyed by its path
+        """
+        fingerprints = {}
+        for _, _, filepath in self._entries(): 
+            try: 
+                stat = os.stat(filepath)
+            except FileNotFoundError: 
+                continue
+            fingerprints[str(filepath)] = (stat.st_size, stat.st_mtime_ns)
+        return fingerprints
+
+    def _sources(self, entries: List[tuple], file_hashes: Dict[str, str], sectioned: bool, max_section_tokens: int) -> str: 
+        """
+        Fingerprint of everything the chunks are built from: the PDFs (position, name & content hash),
+        the parser settings and the sectioning, recorded in the store to tell whether it is up to date.
+        """
+        sources = [self.parse_cache.fingerprint, sectioned, max_section_tokens, [(i, filename, file_hashes[filepath]) for i, filename, filepath in entries]]
+        return hashlib.sha256(json.dumps(sources).encode("utf-8")).hexdigest()
 
-    def chunk(self, save_results=False) -> Dict[str, dict]: 
+    def chunk_store(self, use_cache=True, workers=None, sectioned=True, max_section_tokens=SECTION_MAX_TOKENS) -> ChunkStore: 
+        """
+        Returns the chunk store of the PDF directory (chunks_dir/chunks.db), also kept as `chunks`.
+        When the existing store was built from the same PDFs & settings it is opened as is: nothing is
+        parsed or loaded into memory and the file is not rewritten, so every worker process starting
+        up shares the same file. Otherwise the PDFs are chunked and saved, see chunk.
+        """
+        entries = self._entries()
+        file_hashes = {filepath: self.parse_cache.hash_file(filepath) for _, _, filepath in entries}
+        store = ChunkStore.open_existing(self.chunks_dir / STORE_FILENAME)
+        if store is not None and store.sources == self._sources(entries, file_hashes, sectioned, max_section_tokens): 
+            self.chunks = store
+        else: 
+            self.chunk(save_results=True, use_cache=use_cache, workers=workers, sectioned=sectioned, max_section_tokens=max_section_tokens)
+        return self.chunks
+
+    def chunk(self, save_results=False, use_cache=True, workers=None, sectioned=True, max_section_tokens=SECTION_MAX_TOKENS) -> Dict[str, dict]: 
         """
         Process all PDF files in the configured directory to create document chunks.
+        Unchanged files are loaded from the parse cache, only new or modified PDFs are parsed.
 
         Args:
-            save_results (bool, optional): Whether to save results to JSON file.
-                                         Defaults to False.
+            save_results (bool, optional): Whether to save results to the chunk store (chunks_dir/chunks.db),
+                                         opened as `chunks`. Defaults to False.
+            use_cache (bool, optional): Whether to use the content-addressed parse cache.
+                                        Defaults to True.
+            workers (int, optional): Number of processes used to parse PDFs. Values above 1 spread
+                                     files and page ranges across a process pool with identical output.
+                                     Defaults to INGEST_WORKERS.
+            sectioned (bool, optional): Whether to split company documents into section chunks.
+                                        Defaults to True.
+            max_section_tokens (int, optional): Token limit of a section chunk. Defaults to SECTION_MAX_TOKENS.
                                          
         Returns:
             dict: Dictionary of chunks where keys are chunk IDs and values contain:
                 - filename: Original PDF filename
                 - type: Content type ("example" or "description")
                 - text: Extracted and formatted markdown text
+                - tokens: Estimated token count of the text
+                - source_hash: sha256 digest of the source PDF
+                - section, heading: Position & heading of section chunks
         """
+        workers = INGEST_WORKERS if workers is None else workers
+
+        entries = self._entries()
+
+        # load unchanged files from the parse cache 
+        texts = {}
+        file_hashes = {filepath: self.parse_cache.hash_file(filepath) for _, _, filepath in entries}
+        if use_cache: 
+            for _, _, filepath in entries: 
+                cached_text = self.parse_cache.get(file_hashes[filepath])
+                metrics.PDF_PARSE_CACHE_LOOKUPS.labels("miss" if cached_text is None else "hit").inc()
+                if cached_text is not None: 
+                    texts[filepath] = cached_text
+
+        # parse new or modified files, across a process pool if configured 
+        pending = list(dict.fromkeys(filepath for _, _, filepath in entries if filepath not in texts))
+        if workers > 1 and pending: 
+            parsed = self.parse_pdfs_parallel(pending, workers=workers)
+        else: 
+            parsed = {filepath: self._parse_pdf_timed(filepath) for filepath in pending}
+
+        for filepath, text in parsed.items(): 
+            texts[filepath] = text
+            if use_cache: 
+                self.parse_cache.put(file_hashes[filepath], text)
+
         chunks = {}
-        # iterate through files in the pdf dir 
-        for root, dirs, files in os.walk(PDF_DIR):
-            for i, filename in enumerate(files): 
-                text_chunk = self.parse_pdf(PDF_DIR / filename)
+        for i, filename, filepath in entries: 
+            text_chunk = texts[filepath]
 
-                if "example" in filename: 
-                    text_type = "example"
-                else: 
-                    text_type = "description"
+            if "example" in filename: 
+                text_type = "example"
+            else: 
+                text_type = "description"
 
-                name = filename.strip(".pdf")
-                chunk_id = f"{name}_chunk_{i+1}"
+            name = filename.strip(".pdf")
+            chunk_id = f"{name}_chunk_{i+1}"
 
+            # example posts are used whole as style guides, company documents are split into 
+            # heading-bounded sections so only the relevant ones are retrieved into the prompt 
+            if text_type == "example" or not sectioned: 
                 chunks[chunk_id] = {
                     "filename": filename, 
                     "type": text_type,
                     "text": text_chunk, 
+                    "tokens": estimate_tokens(text_chunk), 
+                    "source_hash": file_hashes[filepath], 
                 }
+                continue
 
-        if save_results: 
-            self.chunks = chunks 
+            for j, section in enumerate(self.split_sections(text_chunk, max_tokens=max_section_tokens)): 
+                chunks[f"{chunk_id}_section_{j+1}"] = {
+                    "filename": filename, 
+                    "type": text_type,
+                    "text": section["text"], 
+                    "section": j+1, 
+                    "heading": section["heading"], 
+                    "tokens": section["tokens"], 
+                    "source_hash": file_hashes[filepath], 
+                }
 
-            chunks_dir = ROOT_DIR / "chunks"
-            chunks_dir.mkdir(exist_ok=True)
-            with open(chunks_dir / "chunks.json", 'w') as f: 
-                json.dump(chunks, f)
+        if save_results: 
+            # written atomically, the file can be re-written by a reload while other processes read it 
+            self.chunks = ChunkStore.write(self.chunks_dir / STORE_FILENAME, chunks, sources=self._sources(entries, file_hashes, sectioned, max_section_tokens))
 
 
         return chunks 
 
 
+def _count_pages(filepath: str) -> int: 
+    """
+    Returns the number of pages in a PDF file.
+    Args:
+        filepath (str): Path to the PDF file
+    """
+    with pdfplumber.open(filepath) as pdf: 
+        return len(pdf.pages)
+
+
+def _parse_pages_timed(filepath: str, start: int, stop: int, engine: str, parser_settings: Dict[str, int]) -> tuple: 
+    """
+    Worker process task of parse_pdfs_parallel: parse a page range with the given engine & parser settings.
+    Returns the pages and the parse time, a worker process can't report to the parent's metrics.
+    """
+    started = time.perf_counter()
+    chunker = PdfChunker(engine=engine)
+    for name, value in parser_settings.items(): 
+        if name != "parser_version": 
+            setattr(chunker, name, value)
+    pages = chunker.parse_pages(filepath, start, stop)
+    return pages, time.perf_counter() - started
+
+
 # chunker = PdfChunker()
 # res = chunker.chunk(save_results=True)
 
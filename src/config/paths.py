@@ -4,4 +4,9 @@ import sys
 
 ROOT_DIR = Path(__file__).parent.parent.parent
 PDF_DIR = ROOT_DIR / "pdfs"
-DATA_DIR = ROOT_DIR / "chunks"
\ No newline at end of file
+DATA_DIR = ROOT_DIR / "chunks"
+PARSE_CACHE_DIR = DATA_DIR / "parse_cache"
+RESULT_CACHE_DIR = DATA_DIR / "result_cache"
+JOBS_DIR = ROOT_DIR / "jobs"
+TENANTS_DIR = ROOT_DIR / "tenants"              # <tenant>/ holds the PDFs of a tenant
+TENANT_CHUNKS_DIR = DATA_DIR / "tenants"        # <tenant>/chunks.db
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+
+# -- PDF ingestion -- 
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))            # processes used to parse PDFs (1 = serial)
+PAGES_PER_TASK = int(os.getenv("PAGES_PER_TASK", "16"))           # max pages of one PDF handled by a single worker task
+PARSE_ENGINE = os.getenv("PARSE_ENGINE", "python")                # line extraction engine for parse_pdf ("python" or "numpy")
+SECTION_MAX_TOKENS = int(os.getenv("SECTION_MAX_TOKENS", "400"))  # token limit of a company document section chunk
+CORPUS_WATCH_INTERVAL = float(os.getenv("CORPUS_WATCH_INTERVAL", "0"))  # seconds between PDF_DIR change checks (0 = reload via /admin/reload only)
+CHUNK_STORE_MMAP_MB = int(os.getenv("CHUNK_STORE_MMAP_MB", "256"))     # bytes of chunks.db memory-mapped per process, shared through the page cache (0 = read calls)
+
+# -- prompt context -- 
+CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", "4"))              # section chunks retrieved into the prompt (0 = all)
+MAX_NUM_CTX = int(os.getenv("MAX_NUM_CTX", "8192"))               # largest context window, prompts are trimmed to fit (0 = Ollama default, no trimming)
+NUM_CTX_BUCKETS = [int(size) for size in os.getenv("NUM_CTX_BUCKETS", "2048,4096,8192").split(",")]  # allowed num_ctx values
+CONTEXT_TOKEN_MARGIN = float(os.getenv("CONTEXT_TOKEN_MARGIN", "1.15"))  # safety factor on estimated prompt tokens
+NUM_CTX_SHRINK_AFTER = float(os.getenv("NUM_CTX_SHRINK_AFTER", "600"))   # seconds a model keeps a larger num_ctx after it was last needed
+
+# -- ollama -- 
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "256"))  # pooled HTTP connections per Ollama host
+OLLAMA_HOSTS = [host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()] or [None]  # Ollama servers (unset = OLLAMA_HOST)
+GEN_MODEL_HOSTS = [host.strip() for host in os.getenv("GEN_MODEL_HOSTS", "").split(",") if host.strip()] or None                 # servers of the generation model (unset = all)
+TRANSLATION_MODEL_HOSTS = [host.strip() for host in os.getenv("TRANSLATION_MODEL_HOSTS", "").split(",") if host.strip()] or None  # servers of the translation model (unset = all)
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))  # seconds between backend health checks (0 = disabled)
+OLLAMA_EJECT_AFTER = int(os.getenv("OLLAMA_EJECT_AFTER", "2"))             # consecutive failures that take a backend out of rotation
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))      # how long an ejected backend gets no traffic
+OLLAMA_LOAD_PENALTY = int(os.getenv("OLLAMA_LOAD_PENALTY", "4"))           # in-flight calls a cold model load is worth when routing
+GEN_MODEL_KEEP_ALIVE = os.getenv("GEN_MODEL_KEEP_ALIVE", "30m")                  # how long Ollama keeps the generation model loaded
+TRANSLATION_MODEL_KEEP_ALIVE = os.getenv("TRANSLATION_MODEL_KEEP_ALIVE", "30m")  # how long Ollama keeps the translation model loaded
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "240"))              # seconds between keep-warm heartbeats (0 = disabled)
+KEEP_WARM_WINDOW = float(os.getenv("KEEP_WARM_WINDOW", "3600"))                 # heartbeats continue this long after the last request
+
+# -- tenants -- 
+TENANT_CACHE_MB = float(os.getenv("TENANT_CACHE_MB", "256"))            # memory budget of the loaded tenant corpora (LRU)
+SESSION_SETTINGS_MAX = int(os.getenv("SESSION_SETTINGS_MAX", "10000"))  # per-session tone settings kept (LRU)
+
+# -- api -- 
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "10"))   # seconds a request waits for the corpus to load before a 503
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "120"))             # deadline of a generation request in seconds, X-Request-Timeout can shorten it (0 = none)
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "8"))      # generation pipelines running at once
+ADMISSION_QUEUE_DEPTH = int(os.getenv("ADMISSION_QUEUE_DEPTH", "32"))     # requests waiting for a pipeline slot before new ones get a 429
+
+# -- pipeline -- 
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))  # translations in flight per multi-language request
+TRANSLATION_SEGMENT_TOKENS = int(os.getenv("TRANSLATION_SEGMENT_TOKENS", "0"))          # translate long posts in segments of about this many tokens (0 = whole post at once)
+TRANSLATION_SEGMENT_CONCURRENCY = int(os.getenv("TRANSLATION_SEGMENT_CONCURRENCY", "4"))  # segment translations in flight per post
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))                  # batch job requests in flight against Ollama
+MAX_CANDIDATES = int(os.getenv("MAX_CANDIDATES", "1"))                           # outputs sampled concurrently per stage call, the first valid one wins (1 = sequential retries)
+CANDIDATE_TARGET_FAILURE = float(os.getenv("CANDIDATE_TARGET_FAILURE", "0.05"))  # candidates are added until all failing is this unlikely
+CANDIDATE_MAX_LOAD = int(os.getenv("CANDIDATE_MAX_LOAD", "2"))                   # in-flight calls per backend up to which extra candidates are launched
+
+# -- result cache -- 
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))                    # stage outputs kept in memory (LRU)
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "86400"))                  # seconds an output stays valid (0 = no expiry)
+RESULT_CACHE_DISK = os.getenv("RESULT_CACHE_DISK", "0") == "1"                    # also persist outputs to RESULT_CACHE_DIR
+RESULT_CACHE_DISK_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_ENTRIES", "10000"))  # stage outputs kept on disk
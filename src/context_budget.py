@@ -0,0 +1,134 @@
+import math
+import re
+import time
+from typing import Callable, List, Optional, Sequence
+from src.tokens import estimate_tokens
+
+
+# chat formatting tokens added around each message by the model's template
+MESSAGE_OVERHEAD_TOKENS = 8
+
+_WHITESPACE_SPLIT = re.compile(r"(\s+)")
+
+
+def estimate_messages_tokens(*messages: str) -> int:
+    """
+    Estimated prompt tokens of a chat (or generate) call made of the given message texts.
+    """
+    return sum(estimate_tokens(message) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of a text, cut at a word boundary, whose estimated token count fits `max_tokens`.
+    Deterministic, so the same text & budget always give the same prefix.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    pieces = _WHITESPACE_SPLIT.split(text)
+    # binary search over the number of words kept (pieces alternate word, whitespace)
+    low, high = 0, (len(pieces) + 1) // 2
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens("".join(pieces[:2 * middle - 1])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return "".join(pieces[:2 * low - 1]).rstrip() if low else ""
+
+
+def fit_texts(texts: Sequence[str], max_tokens: int, separator_tokens: int = 1) -> List[Optional[str]]:
+    """
+    Fit texts, given in priority order, into a token budget.
+    Texts are kept whole while they fit, texts that don't fit are dropped (later, smaller ones may
+    still fit). If not even the first text fits, it is truncated to the budget.
+
+    Returns:
+        list: The kept text at each position, None for dropped texts
+    """
+    kept = []
+    remaining = max_tokens
+    for text in texts:
+        tokens = estimate_tokens(text) + separator_tokens
+        if tokens <= remaining:
+            kept.append(text)
+            remaining -= tokens
+        else:
+            kept.append(None)
+    if texts and all(text is None for text in kept) and max_tokens > separator_tokens:
+        kept[0] = truncate_to_tokens(texts[0], max_tokens - separator_tokens) or None
+    return kept
+
+
+class ContextBudget():
+    """
+    Chooses Ollama's context window (num_ctx) per call and the token budget left for retrieved context.
+
+    A call needs room for its estimated prompt tokens (times a safety `margin`, the estimate is a
+    heuristic) plus `num_predict`. It gets the smallest bucket that fits, capped at `max_ctx`, so
+    the KV cache is sized for the actual request instead of the worst case.
+
+    Ollama reloads a model whenever num_ctx changes, and the generation model serves stages of
+    different sizes. To avoid that thrash, each model sticks to its current bucket while it is
+    large enough. It only drops to a smaller bucket once the larger one has not been needed for
+    `shrink_after` seconds.
+
+    Attributes:
+        buckets (tuple): Allowed num_ctx values, ascending
+        max_ctx (int): Largest num_ctx, also the budget prompts are trimmed to (0 disables budgeting)
+        margin (float): Safety factor on estimated prompt tokens
+        shrink_after (float): Seconds a larger bucket is kept after it was last needed
+    """
+    def __init__(self, buckets: Sequence[int], max_ctx: int, margin: float = 1.15, shrink_after: float = 600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_ctx = max_ctx
+        self.buckets = tuple(sorted(bucket for bucket in buckets if bucket <= max_ctx)) or (max_ctx,)
+        self.margin = margin
+        self.shrink_after = shrink_after
+        self.clock = clock
+        self._models = {}   # model name -> (num_ctx, last time a call needed it)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_ctx > 0
+
+    def required(self, prompt_tokens: int, num_predict: int) -> int:
+        """
+        Context window a call needs for its estimated prompt and generated tokens.
+        """
+        return math.ceil(prompt_tokens * self.margin) + num_predict
+
+    def context_tokens(self, fixed_tokens: int, num_predict: int) -> Optional[int]:
+        """
+        Token budget left for variable context once the fixed prompt parts and the output are accounted for.
+        None when budgeting is disabled.
+        """
+        if not self.enabled:
+            return None
+        return math.floor((self.max_ctx - num_predict) / self.margin) - fixed_tokens
+
+    def num_ctx(self, model_name: str, required: int) -> Optional[int]:
+        """
+        num_ctx for a call of a model, see the class docstring for the bucket choice.
+        None when budgeting is disabled (Ollama's default applies).
+        """
+        if not self.enabled:
+            return None
+        smallest = next((bucket for bucket in self.buckets if bucket >= required), self.buckets[-1])
+        now = self.clock()
+        current = self._models.get(model_name)
+        if current is not None and current[0] >= smallest and now - current[1] < self.shrink_after:
+            if current[0] == smallest:
+                self._models[model_name] = (smallest, now)
+            return current[0]
+        self._models[model_name] = (smallest, now)
+        return smallest
+
+    def current(self, model_name: str) -> Optional[int]:
+        """
+        The bucket a model is currently loaded with (as far as this process knows), e.g. for warm-ups.
+        """
+        if not self.enabled:
+            return None
+        current = self._models.get(model_name)
+        return current[0] if current is not None else self.buckets[0]
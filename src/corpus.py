@@ -0,0 +1,46 @@
+import sys
+from typing import Dict
+from src.chunk_store import ChunkStore, chunk_texts, corpus_hash
+from src.retrieval import Bm25Index
+
+
+# few-shot query paired with the example post(s)
+EXAMPLE_QUERY = "Describe why a home battery is a good choice for energy."
+
+
+class Corpus():
+    """
+    Immutable snapshot of the chunk corpus and everything derived from it.
+
+    A generator reads its corpus through a single reference, so a reloaded corpus is swapped in
+    atomically: requests that already picked up a snapshot keep using it until they finish.
+
+    Attributes:
+        chunks (Dict[str, dict]): Company context and example chunks, a plain dict or a ChunkStore reading texts lazily
+        index (Bm25Index): Lexical index over the company description chunks
+        corpus_hash (str): Hash of the chunks, part of every result cache key
+        example (tuple): (query, response) few-shot interaction built from the example chunks
+    """
+    def __init__(self, chunks: Dict[str, dict]):
+        self.chunks = chunks
+        self.index = Bm25Index.from_chunks(chunks, text_type="description")
+        self.corpus_hash = chunks.corpus_hash if isinstance(chunks, ChunkStore) else corpus_hash(chunks)
+        # built once so the prompt prefix is stable
+        blog_example = [text for _, text in chunk_texts(chunks, "example")]
+        self.example = (EXAMPLE_QUERY, "\n\n".join(blog_example))
+
+    def estimate_bytes(self) -> int:
+        """
+        Rough resident size of the snapshot: chunk texts & metadata, index postings and the example.
+        """
+        size = sys.getsizeof(self.example[1])
+        if isinstance(self.chunks, ChunkStore):
+            # only the metadata is resident, texts are read from the store when used
+            size += self.chunks.estimate_bytes()
+        else:
+            for chunk_id, chunk in self.chunks.items():
+                size += sys.getsizeof(chunk_id) + sum(sys.getsizeof(value) for value in chunk.values()) + sys.getsizeof(chunk)
+        for term, (positions, frequencies) in self.index.postings.items():
+            # key, postings tuple, two arrays & the idf entry
+            size += sys.getsizeof(term) + positions.nbytes + frequencies.nbytes + 300
+        return size
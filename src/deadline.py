@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Optional
+
+
+# monotonic time by which the current request must be answered, None for no deadline
+_deadline = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The request's deadline passed before it was answered, the remaining work was cancelled.
+    """
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Set the deadline of the code in the block (and the tasks it starts) to `seconds` from now.
+    An enclosing, earlier deadline is kept. None or 0 leaves the deadline unchanged.
+    """
+    deadline = _deadline.get()
+    if seconds:
+        deadline = min(filter(None, (deadline, time.monotonic() + seconds)))
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """
+    The current deadline (monotonic time), for code that outlives the scope it was set in, e.g. a streamed response.
+    """
+    return _deadline.get()
+
+
+def remaining(deadline: float = None) -> Optional[float]:
+    """
+    Seconds left until a deadline (defaults to the current one), None if there is none.
+    """
+    deadline = deadline if deadline is not None else _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(deadline: float = None) -> None:
+    """
+    Raises:
+        DeadlineExceeded: If the deadline (defaults to the current one) has passed
+    """
+    left = remaining(deadline)
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+async def with_deadline(awaitable: Awaitable, deadline: float = None) -> Any:
+    """
+    Await `awaitable`, cancelling it when the deadline (defaults to the current one) passes.
+    Raises:
+        DeadlineExceeded: If the deadline passed first
+    """
+    left = remaining(deadline)
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(left, 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded") from None
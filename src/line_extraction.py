@@ -0,0 +1,110 @@
+import numpy as np
+from operator import itemgetter
+from typing import List, Dict, Tuple, Any
+
+
+# (y, line_text, max_font, bold) for every non-empty line of a page, sorted top-to-bottom
+Line = Tuple[int, str, float, bool]
+
+_top = itemgetter("top")
+_x0 = itemgetter("x0")
+_size = itemgetter("size")
+_fontname = itemgetter("fontname")
+_text = itemgetter("text")
+
+
+def extract_lines_python(chars: List[Dict[str, Any]]) -> List[Line]:
+    """
+    Group a page's characters into lines with a per-character Python loop.
+    Args:
+        chars (list): pdfplumber char dicts of a single page
+    Returns:
+        list: (y, line_text, max_font, bold) tuples of the non-empty lines, top-to-bottom
+    """
+    lines = {}
+
+    # Group characters by approximate y-position
+    for c in chars:
+        y = round(c["top"])
+        if y not in lines:
+            lines[y] = []
+        lines[y].append(c)
+
+    # Sort lines top-to-bottom
+    sorted_lines = sorted(lines.items(), key=lambda kv: kv[0])
+
+    results = []
+    for y, line_chars in sorted_lines:
+        # Sort left-to-right within the line
+        line_chars = sorted(line_chars, key=lambda x: x["x0"])
+        line_text = "".join([c["text"] for c in line_chars]).strip()
+        if not line_text:
+            continue
+
+        # Determine font attributes
+        font_sizes = [c["size"] for c in line_chars]
+        max_font = max(font_sizes)
+        bold = any("Bold" in c["fontname"] for c in line_chars)
+
+        results.append((y, line_text, max_font, bold))
+
+    return results
+
+
+def extract_lines_numpy(chars: List[Dict[str, Any]]) -> List[Line]:
+    """
+    Group a page's characters into lines with batched NumPy operations.
+
+    Char attributes are loaded into arrays once, a single stable lexsort on (y, x0) orders
+    the characters line by line & left-to-right, and the max font size and bold flag of every
+    line are computed with segmented reductions. The result is identical to extract_lines_python.
+
+    Args:
+        chars (list): pdfplumber char dicts of a single page
+    Returns:
+        list: (y, line_text, max_font, bold) tuples of the non-empty lines, top-to-bottom
+    """
+    n = len(chars)
+    if n == 0:
+        return []
+
+    # load char attributes into arrays; round() and np.rint both round half to even,
+    # so lines are keyed exactly like the Python engine
+    y = np.rint(np.fromiter(map(_top, chars), dtype=np.float64, count=n)).astype(np.int64)
+    x0 = np.fromiter(map(_x0, chars), dtype=np.float64, count=n)
+    size = np.fromiter(map(_size, chars), dtype=np.float64, count=n)
+
+    # a page only uses a handful of fonts, so test "Bold" once per distinct fontname
+    fontnames = list(map(_fontname, chars))
+    bold_fonts = {fontname for fontname in set(fontnames) if "Bold" in fontname}
+    is_bold = np.fromiter(map(bold_fonts.__contains__, fontnames), dtype=bool, count=n)
+
+    # stable sort: top-to-bottom, then left-to-right, ties keep document order
+    order = np.lexsort((x0, y))
+    y = y[order]
+    starts = np.flatnonzero(np.r_[True, y[1:] != y[:-1]])
+    ends = np.r_[starts[1:], n]
+
+    max_fonts = np.maximum.reduceat(size[order], starts)
+    bolds = np.logical_or.reduceat(is_bold[order], starts)
+
+    # join the whole page once and slice out each line via character offsets
+    texts = list(map(_text, map(chars.__getitem__, order.tolist())))
+    offsets = np.r_[0, np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=n))]
+    page_text = "".join(texts)
+
+    results = []
+    for start, end, line_y, max_font, bold in zip(
+        offsets[starts].tolist(), offsets[ends].tolist(), y[starts].tolist(), max_fonts.tolist(), bolds.tolist()
+    ):
+        line_text = page_text[start:end].strip()
+        if line_text:
+            results.append((line_y, line_text, max_font, bold))
+
+    return results
+
+
+LINE_ENGINES = {
+    "python": extract_lines_python,
+    "numpy": extract_lines_numpy,
+}
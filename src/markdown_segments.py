@@ -0,0 +1,100 @@
+import re
+from typing import List, Optional, Tuple
+from src.markdown_stream import extract_markdown
+from src.tokens import estimate_tokens
+
+
+# blank lines between markdown blocks
+_BLOCK_SEPARATOR = re.compile(r"(\n[ \t]*\n\s*)")
+_FENCE_LINE = re.compile(r"^\s*(```|~~~)", re.MULTILINE)
+_HEADING = re.compile(r"^(#{1,6})\s")
+_LIST_ITEM = re.compile(r"^\s*([-*+]|\d+[.)])\s")
+
+
+def _blocks(text: str) -> List[Tuple[str, str]]:
+    """
+    Split markdown on blank lines into (block, separator after it) pairs, never inside a code fence.
+    """
+    pieces = _BLOCK_SEPARATOR.split(text)
+    blocks = []
+    block = pieces[0]
+    for i in range(1, len(pieces), 2):
+        if len(_FENCE_LINE.findall(block)) % 2:
+            # the block opened a fence that is not closed yet, the blank line belongs to it
+            block += pieces[i] + pieces[i + 1]
+            continue
+        blocks.append((block, pieces[i]))
+        block = pieces[i + 1]
+    blocks.append((block, ""))
+    return blocks
+
+
+def block_kind(block: str) -> str:
+    """
+    Structural kind of a markdown block: "h1" to "h6", "code", "list", "quote", "table" or "text".
+    """
+    heading = _HEADING.match(block)
+    if heading:
+        return f"h{len(heading.group(1))}"
+    if _FENCE_LINE.match(block):
+        return "code"
+    if _LIST_ITEM.match(block):
+        return "list"
+    if block.startswith(">"):
+        return "quote"
+    if block.startswith("|"):
+        return "table"
+    return "text"
+
+
+def outline(text: str) -> List[str]:
+    """
+    Block kinds of a markdown text in order, runs of the same kind collapsed, so a translation
+    may split or join paragraphs but keeps the headings, lists and code blocks of its source.
+    """
+    kinds = []
+    for block, _ in _blocks(text.strip()):
+        kind = block_kind(block)
+        if not kinds or kind != kinds[-1] or kind.startswith("h"):
+            kinds.append(kind)
+    return kinds
+
+
+def split_markdown(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """
+    Split a markdown post into segments that can be translated independently.
+
+    Segments end on block boundaries (blank lines outside code fences). A heading starts a new
+    segment and always travels with the block after it, and a segment is closed before it grows
+    past `max_tokens` (a single longer block stays whole).
+    Args:
+        text (str): Markdown post
+        max_tokens (int): Estimated token limit of a segment
+    Returns:
+        List[Tuple[str, str]]: (segment, separator after it) pairs, "".join of all parts is `text`
+    """
+    segments = []
+    current, tokens, has_body = "", 0, False
+    for block, separator in _blocks(text):
+        block_tokens = estimate_tokens(block)
+        heading = _HEADING.match(block) is not None
+        if has_body and (heading or tokens + block_tokens > max_tokens):
+            segments.append((current.rstrip(), current[len(current.rstrip()):]))
+            current, tokens, has_body = "", 0, False
+        current += block + separator
+        tokens += block_tokens
+        has_body = has_body or not heading
+    if current:
+        segments.append((current.rstrip(), current[len(current.rstrip()):]))
+    return segments
+
+
+def clean_segment(output: str) -> Optional[str]:
+    """
+    Clean markdown of a translated segment: the model may answer plain text or wrap it in a
+    ```markdown fence. None if the output is empty.
+    """
+    output = output.strip()
+    if output.startswith("```markdown"):
+        output = extract_markdown(output) or ""
+    return output or None
@@ -0,0 +1,118 @@
+import re
+from typing import Optional
+
+
+FENCE_OPEN = "```markdown"
+_FENCED_PATTERN = re.compile(r"^```markdown\s*(.*?)\s*```$", re.DOTALL)
+_CLOSING_FENCE = re.compile(r"\s*```\s*$")
+_TRAILING_WHITESPACE = re.compile(r"\s*$")
+_TRAILING_FENCE_CANDIDATE = re.compile(r"[\s`]*$")
+
+
+def extract_markdown(text: str) -> Optional[str]:
+    """
+    Heuristic markdown output validation of a complete LLM response.
+    Args:
+        text (str): Raw model output
+    Returns:
+        str: The clean markdown (pure markdown, or the inner text of a ```markdown fence), None if the output is not markdown
+    """
+    text = text.strip()
+    # check for pure markdown
+    if text.startswith("#"):
+        return text
+    # Regex to match ```markdown ... ```
+    match = _FENCED_PATTERN.match(text)
+    if match:
+        return match.group(1).strip() # return only the inner markdown
+    return None
+
+
+class MarkdownStreamFilter():
+    """
+    Incremental version of extract_markdown for streamed LLM output.
+
+    The mode is decided from the first non-whitespace characters: output starting with "#" is
+    pure markdown, output starting with "```markdown" is fenced and the fence is stripped, anything
+    else is invalid. Text that may turn out to be trailing whitespace or a closing fence is held
+    back until more output arrives, so the concatenated output equals extract_markdown's result.
+
+    Attributes:
+        mode (str): "undecided", "plain", "fenced" or "invalid"
+        terminated (bool): Whether a fenced output ended with its closing fence
+    """
+    def __init__(self):
+        self.mode = "undecided"
+        self.terminated = True
+        self._pending = ""
+        self._skip_whitespace = False
+
+    @property
+    def invalid(self) -> bool:
+        return self.mode == "invalid"
+
+    @property
+    def valid(self) -> bool:
+        return self.mode in ("plain", "fenced")
+
+    def feed(self, chunk: str) -> str:
+        """
+        Consume the next piece of model output.
+        Args:
+            chunk (str): Next streamed piece of text
+        Returns:
+            str: Markdown that can be emitted now (possibly empty)
+        """
+        if self.mode == "invalid":
+            return ""
+        self._pending += chunk
+
+        if self.mode == "undecided":
+            self._pending = self._pending.lstrip()
+            if self._pending.startswith("#"):
+                self.mode = "plain"
+            elif self._pending.startswith(FENCE_OPEN):
+                self.mode = "fenced"
+                self._pending = self._pending[len(FENCE_OPEN):]
+                self._skip_whitespace = True
+            elif FENCE_OPEN.startswith(self._pending):
+                # could still become a fence, wait for more output
+                return ""
+            else:
+                self.mode = "invalid"
+                self._pending = ""
+                return ""
+
+        if self._skip_whitespace:
+            self._pending = self._pending.lstrip()
+            if not self._pending:
+                return ""
+            self._skip_whitespace = False
+
+        # hold back what could be trailing whitespace (or a closing fence) of the final output
+        holdback = _TRAILING_WHITESPACE if self.mode == "plain" else _TRAILING_FENCE_CANDIDATE
+        cut = holdback.search(self._pending).start()
+        emit, self._pending = self._pending[:cut], self._pending[cut:]
+        return emit
+
+    def finish(self) -> str:
+        """
+        Signal the end of the stream.
+        Returns:
+            str: The remaining markdown to emit (possibly empty)
+        """
+        pending, self._pending = self._pending, ""
+        if self.mode == "undecided":
+            # the stream ended before it could be recognised as markdown
+            self.mode = "invalid"
+            return ""
+        if self.mode == "plain":
+            return pending.rstrip()
+        if self.mode == "fenced":
+            match = _CLOSING_FENCE.search(pending)
+            if match:
+                return pending[:match.start()]
+            # unterminated fence, keep the content that was already streamed
+            self.terminated = False
+            return pending.rstrip()
+        return ""
@@ -0,0 +1,131 @@
+from prometheus_client import Counter, Gauge, Histogram
+from typing import Dict, Any
+
+
+# -- LLM stages --
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+STAGE_ATTEMPT_SECONDS = Histogram(
+    "blog_stage_attempt_seconds", "Wall time of a single LLM attempt of a pipeline stage",
+    ["stage", "model", "attempt", "outcome"], buckets=LATENCY_BUCKETS,
+)
+STAGE_ATTEMPTS = Counter(
+    "blog_stage_attempts_total", "LLM attempts per pipeline stage by outcome (ok, invalid, aborted, error)",
+    ["stage", "model", "outcome"],
+)
+STAGE_FAILURES = Counter(
+    "blog_stage_failures_total", "Pipeline stages that exhausted their retries", ["stage", "model"],
+)
+PROMPT_EVAL_TOKENS = Histogram(
+    "ollama_prompt_eval_tokens", "Prompt tokens evaluated per attempt (prompt_eval_count)",
+    ["stage", "model", "attempt"], buckets=TOKEN_BUCKETS,
+)
+EVAL_TOKENS = Histogram(
+    "ollama_eval_tokens", "Tokens generated per attempt (eval_count)",
+    ["stage", "model", "attempt"], buckets=TOKEN_BUCKETS,
+)
+PROMPT_EVAL_SECONDS = Histogram(
+    "ollama_prompt_eval_seconds", "Time spent evaluating the prompt (prompt_eval_duration)",
+    ["stage", "model", "attempt"], buckets=LATENCY_BUCKETS,
+)
+EVAL_SECONDS = Histogram(
+    "ollama_eval_seconds", "Time spent generating tokens (eval_duration)",
+    ["stage", "model", "attempt"], buckets=LATENCY_BUCKETS,
+)
+LOAD_SECONDS = Histogram(
+    "ollama_load_seconds", "Time spent loading the model (load_duration)",
+    ["stage", "model", "attempt"], buckets=LATENCY_BUCKETS,
+)
+NUM_CTX_BUCKETS = (1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+NUM_CTX = Histogram(
+    "blog_num_ctx", "Context window (num_ctx) chosen per LLM attempt", ["stage", "model"], buckets=NUM_CTX_BUCKETS,
+)
+PROMPT_TOKENS_ESTIMATED = Histogram(
+    "blog_prompt_tokens_estimated", "Estimated prompt tokens per LLM attempt, compare with ollama_prompt_eval_tokens",
+    ["stage", "model"], buckets=TOKEN_BUCKETS,
+)
+CONTEXT_TRIMMED = Counter(
+    "blog_context_trimmed_total", "Prompts that exceeded the context budget, by what was trimmed (chunks, example) or overflow (not trimmable)",
+    ["stage", "part"],
+)
+CONTEXT_CHUNKS_DROPPED = Counter(
+    "blog_context_chunks_dropped_total", "Retrieved context chunks left out of prompts to fit the context budget", ["stage"],
+)
+COALESCED_CALLS = Counter(
+    "blog_coalesced_calls_total", "Calls that attached to an identical call already in flight (per stage, or whole requests)", ["stage"],
+)
+RESULT_CACHE_LOOKUPS = Counter(
+    "blog_result_cache_lookups_total", "Result cache lookups per stage", ["stage", "result"],
+)
+
+# -- PDF ingestion --
+PDF_PARSE_SECONDS = Histogram(
+    "pdf_parse_seconds", "Time to parse a PDF file into markdown", ["engine"], buckets=LATENCY_BUCKETS,
+)
+PDF_PARSE_CACHE_LOOKUPS = Counter(
+    "pdf_parse_cache_lookups_total", "Parse cache lookups of PDF files", ["result"],
+)
+
+
+def record_attempt(stage: str, model: str, attempt: int, outcome: str, seconds: float, response_stats: Dict[str, Any]) -> None:
+    """
+    Record one LLM attempt of a pipeline stage.
+
+    Args:
+        stage (str): Pipeline stage ("generate", "tone" or "translate")
+        model (str): Model that served the attempt
+        attempt (int): 1-based attempt number
+        outcome (str): "ok", "invalid" (complete but not markdown), "aborted" (cancelled early), "cancelled"
+            (another candidate was valid first) or "error"
+        seconds (float): Wall time of the attempt
+        response_stats (Dict[str, Any]): Counters of Ollama's final response, empty if the attempt did not finish
+    """
+    attempt = str(attempt)
+    STAGE_ATTEMPT_SECONDS.labels(stage, model, attempt, outcome).observe(seconds)
+    STAGE_ATTEMPTS.labels(stage, model, outcome).inc()
+
+    # ollama reports durations in nanoseconds
+    if response_stats.get("prompt_eval_count") is not None:
+        PROMPT_EVAL_TOKENS.labels(stage, model, attempt).observe(response_stats["prompt_eval_count"])
+    if response_stats.get("eval_count") is not None:
+        EVAL_TOKENS.labels(stage, model, attempt).observe(response_stats["eval_count"])
+    if response_stats.get("prompt_eval_duration") is not None:
+        PROMPT_EVAL_SECONDS.labels(stage, model, attempt).observe(response_stats["prompt_eval_duration"] / 1e9)
+    if response_stats.get("eval_duration") is not None:
+        EVAL_SECONDS.labels(stage, model, attempt).observe(response_stats["eval_duration"] / 1e9)
+    if response_stats.get("load_duration") is not None:
+        LOAD_SECONDS.labels(stage, model, attempt).observe(response_stats["load_duration"] / 1e9)
+
+
+# -- Ollama backends --
+OLLAMA_BACKEND_IN_FLIGHT = Gauge(
+    "ollama_backend_in_flight", "Calls of this process in flight per Ollama backend", ["host"],
+)
+OLLAMA_BACKEND_UP = Gauge(
+    "ollama_backend_up", "Whether the last health check of an Ollama backend succeeded", ["host"],
+)
+OLLAMA_BACKEND_FAILURES = Counter(
+    "ollama_backend_failures_total", "Failed calls per Ollama backend (connection & server errors)", ["host"],
+)
+OLLAMA_BACKEND_EJECTIONS = Counter(
+    "ollama_backend_ejections_total", "Times an Ollama backend was taken out of rotation", ["host"],
+)
+OLLAMA_FAILOVERS = Counter(
+    "ollama_failovers_total", "Calls retried on another Ollama backend after a backend failure", ["model"],
+)
+
+
+# -- admission --
+ADMISSION_RUNNING = Gauge(
+    "blog_admission_running", "Pipeline runs holding an admission slot",
+)
+ADMISSION_QUEUED = Gauge(
+    "blog_admission_queued", "Requests waiting for an admission slot",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "blog_admission_wait_seconds", "Time queued requests waited for a slot", ["priority"], buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "blog_admission_rejected_total", "Requests not admitted, by priority and status (429 queue full, 503 deadline)", ["priority", "status"],
+)
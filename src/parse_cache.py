@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+from src.config.paths import PARSE_CACHE_DIR
+
+
+class ParseCache():
+    """
+    A persistent, content-addressed cache for parsed PDF markdown.
+
+    Entries are keyed by a hash of the PDF's bytes combined with the parser fingerprint
+    (parser version & heuristic thresholds), so unchanged files can skip pdfplumber entirely
+    and any change to the file or to the parser settings results in a cache miss.
+
+    Attributes:
+        cache_dir (Path): Directory holding one JSON file per cached entry
+        fingerprint (str): Hash of the parser version & settings, mixed into every key
+    """
+    def __init__(self, parser_settings: Dict[str, Any], cache_dir: Path = PARSE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.fingerprint = hashlib.sha256(
+            json.dumps(parser_settings, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def hash_file(filepath: str) -> str:
+        """
+        Compute the sha256 digest of a file's bytes.
+        Args:
+            filepath (str): Path to the file to hash
+        """
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def key(self, file_hash: str) -> str:
+        """
+        Build the cache key for a file hash under the current parser fingerprint.
+        Args:
+            file_hash (str): sha256 digest of the PDF's bytes
+        """
+        return hashlib.sha256(f"{file_hash}:{self.fingerprint}".encode("utf-8")).hexdigest()
+
+    def get(self, file_hash: str) -> Optional[str]:
+        """
+        Return the cached markdown for a file hash, or None on a miss.
+        Args:
+            file_hash (str): sha256 digest of the PDF's bytes
+        """
+        path = self.cache_dir / f"{self.key(file_hash)}.json"
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)["text"]
+        except (OSError, ValueError, KeyError):
+            # missing or corrupt entries are treated as misses and re-parsed
+            return None
+
+    def put(self, file_hash: str, text: str) -> None:
+        """
+        Store the parsed markdown for a file hash.
+        The entry is written to a temporary file and renamed so concurrent workers never read partial entries.
+        Args:
+            file_hash (str): sha256 digest of the PDF's bytes
+            text (str): Markdown produced by the parser
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{self.key(file_hash)}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump({"text": text}, file)
+        os.replace(tmp_path, path)
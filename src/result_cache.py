@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+def normalize_text(text: str, lower: bool = False) -> str:
+    """
+    Normalize user input so trivially different requests share a cache entry.
+    Args:
+        text (str): Raw input
+        lower (bool, optional): Whether to lowercase the text (for tones & languages). Defaults to False.
+    """
+    text = " ".join(text.split())
+    return text.lower() if lower else text
+
+
+class ResultCache():
+    """
+    A two-tier cache for deterministic LLM stage outputs.
+
+    Generation uses a fixed seed, so a stage's output is fully determined by its inputs, the model
+    and its parameters, and the chunk corpus the prompt is built from. Entries are keyed by a hash of
+    all of these, so a changed corpus or model configuration never hits stale entries.
+    The in-memory tier is an LRU bounded by entry count, the optional on-disk tier (one JSON file per
+    entry) survives restarts and is shared by worker processes. Both tiers expire entries after `ttl` seconds.
+    The disk tier is trimmed to `max_disk_entries` every `evict_every` puts by a background thread,
+    so it may briefly hold a few more entries and a put never waits for the directory scan.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept in memory
+        ttl (float): Seconds an entry stays valid, 0 disables expiry
+        disk_dir (Path): Directory of the on-disk tier, None disables it
+        max_disk_entries (int): Maximum number of entries kept on disk
+        evict_every (int): Disk puts between size evictions, defaults to 1% of max_disk_entries
+        hits (int): Lookups answered from memory or disk
+        disk_hits (int): Lookups answered from disk
+        misses (int): Lookups that found no valid entry
+    """
+    def __init__(self, max_entries: int = 512, ttl: float = 0, disk_dir: Path = None, max_disk_entries: int = 10000, evict_every: int = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_entries = max_disk_entries
+        self.evict_every = evict_every or max(1, max_disk_entries // 100)
+        self._entries = OrderedDict()
+        self._disk_puts = 0
+        self._eviction = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(stage: str, inputs: Dict[str, Any], model_name: str, model_parameters: Dict[str, Any], corpus_hash: str) -> str:
+        """
+        Build the cache key of a stage call.
+        Args:
+            stage (str): Pipeline stage ("generate", "tone" or "translate")
+            inputs (Dict[str, Any]): Normalized stage inputs
+            model_name (str): Name of the model serving the stage
+            model_parameters (Dict[str, Any]): Model options, including the seed
+            corpus_hash (str): Hash of the chunk corpus
+        """
+        payload = json.dumps({
+            "stage": stage,
+            "inputs": inputs,
+            "model": model_name,
+            "parameters": model_parameters,
+            "corpus": corpus_hash,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached output for a key, or None on a miss.
+        Args:
+            key (str): Key built with make_key
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and not self._expired(entry[0], now):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self._entries.pop(key, None)
+
+        value = self._disk_get(key, now)
+        if value is not None:
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a stage output in both tiers.
+        Args:
+            key (str): Key built with make_key
+            value (str): Stage output
+        """
+        self._store(key, value, time.time())
+        if self.disk_dir is not None:
+            self._disk_put(key, value)
+
+    def clear(self) -> None:
+        """
+        Drop all in-memory entries (the on-disk tier is left untouched).
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns hit/miss counters and the current in-memory size.
+        """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - stored_at > self.ttl
+
+    def _store(self, key: str, value: str, stored_at: float) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+            stored_at, value = float(entry["stored_at"]), entry["value"]
+            if not isinstance(value, str):
+                raise TypeError(f"cached value is a {type(value).__name__}")
+        except OSError:
+            return None
+        except (ValueError, KeyError, TypeError):
+            # not an entry this version wrote (corrupt or another format), drop it
+            path.unlink(missing_ok=True)
+            return None
+        if self._expired(stored_at, now):
+            path.unlink(missing_ok=True)
+            return None
+        # promote to the memory tier
+        self._store(key, value, stored_at)
+        return value
+
+    def _disk_put(self, key: str, value: str) -> None:
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        path = self.disk_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump({"stored_at": time.time(), "value": value}, file)
+        os.replace(tmp_path, path)
+
+        self._disk_puts += 1
+        if self._disk_puts % self.evict_every == 0 and (self._eviction is None or not self._eviction.is_alive()):
+            # the directory scan stays off the event loop
+            self._eviction = threading.Thread(target=self._evict_disk, name="result-cache-eviction", daemon=True)
+            self._eviction.start()
+
+    def _evict_disk(self) -> None:
+        """
+        Size eviction of the disk tier, oldest files first. Other worker processes evict the same
+        directory, so files may vanish at any point.
+        """
+        entries = []
+        for entry in self.disk_dir.glob("*.json"):
+            try:
+                entries.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:
+                continue
+        if len(entries) > self.max_disk_entries:
+            entries.sort()
+            for _, entry in entries[:len(entries) - self.max_disk_entries]:
+                entry.unlink(missing_ok=True)
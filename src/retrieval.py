@@ -0,0 +1,95 @@
+import re
+import numpy as np
+from typing import Dict, List
+from src.chunk_store import chunk_texts
+
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens used for lexical retrieval.
+    Args:
+        text (str): Text to tokenize
+    """
+    return _WORD_PATTERN.findall(text.lower())
+
+
+class Bm25Index():
+    """
+    An in-process BM25 index over chunk texts, backed by NumPy postings.
+
+    Each term maps to the positions of the documents containing it and its term frequencies,
+    so a query only touches the postings of its own terms.
+
+    Attributes:
+        chunk_ids (list): IDs of the indexed chunks, in corpus order
+        postings (Dict[str, tuple]): term -> (document positions, term frequencies)
+        idf (Dict[str, float]): Inverse document frequency of each term
+        doc_lengths (np.ndarray): Number of tokens in each document
+    """
+    def __init__(self, documents: Dict[str, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunk_ids = list(documents)
+
+        term_docs = {}
+        doc_lengths = []
+        for position, text in enumerate(documents.values()):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_docs.setdefault(token, ([], []))
+                term_docs[token][0].append(position)
+                term_docs[token][1].append(count)
+
+        self.doc_lengths = np.array(doc_lengths, dtype=np.float32)
+        avg_length = float(self.doc_lengths.mean()) if len(doc_lengths) else 0.0
+        # per-document BM25 length normalisation, precomputed once at build time
+        self._length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(avg_length, 1.0))
+
+        n_docs = len(self.chunk_ids)
+        self.postings = {}
+        self.idf = {}
+        for token, (positions, counts) in term_docs.items():
+            self.postings[token] = (np.array(positions, dtype=np.int32), np.array(counts, dtype=np.float32))
+            self.idf[token] = float(np.log(1 + (n_docs - len(positions) + 0.5) / (len(positions) + 0.5)))
+
+    @classmethod
+    def from_chunks(cls, chunks: Dict[str, dict], text_type: str = "description") -> "Bm25Index":
+        """
+        Build an index over the chunks of a given type.
+        Args:
+            chunks (Dict[str, dict]): Chunks as produced by PdfChunker.chunk, or a ChunkStore
+            text_type (str, optional): Chunk type to index. Defaults to "description".
+        """
+        return cls(dict(chunk_texts(chunks, text_type)))
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every indexed document for a query.
+        Args:
+            query (str): Free-text query
+        """
+        scores = np.zeros(len(self.chunk_ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            if token not in self.postings:
+                continue
+            positions, counts = self.postings[token]
+            scores[positions] += self.idf[token] * counts * (self.k1 + 1) / (counts + self._length_norm[positions])
+        return scores
+
+    def search(self, query: str, k: int) -> List[str]:
+        """
+        Returns the IDs of the k most relevant chunks for a query, best first.
+        Ties (including chunks that match no query term) keep corpus order.
+        Args:
+            query (str): Free-text query
+            k (int): Number of chunk IDs to return
+        """
+        ranking = np.argsort(-self.scores(query), kind="stable")[:k]
+        return [self.chunk_ids[position] for position in ranking]
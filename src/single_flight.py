@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight():
+    """
+    One shared execution: its task, the callers attached to it and, for streams, the pieces so far.
+    """
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+        self.parts = []
+        self.updated = asyncio.Event()
+
+    def publish(self, text: str) -> None:
+        self.parts.append(text)
+        # wake the readers and give the next piece a fresh event
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+class SingleFlight():
+    """
+    Coalesces concurrent identical calls into one execution.
+
+    The first call of a key starts the work as a task; calls of the same key made while it runs
+    attach to that task instead of starting their own. Semantics:
+      - Success: every attached caller gets the result. The key is released when the task ends, so
+        later calls start fresh (and normally hit the result cache).
+      - Failure: every attached caller gets the same exception, a failed inference is not repeated
+        once per caller. The next call of the key retries.
+      - Cancellation: a caller that is cancelled (or stops reading a stream) only detaches, the other
+        callers are unaffected. The shared task is cancelled when its last caller detaches, so no
+        inference keeps running for nobody.
+    Streamed calls share their pieces: a caller attaching mid-stream first gets the pieces produced
+    so far, then the rest as they arrive. A streamed caller attaching to a non-streamed call gets the
+    result in one piece, and the other way around a caller gets the joined stream.
+
+    Attributes:
+        started (int): Calls that started an execution
+        coalesced (int): Calls that attached to an execution already in flight
+    """
+    def __init__(self):
+        self._flights = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def _join(self, key: Hashable, run: Callable[[_Flight], Awaitable[Any]]) -> _Flight:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(run(flight))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            self._flights[key] = flight
+            self.started += 1
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        return flight
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.updated.set()
+
+    def _leave(self, key: Hashable, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # nobody is waiting for the result any more
+            flight.task.cancel()
+            self._finish(key, flight)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `call()`, or attach to the identical call already in flight, and return its result.
+        """
+        async def run(flight: _Flight) -> Any:
+            return await call()
+
+        flight = self._join(key, run)
+        try:
+            # shielded, a caller being cancelled must not cancel the call for the others
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(key, flight)
+
+    async def stream(self, key: Hashable, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Stream `open_stream()`, or attach to the identical stream already in flight, yielding every piece.
+        The stream is consumed by a task of its own, so slow readers don't hold back the others.
+        """
+        async def run(flight: _Flight) -> str:
+            stream = open_stream()
+            try:
+                async for text in stream:
+                    flight.publish(text)
+            finally:
+                await stream.aclose()
+            return "".join(flight.parts)
+
+        flight = self._join(key, run)
+        try:
+            sent = 0
+            while True:
+                updated = flight.updated
+                while sent < len(flight.parts):
+                    yield flight.parts[sent]
+                    sent += 1
+                if flight.task.done():
+                    result = flight.task.result()
+                    if not flight.parts and result:
+                        # attached to a non-streamed call
+                        yield result
+                    return
+                await updated.wait()
+        finally:
+            self._leave(key, flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "started": self.started, "coalesced": self.coalesced}
@@ -0,0 +1,134 @@
+import asyncio
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional
+from src.corpus import Corpus
+
+
+DEFAULT_TENANT = "default"
+_TENANT_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+def valid_tenant_id(tenant_id: str) -> bool:
+    """
+    Tenant IDs name directories, so only short slugs are accepted (no path separators or dots).
+    """
+    return bool(_TENANT_ID.match(tenant_id))
+
+
+class TenantRegistry():
+    """
+    LRU of per-tenant corpora bounded by an estimated memory budget.
+
+    Corpora are loaded on first use through `loader`, which runs on a worker thread (it parses the
+    tenant's PDFs, unchanged files come from the shared parse cache). Concurrent requests for a
+    tenant that is still loading share one load. When the estimated size of the loaded corpora
+    exceeds `max_bytes`, the least recently used tenants are evicted; the most recently used one is
+    always kept, even if it alone exceeds the budget.
+
+    Evicted and invalidated corpora are not closed here: requests that picked one up keep reading
+    it until they finish. The registry only drops its reference, and a store-backed corpus (see
+    ChunkStore) closes its SQLite connection when the last request holding it lets go of it.
+
+    Attributes:
+        loader (Callable): Function building the Corpus of a tenant ID, raises FileNotFoundError for unknown tenants
+        max_bytes (int): Memory budget of the loaded corpora
+        bytes (int): Estimated size of the loaded corpora
+        loads (int): Number of corpora loaded
+        evictions (int): Number of corpora evicted to stay within the budget
+    """
+    def __init__(self, loader: Callable[[str], Corpus], max_bytes: int):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # tenant -> (corpus, estimated bytes)
+        self._loading = {}
+
+    async def get(self, tenant_id: str) -> Corpus:
+        """
+        Returns the corpus of a tenant, loading it if needed.
+
+        Raises:
+            FileNotFoundError: If the tenant has no PDF directory
+        """
+        entry = self._entries.get(tenant_id)
+        if entry is not None:
+            self._entries.move_to_end(tenant_id)
+            return entry[0]
+
+        load = self._loading.get(tenant_id)
+        if load is None:
+            load = asyncio.ensure_future(self._load(tenant_id))
+            self._loading[tenant_id] = load
+        # shielded, a cancelled request must not cancel the load other requests wait for
+        return await asyncio.shield(load)
+
+    def peek(self, tenant_id: str) -> Optional[Corpus]:
+        """
+        Returns the loaded corpus of a tenant without loading it or touching the LRU order.
+        """
+        entry = self._entries.get(tenant_id)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, tenant_id: str) -> None:
+        """
+        Drop a tenant's corpus, the next request re-chunks its PDF directory.
+        """
+        entry = self._entries.pop(tenant_id, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tenants": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes, "loads": self.loads, "evictions": self.evictions}
+
+    async def _load(self, tenant_id: str) -> Corpus:
+        try:
+            corpus = await asyncio.to_thread(self.loader, tenant_id)
+            size = await asyncio.to_thread(corpus.estimate_bytes)
+        finally:
+            self._loading.pop(tenant_id, None)
+        self.invalidate(tenant_id)
+        self._entries[tenant_id] = (corpus, size)
+        self.bytes += size
+        self.loads += 1
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+        return corpus
+
+
+class SessionSettings():
+    """
+    Per-tenant and per-session settings (e.g. the tone).
+
+    A value set for a session applies to that session only, a value set without a session applies
+    to every session of the tenant that did not set its own. Session values are kept in an LRU of
+    `max_sessions` entries, tenant-wide values are never evicted.
+
+    Attributes:
+        max_sessions (int): Maximum number of session values kept
+    """
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._tenant_values = {}
+        self._session_values = OrderedDict()
+
+    def set(self, tenant_id: str, session_id: Optional[str], value: Any) -> None:
+        if session_id is None:
+            self._tenant_values[tenant_id] = value
+            return
+        key = (tenant_id, session_id)
+        self._session_values[key] = value
+        self._session_values.move_to_end(key)
+        while len(self._session_values) > self.max_sessions:
+            self._session_values.popitem(last=False)
+
+    def get(self, tenant_id: str, session_id: Optional[str] = None) -> Any:
+        key = (tenant_id, session_id)
+        if session_id is not None and key in self._session_values:
+            self._session_values.move_to_end(key)
+            return self._session_values[key]
+        return self._tenant_values.get(tenant_id)
@@ -0,0 +1,22 @@
+import re
+
+
+# words, numbers & individual punctuation marks, roughly how LLM tokenizers split english text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int: 
+    """
+    Estimate the number of LLM tokens in a text without loading a tokenizer.
+    Words are counted as 4/3 tokens on average (sub-word splits), punctuation marks as one token each.
+    Args:
+        text (str): Text to estimate
+    """
+    words = 0
+    symbols = 0
+    for token in _TOKEN_PATTERN.findall(text): 
+        if token[0].isalnum() or token[0] == "_": 
+            words += 1
+        else: 
+            symbols += 1
+    return (words * 4 + 2) // 3 + symbols
@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import pytest
+from src.admission import AdmissionController, Overloaded
+from src.deadline import DeadlineExceeded, deadline_scope, with_deadline
+
+
+def test_queue_is_bounded_and_interactive_goes_first():
+    """Test that waiting requests are admitted by priority, a full queue rejects and interactive pushes out batch"""
+    admission = AdmissionController(concurrency=1, max_queue=2)
+    order = []
+
+    async def request(name, priority):
+        async with admission.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        running = asyncio.ensure_future(request("running", "interactive"))
+        await asyncio.sleep(0)
+        batch = [asyncio.ensure_future(request(f"batch {i}", "batch")) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await request("batch 2", "batch")
+        interactive = asyncio.ensure_future(request("interactive", "interactive"))
+        results = await asyncio.gather(running, interactive, *batch, return_exceptions=True)
+        return full.value, results
+
+    full, results = asyncio.run(scenario())
+
+    assert full.status_code == 429 and full.retry_after >= 1
+    # the newest batch request was pushed out by the interactive one
+    assert isinstance(results[3], Overloaded) and results[3].status_code == 429
+    assert order == ["running", "interactive", "batch 0"]
+    assert admission.stats()["running"] == 0 and admission.stats()["queued"] == 0
+
+
+def test_cancelled_and_hopeless_requests_leave_the_queue():
+    """Test that a cancelled waiter frees its place and a request that can't meet its deadline is rejected with a 503"""
+    admission = AdmissionController(concurrency=1, max_queue=4)
+    admission.run_seconds = 10
+
+    async def scenario():
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.stats()["queued"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        queued_after_cancel = admission.stats()["queued"]
+
+        with deadline_scope(1):
+            with pytest.raises(Overloaded) as hopeless:
+                await admission.acquire()
+        admission.release(1)
+        return queued_after_cancel, hopeless.value
+
+    queued_after_cancel, hopeless = asyncio.run(scenario())
+
+    assert queued_after_cancel == 0
+    assert hopeless.status_code == 503
+    assert admission.stats()["running"] == 0
+
+
+def test_deadline_cancels_the_work():
+    """Test that with_deadline cancels the awaited work once the scope's deadline passes"""
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        with deadline_scope(0.01):
+            # nested scopes can only shorten the deadline
+            with deadline_scope(10):
+                await with_deadline(work())
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scenario())
+    assert cancelled == [True]
+
+
+def test_cancelled_waiter_is_not_pushed_out():
+    """Test that a full queue holding a just cancelled waiter admits the next request instead of pushing the waiter out"""
+    admission = AdmissionController(concurrency=1, max_queue=1)
+
+    async def scenario():
+        await admission.acquire()
+        batch = asyncio.ensure_future(admission.acquire("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(admission.acquire("interactive"))
+        # cancelled, but runs after the interactive request to take itself off the queue
+        batch.cancel()
+        await asyncio.sleep(0)
+        admission.release(1)
+        await interactive
+        await asyncio.gather(batch, return_exceptions=True)
+        admission.release(1)
+        return batch
+
+    batch = asyncio.run(scenario())
+
+    assert batch.cancelled()
+    assert admission.stats()["running"] == 0 and admission.stats()["queued"] == 0
@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import socket
+import pytest
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaServer
+from src.backend_pool import OllamaBackendPool, OllamaUnavailableError
+from src.blog_generation import AsyncOllamaModel
+
+
+@pytest.fixture
+def servers():
+    with FakeOllamaServer(FakeOllama(ttft=0, tokens_per_sec=0, output_tokens=10)) as first, \
+            FakeOllamaServer(FakeOllama(ttft=0, tokens_per_sec=0, output_tokens=10)) as second:
+        yield first, second
+
+
+def closed_port_url() -> str:
+    # a local port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "http://%s:%d" % sock.getsockname()
+
+
+def test_choose_prefers_loaded_model_then_least_loaded():
+    """Test that routing prefers backends with the model loaded unless they are much busier, and skips ejected ones"""
+    now = [0.0]
+    pool = OllamaBackendPool(["a", "b", "c"], load_penalty=2, eject_after=1, eject_seconds=10, clock=lambda: now[0])
+    pool.backends["b"].loaded_models.add("mistral")
+
+    assert pool.choose("mistral").host == "b"
+    pool.backends["b"].in_flight = 2
+    # a cold load on an idle backend is worth 2 calls in flight, requests break the tie
+    assert pool.choose("mistral").host == "a"
+    assert pool.choose("mistral", hosts=["b", "c"]).host == "b"
+
+    pool.report_failure(pool.backends["b"])
+    assert pool.choose("mistral", hosts=["b", "c"]).host == "c"
+    # an ejected backend is still tried when it is the only one left
+    assert pool.choose("mistral", hosts=["b"]).host == "b"
+    with pytest.raises(OllamaUnavailableError):
+        pool.choose("mistral", hosts=["b"], exclude=["b"])
+    now[0] = 11
+    assert pool.backends["b"].available(now[0])
+
+
+def test_failing_backend_is_ejected_and_calls_fail_over(servers):
+    """Test that server errors are retried on the other backend and the failing one stops getting traffic"""
+    failing, healthy = servers
+    failing.fake.failure_rate = 1.0
+    pool = OllamaBackendPool([failing.url, healthy.url], load_penalty=0, eject_after=2, eject_seconds=60)
+    model = AsyncOllamaModel("mistral:latest", {}, pool=pool)
+
+    async def run():
+        return [await model.generate("write a post") for _ in range(3)] + \
+            ["".join([piece async for piece in model.stream_generate("write a post")]) for _ in range(3)]
+
+    outputs = asyncio.run(run())
+
+    assert all(output.startswith("# Blog post") for output in outputs)
+    assert failing.fake.stats["requests"] == 2
+    assert healthy.fake.stats["requests"] == 6
+    assert not pool.backends[failing.url].available(pool.clock())
+
+
+def test_health_checks_and_per_model_hosts(servers):
+    """Test that health checks eject unreachable backends and refresh loaded models, and models stay on their hosts"""
+    gen_server, translation_server = servers
+    dead = closed_port_url()
+    pool = OllamaBackendPool([gen_server.url, translation_server.url, dead])
+    gen_model = AsyncOllamaModel("mistral:latest", {}, pool=pool, hosts=[gen_server.url, dead])
+    translation_model = AsyncOllamaModel("translator", {}, pool=pool, hosts=[translation_server.url])
+
+    async def run():
+        health = await pool.check_all()
+        await gen_model.warm_up()
+        await translation_model.warm_up()
+        await pool.check_all()
+        return health
+
+    health = asyncio.run(run())
+
+    assert health == {gen_server.url: True, translation_server.url: True, dead: False}
+    assert pool.backends[gen_server.url].loaded_models == {"mistral:latest"}
+    assert pool.backends[translation_server.url].loaded_models == {"translator"}
+    assert set(gen_server.fake.loaded_models) == {"mistral:latest"}
+
+    with pytest.raises(OllamaUnavailableError):
+        asyncio.run(AsyncOllamaModel("mistral:latest", {}, host=dead).generate("hello"))
@@ -0,0 +1,380 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import pytest
+from src.blog_generation import BlogGenerator
+from src.corpus import Corpus
+from api.services.blog_service import BlogService
+from src.deadline import DeadlineExceeded, deadline_scope
+from src.backend_pool import OllamaBackendPool
+from src.candidates import CandidatePolicy, candidate_seed
+
+
+class FakeModel(): 
+    """Stand-in for AsyncOllamaModel that replays scripted outputs, one per call"""
+    def __init__(self, outputs, model_name="fake", model_parameters=None): 
+        self.outputs = list(outputs)
+        self.model_name = model_name
+        self.model_parameters = model_parameters or {"seed": 42}
+        self.calls = 0
+        self.pieces = 0
+
+    def _next(self) -> str: 
+        self.calls += 1
+        return self.outputs.pop(0)
+
+    async def warm_up(self, options=None): 
+        pass
+
+    async def generate(self, prompt): 
+        return self._next()
+
+    async def chat(self, prompt, system_prompt, example): 
+        return self._next()
+
+    async def stream_generate(self, prompt, response_stats=None, options=None): 
+        words = self._next().split(" ")
+        for i, word in enumerate(words): 
+            self.pieces += 1
+            yield word if i == 0 else " " + word
+        if response_stats is not None: 
+            response_stats.update({"prompt_eval_count": len(prompt.split()), "eval_count": len(words), "eval_duration": 10**9})
+
+    async def stream_chat(self, prompt, system_prompt, example, response_stats=None, options=None): 
+        async for piece in self.stream_generate(prompt, response_stats): 
+            yield piece
+
+
+@pytest.fixture
+def generator(): 
+    return BlogGenerator(chunks={
+        "company_chunk_1_section_1": {"filename": "company.pdf", "type": "description", "text": "# Company\n\nWe sell energy.", "section": 1}, 
+        "example_post_chunk_2": {"filename": "example_post.pdf", "type": "example", "text": "# Example\n\nPost."}, 
+    })
+
+
+def test_generate_blog_retries_until_markdown(generator): 
+    """Test that non-markdown output is retried and fenced output is unwrapped"""
+    generator.gen_model = FakeModel(["Sure! Here is your post", "```markdown\n# Title\n\nBody\n```"])
+
+    assert asyncio.run(generator.generate_blog("energy")) == "# Title\n\nBody"
+    assert generator.gen_model.calls == 2
+
+
+def test_stream_blog_events(generator): 
+    """Test that only the final stage streams tokens and intermediate stages report progress"""
+    service = BlogService(blog_generator=generator)
+    service.tone = "friendly"
+    generator.gen_model = FakeModel(["# Draft post", "# Friendly post"])
+    generator.translation_model = FakeModel(["Sure thing!", "# Vriendelijke post"])
+
+    async def collect(): 
+        return [event async for event in service.stream_blog("energy", "dutch")]
+    events = asyncio.run(collect())
+
+    stages = [(event["stage"], event["status"]) for event in events if event["event"] == "stage"]
+    assert stages == [("generate", "started"), ("generate", "completed"), ("tone", "started"), ("tone", "completed"), ("translate", "started"), ("translate", "completed")]
+    assert "".join(event["text"] for event in events if event["event"] == "token") == "# Vriendelijke post"
+    assert events[-1] == {"event": "done", "markdown": "# Vriendelijke post"}
+
+
+def test_repeated_requests_are_served_from_cache(generator): 
+    """Test that identical generations hit the result cache and a changed corpus does not"""
+    generator.gen_model = FakeModel(["# First", "# Second"])
+
+    assert asyncio.run(generator.generate_blog("energy")) == "# First"
+    assert asyncio.run(generator.generate_blog("  energy ")) == "# First"
+    assert generator.gen_model.calls == 1
+
+    changed = BlogGenerator(chunks={**generator.chunks, "extra_chunk_3": {"filename": "extra.pdf", "type": "description", "text": "More.", "section": 1}}, result_cache=generator.result_cache)
+    changed.gen_model = generator.gen_model
+    assert asyncio.run(changed.generate_blog("energy")) == "# Second"
+
+
+def test_generate_blog_multi_translates_once_per_language(generator): 
+    """Test that the draft is generated once and a failing language only fails its own variant"""
+    class Translator(FakeModel): 
+        async def stream_generate(self, prompt, response_stats=None, options=None): 
+            self.calls += 1
+            yield "no markdown" if "klingon" in prompt else "# " + prompt.split("english to ")[1].split(".")[0]
+
+    service = BlogService(blog_generator=generator)
+    generator.gen_model = FakeModel(["# Draft"])
+    generator.translation_model = Translator([])
+
+    result = asyncio.run(service.generate_blog_multi("energy", ["Dutch", "klingon", "dutch", "english"]))
+
+    assert generator.gen_model.calls == 1
+    assert generator.translation_model.calls == 4    # dutch once, klingon's 3 attempts
+    # answered under the names the caller sent
+    assert result["variants"] == [
+        {"language": "Dutch", "markdown": "# dutch"}, 
+        {"language": "klingon", "error": "LLM output could not be parsed as markdown after retries."}, 
+        {"language": "dutch", "markdown": "# dutch"}, 
+        {"language": "english", "markdown": "# Draft"}, 
+    ]
+
+
+def test_invalid_output_is_aborted_after_first_tokens(generator): 
+    """Test that preamble chatter is cancelled early and counted as a retry & abort"""
+    generator.gen_model = FakeModel(["Sure! Here is your blog post" + " filler" * 700, "# Title\n\nBody"])
+
+    assert asyncio.run(generator.generate_blog("energy")) == "# Title\n\nBody"
+    assert generator.gen_model.pieces < 10
+    assert generator.validation_stats["generate"] == {"attempts": 2, "retries": 1, "aborts": 1, "failures": 0}
+
+
+def test_unterminated_fence_is_retried(generator): 
+    """Test that a complete output must close its ```markdown fence, like the original validation"""
+    generator.gen_model = FakeModel(["```markdown\n# Draft\n``` Hope this helps!", "# Title"])
+
+    assert asyncio.run(generator.generate_blog("energy")) == "# Title"
+    assert generator.validation_stats["generate"]["aborts"] == 0
+
+
+def test_unterminated_stream_fails_and_is_not_cached(generator): 
+    """Test that a streamed output with an unclosed fence fails instead of being cached for generate_blog"""
+    generator.gen_model = FakeModel(["```markdown\n# Draft\n``` Hope this helps!", "# Title"])
+
+    async def collect(): 
+        return [text async for text in generator.stream_generate_blog("energy")]
+    with pytest.raises(ValueError): 
+        asyncio.run(collect())
+
+    assert asyncio.run(generator.generate_blog("energy")) == "# Title"
+    assert generator.validation_stats["generate"]["failures"] == 1
+
+
+def test_generation_prompt_prefix_is_stable(generator): 
+    """Test that only the final user message differs between requests, so Ollama can reuse the prompt prefix"""
+    prompt_a, system_a, example_a = generator._generate_blog_request("energy bills")
+    prompt_b, system_b, example_b = generator._generate_blog_request("health insurance")
+
+    assert system_a == system_b and example_a == example_b
+    assert prompt_a != prompt_b
+
+
+def test_stage_metrics(generator): 
+    from prometheus_client import REGISTRY
+
+    def sample(name, **labels): 
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    before_ok = sample("blog_stage_attempts_total", stage="tone", model="fake", outcome="ok")
+    before_aborted = sample("blog_stage_attempts_total", stage="tone", model="fake", outcome="aborted")
+    before_tokens = sample("ollama_eval_tokens_count", stage="tone", model="fake", attempt="2")
+    before_misses = sample("blog_result_cache_lookups_total", stage="tone", result="miss")
+    generator.gen_model = FakeModel(["Sure! here it is", "# Metered post"])
+
+    asyncio.run(generator.modify_tone("# Post", "Formal"))
+
+    assert sample("blog_stage_attempts_total", stage="tone", model="fake", outcome="aborted") == before_aborted + 1
+    assert sample("blog_stage_attempts_total", stage="tone", model="fake", outcome="ok") == before_ok + 1
+    # token counts are taken from the final response of the attempt that completed
+    assert sample("ollama_eval_tokens_count", stage="tone", model="fake", attempt="2") == before_tokens + 1
+    assert sample("blog_result_cache_lookups_total", stage="tone", result="miss") == before_misses + 1
+
+
+def test_service_loads_lazily_and_reports_readiness(generator): 
+    service = BlogService()
+    loads = []
+
+    def load(): 
+        loads.append(1)
+        service.blog_generator = generator
+    service._load = load
+
+    async def scenario(): 
+        assert service.readiness() == {"status": "starting", "corpus": False, "models": False}
+        await asyncio.gather(service.wait_ready(), service.wait_ready())
+        await service.warm_up()
+
+    generator.gen_model = FakeModel([])
+    generator.translation_model = FakeModel([])
+    asyncio.run(scenario())
+
+    assert loads == [1]
+    assert service.readiness() == {"status": "ready", "corpus": True, "models": True}
+
+
+def test_tone_and_corpus_are_scoped_per_tenant_and_session(generator): 
+    service = BlogService(blog_generator=generator)
+    acme = Corpus({"acme_chunk_1_section_1": {"filename": "acme.pdf", "type": "description", "text": "# Acme\n\nWe sell anvils.", "section": 1}})
+    service.tenants.loader = lambda tenant_id: acme
+    prompts = []
+
+    class Recorder(FakeModel): 
+        async def stream_generate(self, prompt, response_stats=None, options=None): 
+            prompts.append(prompt)
+            async for piece in super().stream_generate(prompt, response_stats): 
+                yield piece
+
+    generator.gen_model = Recorder(["# Acme post", "# Playful acme post", "# Default post"])
+    service.set_tone("playful", tenant_id="acme", session_id="s1")
+
+    async def scenario(): 
+        playful = await service.generate_blog("news", "english", tenant_id="acme", session_id="s1")
+        neutral = await service.generate_blog("news", "english")
+        return playful, neutral
+
+    playful, neutral = asyncio.run(scenario())
+
+    assert playful == {"markdown": "# Playful acme post"}
+    assert neutral == {"markdown": "# Default post"}
+    assert "anvils" in prompts[0] and "anvils" not in prompts[2]
+    # the default tenant and other sessions are unaffected by the session's tone 
+    assert service.tone is None and service.get_tone("acme", "s2") is None
+
+
+def test_identical_concurrent_requests_share_one_inference(generator): 
+    """Test that a burst of identical requests runs the pipeline once, stages included"""
+    class SlowModel(FakeModel): 
+        async def stream_generate(self, prompt, response_stats=None, options=None): 
+            await asyncio.sleep(0.01)
+            async for piece in super().stream_generate(prompt, response_stats): 
+                yield piece
+
+    service = BlogService(blog_generator=generator)
+    generator.gen_model = SlowModel(["# Post"])
+    generator.translation_model = SlowModel(["# Vertaald"])
+
+    async def burst(): 
+        requests = asyncio.gather(*(service.generate_blog("energy", "dutch") for _ in range(5)))
+        await asyncio.sleep(0.005)
+        # a streamed request attaches to the in-flight generate stage 
+        streamed = [event async for event in service.stream_blog(" energy", None)]
+        return await requests, streamed
+
+    results, streamed = asyncio.run(burst())
+
+    assert results == [{"markdown": "# Vertaald"}] * 5
+    assert streamed[-1] == {"event": "done", "markdown": "# Post"}
+    assert generator.gen_model.calls == 1 and generator.translation_model.calls == 1
+    assert service.requests_in_flight.stats()["coalesced"] == 4
+    assert generator.in_flight.stats()["coalesced"] == 1
+
+
+def test_deadline_cancels_the_remaining_stages(generator): 
+    """Test that a passed deadline cancels the running inference and skips the remaining stages"""
+    closed = []
+
+    class HangingModel(FakeModel): 
+        async def stream_generate(self, prompt, response_stats=None, options=None): 
+            self.calls += 1
+            try: 
+                yield "# Tone"
+                await asyncio.sleep(10)
+            finally: 
+                closed.append(True)
+
+    service = BlogService(blog_generator=generator)
+    service.tone = "friendly"
+    generator.gen_model = HangingModel(["# Draft"])
+    generator.gen_model.stream_chat = FakeModel(["# Draft"]).stream_chat
+    generator.translation_model = FakeModel(["# Vertaald"])
+
+    async def scenario(): 
+        with deadline_scope(0.05): 
+            await service.generate_blog("energy", "dutch")
+
+    with pytest.raises(DeadlineExceeded): 
+        asyncio.run(scenario())
+    assert closed == [True]
+    assert generator.translation_model.calls == 0
+    assert service.admission.stats()["running"] == 0
+
+
+def test_long_posts_are_translated_in_parallel_segments(generator): 
+    """Test that segments are translated concurrently, reassembled in order, retried alone and reused when unchanged"""
+    running = []
+    prompts = []
+
+    class SegmentTranslator(FakeModel): 
+        async def stream_generate(self, prompt, response_stats=None, options=None): 
+            self.calls += 1
+            segment = prompt.split("ONLY the translated markdown:")[1].strip()
+            prompts.append(segment)
+            running.append(len(running) + 1)
+            await asyncio.sleep(0.01)
+            running.pop()
+            if segment == "## Two\n\nSecond part." and prompts.count(segment) == 1: 
+                # lost its heading, only this segment is retried
+                yield "Zwei"
+                return
+            yield segment.upper()
+
+    generator.translation_model = SegmentTranslator([])
+    generator.segment_tokens = 8
+    post = "# One\n\nFirst part.\n\n## Two\n\nSecond part.\n\n## Three\n\n- a\n- b"
+
+    async def scenario(): 
+        concurrency = []
+
+        async def watch(): 
+            while True: 
+                concurrency.append(len(running))
+                await asyncio.sleep(0.002)
+
+        watcher = asyncio.ensure_future(watch())
+        translated = await generator.translate(post, "German")
+        watcher.cancel()
+        edited = await generator.translate(post.replace("Second part.", "Second part, edited."), "German")
+        return translated, edited, max(concurrency)
+
+    translated, edited, concurrency = asyncio.run(scenario())
+
+    assert translated == "# ONE\n\nFIRST PART.\n\n## TWO\n\nSECOND PART.\n\n## THREE\n\n- A\n- B"
+    assert edited == "# ONE\n\nFIRST PART.\n\n## TWO\n\nSECOND PART, EDITED.\n\n## THREE\n\n- A\n- B"
+    assert concurrency == 3
+    # 3 segments, 1 retry, then only the edited segment again
+    assert generator.translation_model.calls == 5
+    assert generator.validation_stats["translate"]["retries"] == 1
+
+
+class SeededModel(FakeModel): 
+    """Fake model whose output & latency depend on the seed of the call, like a sampled LLM"""
+    def __init__(self, outputs_by_seed): 
+        super().__init__([])
+        self.outputs_by_seed = outputs_by_seed
+        self.pool = OllamaBackendPool([None])
+        self.hosts = [None]
+        self.seeds = []
+        self.closed = []
+
+    async def stream_generate(self, prompt, response_stats=None, options=None): 
+        seed = (options or {}).get("seed", self.model_parameters["seed"])
+        self.seeds.append(seed)
+        delay, output = self.outputs_by_seed[seed]
+        try: 
+            await asyncio.sleep(delay)
+            yield output
+        finally: 
+            self.closed.append(seed)
+
+
+def test_first_valid_candidate_wins_and_cancels_the_rest(generator): 
+    """Test that candidates run concurrently with derived seeds and the first valid output cancels the others"""
+    seeds = [candidate_seed(42, i) for i in range(3)]
+    generator.gen_model = SeededModel({seeds[0]: (0.2, "# Slow"), seeds[1]: (0, "Sure! Here you go"), seeds[2]: (0.01, "# Fast")})
+    generator.candidate_policy = CandidatePolicy(max_candidates=3, prior=0.5)
+
+    assert asyncio.run(generator.modify_tone("# Draft", "friendly")) == "# Fast"
+    assert sorted(generator.gen_model.seeds) == sorted(seeds)
+    assert sorted(generator.gen_model.closed) == sorted(seeds)
+    assert generator.candidate_policy.stats()["cancelled"] == 1
+    # the extra candidates are counted as retries
+    assert generator.validation_stats["tone"] == {"attempts": 3, "retries": 2, "aborts": 1, "failures": 0}
+
+
+def test_busy_backends_fall_back_to_sequential_retries(generator): 
+    """Test that under load one attempt runs at a time, retries still using derived seeds"""
+    seeds = [candidate_seed(42, i) for i in range(3)]
+    generator.gen_model = SeededModel({seeds[0]: (0, "Nope"), seeds[1]: (0, "Still nope"), seeds[2]: (0, "# Third")})
+    generator.gen_model.pool.backends[None].in_flight = 2
+    generator.candidate_policy = CandidatePolicy(max_candidates=3, prior=0.5, max_load=2)
+
+    assert asyncio.run(generator.modify_tone("# Draft", "friendly")) == "# Third"
+    assert generator.gen_model.seeds == seeds
+    assert generator.candidate_policy.stats()["launched"] == 0
+    assert generator.validation_stats["tone"]["retries"] == 2
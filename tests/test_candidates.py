@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import pytest
+from src.candidates import CandidatePolicy, candidate_seed
+
+
+def test_candidate_count_adapts_to_failure_rate_and_load():
+    """Test that derived seeds are deterministic and N grows with the failure rate, shrinks with load"""
+    policy = CandidatePolicy(max_candidates=4, target_failure=0.05, prior=0.1)
+
+    assert candidate_seed(42, 0) == 42
+    assert len({candidate_seed(42, i) for i in range(10)}) == 10 and candidate_seed(42, 3) == candidate_seed(42, 3)
+    assert policy.candidates("generate", attempts_left=3, spare=8) == 2
+    for _ in range(20):
+        policy.record("generate", False)
+    assert policy.candidates("generate", attempts_left=3, spare=8) == 3
+    assert policy.candidates("generate", attempts_left=5, spare=8) == 4
+    # busy backends get no extra candidates
+    assert policy.candidates("generate", attempts_left=3, spare=0) == 1
+    for _ in range(40):
+        policy.record("tone", True)
+    assert policy.candidates("tone", attempts_left=3, spare=8) == 1
+    assert CandidatePolicy(max_candidates=1).candidates("generate", attempts_left=3, spare=8) == 1
+
+
+def test_first_valid_returns_none_when_every_candidate_is_invalid_and_raises_errors():
+    """Test that a round of invalid candidates returns None and a failing candidate cancels the others"""
+    policy = CandidatePolicy(max_candidates=3)
+    cancelled = []
+
+    async def candidate(delay, result):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def scenario():
+        invalid = await policy.first_valid([candidate(0, None), candidate(0.01, None)])
+        with pytest.raises(ConnectionError):
+            await policy.first_valid([candidate(0, ConnectionError("down")), candidate(1, "# Late")])
+        return invalid
+
+    assert asyncio.run(scenario()) is None
+    assert cancelled == [1]
+    assert policy.stats()["launched"] == 2 and policy.stats()["cancelled"] == 1
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import json
+import sqlite3
+import pytest
+from src.chunk_store import ChunkStore, corpus_hash
+from src.corpus import Corpus
+from src.blog_generation import BlogGenerator
+
+
+CHUNKS = {
+    "company_chunk_1_section_1": {"filename": "company.pdf", "type": "description", "text": "# Company\n\nWe sell energy.", "section": 1, "heading": "# Company", "tokens": 6, "source_hash": "a" * 64},
+    "company_chunk_1_section_2": {"filename": "company.pdf", "type": "description", "text": "## Batteries\n\nHome batteries store solar power.", "section": 2, "heading": "## Batteries", "tokens": 9, "source_hash": "a" * 64},
+    "example_post_chunk_2": {"filename": "example_post.pdf", "type": "example", "text": "# Example\n\nPost.", "tokens": 4},
+}
+
+
+def test_migrated_store_matches_the_json_corpus(tmp_path):
+    """Test that a migrated chunks.json keeps order, texts, metadata & corpus hash, and filters by type"""
+    with open(tmp_path / "chunks.json", 'w') as file:
+        json.dump(CHUNKS, file)
+
+    store = ChunkStore.load(tmp_path)
+
+    assert (tmp_path / "chunks.db").exists()
+    assert list(store) == list(CHUNKS)
+    assert store.to_dict() == CHUNKS
+    assert store.corpus_hash == corpus_hash(CHUNKS)
+    assert store.ids("example") == ["example_post_chunk_2"]
+    assert [chunk_id for chunk_id, _ in store.texts("description")] == ["company_chunk_1_section_1", "company_chunk_1_section_2"]
+    assert store["company_chunk_1_section_2"]["text"] == CHUNKS["company_chunk_1_section_2"]["text"]
+    assert store["example_post_chunk_2"].get("section", 1) == 1
+
+    # a corpus on the store is interchangeable with one on the dict
+    generator = BlogGenerator(chunks=CHUNKS)
+    lazy, plain = Corpus(store), Corpus(CHUNKS)
+    assert lazy.corpus_hash == plain.corpus_hash and lazy.example == plain.example
+    assert generator.select_context("batteries", top_k=1, corpus=lazy) == generator.select_context("batteries", top_k=1, corpus=plain)
+    # texts are not resident
+    assert lazy.estimate_bytes() < plain.estimate_bytes()
+
+
+def test_open_store_is_a_snapshot_of_the_file_it_opened(tmp_path):
+    """Test that rewriting the store leaves stores already open on the old file unchanged"""
+    old = ChunkStore.write(tmp_path / "chunks.db", CHUNKS)
+    changed = {**CHUNKS, "extra_chunk_3": {"filename": "extra.pdf", "type": "description", "text": "More."}}
+    changed["company_chunk_1_section_1"] = {**CHUNKS["company_chunk_1_section_1"], "text": "# Company\n\nWe sell heat pumps."}
+
+    new = ChunkStore.write(tmp_path / "chunks.db", changed)
+
+    assert len(old) == 3 and old["company_chunk_1_section_1"]["text"] == "# Company\n\nWe sell energy."
+    assert len(new) == 4 and new["company_chunk_1_section_1"]["text"] == "# Company\n\nWe sell heat pumps."
+    assert ChunkStore.load(tmp_path).corpus_hash == corpus_hash(changed)
+    assert not list(tmp_path.glob("*.tmp"))
+    # shared read-only
+    with pytest.raises(sqlite3.OperationalError):
+        new._connection.execute("DELETE FROM chunks")
+
+
+def test_outdated_store_is_rebuilt_from_json(tmp_path):
+    """Test that a store of another version is migrated again from chunks.json, and a missing corpus is reported"""
+    with pytest.raises(FileNotFoundError):
+        ChunkStore.load(tmp_path)
+
+    ChunkStore.write(tmp_path / "chunks.db", {})
+    connection = sqlite3.connect(tmp_path / "chunks.db")
+    connection.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+    connection.commit()
+    connection.close()
+    with open(tmp_path / "chunks.json", 'w') as file:
+        json.dump(CHUNKS, file)
+
+    assert ChunkStore.load(tmp_path).to_dict() == CHUNKS
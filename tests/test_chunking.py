@@ -0,0 +1,165 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
+from src.chunking import PdfChunker
+from src.parse_cache import ParseCache
+from src.chunk_store import ChunkStore
+
+
+@pytest.fixture
+def chunker(tmp_path): 
+    """PdfChunker whose parse cache lives in a temporary directory"""
+    chunker = PdfChunker()
+    chunker.parse_cache = ParseCache(chunker.parser_settings(), cache_dir=tmp_path / "parse_cache")
+    return chunker
+
+
+def test_parse_cache_skips_parsing_unchanged_files(chunker, monkeypatch): 
+    """Test that a warm parse cache returns the same chunks without calling parse_pdf"""
+    cold = chunker.chunk()
+
+    def fail(*args, **kwargs): 
+        raise AssertionError("parse_pdf should not run on a warm cache")
+    monkeypatch.setattr(chunker, "parse_pdf", fail)
+
+    warm = chunker.chunk()
+    assert warm == cold
+
+
+def test_parse_cache_invalidated_by_parser_settings(chunker, tmp_path): 
+    """Test that changing a threshold changes the cache key"""
+    file_hash = "0" * 64
+    chunker.parse_cache.put(file_hash, "# cached")
+    assert chunker.parse_cache.get(file_hash) == "# cached"
+
+    chunker.merge_threshold = 20
+    changed = ParseCache(chunker.parser_settings(), cache_dir=tmp_path / "parse_cache")
+    assert changed.get(file_hash) is None
+
+
+def test_parallel_chunking_matches_serial(chunker): 
+    """Test that the process pool produces the same chunk IDs & markdown as the serial path"""
+    serial = chunker.chunk(use_cache=False, workers=1)
+    parallel = chunker.chunk(use_cache=False, workers=2)
+
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+
+
+def test_saved_chunker_still_chunks_in_parallel(chunker, tmp_path): 
+    """Test that a chunker holding its saved chunk store can re-chunk across a process pool"""
+    chunker.chunks_dir = tmp_path / "chunks"
+    saved = chunker.chunk(save_results=True)
+    parallel = chunker.chunk(use_cache=False, workers=2)
+
+    assert parallel == saved
+    assert chunker.chunks.to_dict() == saved
+
+
+def test_chunk_store_is_reused_while_the_pdfs_are_unchanged(chunker, tmp_path, monkeypatch): 
+    """Test that an up to date store is opened without chunking or rewriting it, and a changed setting rebuilds it"""
+    chunker.chunks_dir = tmp_path / "chunks"
+    first = chunker.chunk_store()
+    inode = (tmp_path / "chunks" / "chunks.db").stat().st_ino
+
+    def fail(*args, **kwargs): 
+        raise AssertionError("an up to date store must not be rebuilt")
+    monkeypatch.setattr(chunker, "chunk", fail)
+    again = chunker.chunk_store()
+
+    assert again.corpus_hash == first.corpus_hash
+    assert (tmp_path / "chunks" / "chunks.db").stat().st_ino == inode
+
+    monkeypatch.undo()
+    rebuilt = chunker.chunk_store(max_section_tokens=50)
+    assert len(rebuilt) > len(first)
+    # identical chunks keep the file
+    ChunkStore.write(tmp_path / "chunks" / "chunks.db", rebuilt.to_dict(), sources=rebuilt.sources)
+    assert ChunkStore(tmp_path / "chunks" / "chunks.db").corpus_hash == rebuilt.corpus_hash
+
+
+def test_page_ranges_reassemble_in_order(chunker): 
+    """Test that splitting a PDF into single-page tasks yields the same markdown as parse_pdf"""
+    filepath = Path(__file__).parent.parent / "pdfs" / "company_description.pdf"
+    parsed = chunker.parse_pdfs_parallel([filepath], workers=2, pages_per_task=1)
+
+    assert parsed[filepath] == chunker.parse_pdf(filepath)
+
+
+def test_parallel_workers_use_the_chunker_settings(chunker): 
+    """Test that worker tasks parse with the chunker's thresholds, which are sent instead of the chunker"""
+    filepath = Path(__file__).parent.parent / "pdfs" / "company_description.pdf"
+    chunker.heading_font_threshold_sub = 100
+    chunker.merge_threshold = 2
+    parsed = chunker.parse_pdfs_parallel([filepath], workers=2, pages_per_task=1)
+
+    assert parsed[filepath] == chunker.parse_pdf(filepath)
+    assert parsed[filepath] != PdfChunker().parse_pdf(filepath)
+
+
+def test_iter_markdown_streams_pages(chunker): 
+    """Test that the streaming parser yields page by page and joins to parse_pdf's output"""
+    filepath = Path(__file__).parent.parent / "pdfs" / "company_description.pdf"
+    pages = list(chunker.iter_markdown(filepath))
+
+    assert len(pages) > 1
+    assert "".join(pages) == chunker.parse_pdf(filepath)
+
+
+def test_numpy_engine_matches_python_engine(tmp_path): 
+    """Test that the vectorized line extraction engine yields the same markdown as the Python loop"""
+    python_chunker = PdfChunker(engine="python")
+    numpy_chunker = PdfChunker(engine="numpy")
+
+    assert numpy_chunker.chunk(use_cache=False) == python_chunker.chunk(use_cache=False)
+
+
+def test_split_sections_respects_headings_and_token_limit(chunker): 
+    """Test that sections start at headings and oversized sections are split with their heading repeated"""
+    md_text = "# Title\n\n## Energy\n\n" + "\n\n".join(["energy saving tips " * 10] * 4) + "\n\n## Health\n\nshort\n\n"
+    sections = chunker.split_sections(md_text, max_tokens=60)
+
+    assert [section["heading"] for section in sections] == ["# Title\n\n## Energy"] * 4 + ["## Health"]
+    assert all(section["tokens"] <= 60 for section in sections)
+    assert all(section["text"].startswith(section["heading"]) for section in sections)
+
+
+def test_reload_parses_only_changed_pdfs_and_swaps_corpus(tmp_path, monkeypatch): 
+    """Test that a reload re-parses only the added PDF and swaps the corpus without touching the old snapshot"""
+    import asyncio
+    import shutil
+    import src.chunking
+    from api.services.blog_service import BlogService
+    from benchmarks.bench_parse_pdf import write_pdf
+
+    pdf_dir = tmp_path / "pdfs"
+    shutil.copytree(Path(__file__).parent.parent / "pdfs", pdf_dir)
+    monkeypatch.setattr(src.chunking, "PDF_DIR", pdf_dir)
+    monkeypatch.setattr(src.chunking, "ROOT_DIR", tmp_path)
+    monkeypatch.setattr(src.chunking, "ParseCache", lambda parser_settings: ParseCache(parser_settings, cache_dir=tmp_path / "parse_cache"))
+    parsed = []
+    parse_pdf = PdfChunker.parse_pdf
+    monkeypatch.setattr(PdfChunker, "parse_pdf", lambda self, filepath: parsed.append(Path(filepath).name) or parse_pdf(self, filepath))
+
+    service = BlogService()
+
+    async def scenario(): 
+        await service.wait_ready()
+        old_corpus = service.blog_generator.corpus
+        unchanged = await service.reload()
+
+        write_pdf(pdf_dir / "new_offer.pdf", pages=1)
+        added = await service.reload()
+        (pdf_dir / "new_offer.pdf").unlink()
+        removed = await service.reload()
+        return old_corpus, unchanged, added, removed
+
+    old_corpus, unchanged, added, removed = asyncio.run(scenario())
+
+    assert sorted(parsed) == ["company_description.pdf", "example_post.pdf", "new_offer.pdf"]
+    assert not unchanged["reloaded"]
+    assert added["reloaded"] and added["added"] == [str(pdf_dir / "new_offer.pdf")]
+    assert all(chunk["filename"] != "new_offer.pdf" for chunk in old_corpus.chunks.values())
+    assert removed["reloaded"] and removed["removed"] == [str(pdf_dir / "new_offer.pdf")]
+    assert service.blog_generator.corpus_hash == old_corpus.corpus_hash
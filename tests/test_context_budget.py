@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+from src.blog_generation import BlogGenerator
+from src.context_budget import ContextBudget, estimate_messages_tokens, fit_texts, truncate_to_tokens
+from src.tokens import estimate_tokens
+
+
+def test_num_ctx_buckets_are_sticky_until_unused():
+    """Test that a model gets the smallest fitting bucket and only shrinks after shrink_after seconds"""
+    now = [0.0]
+    budget = ContextBudget([2048, 4096, 8192, 16384], max_ctx=8192, margin=1.0, shrink_after=60, clock=lambda: now[0])
+
+    assert budget.buckets == (2048, 4096, 8192)
+    assert budget.num_ctx("gen", 1000) == 2048
+    assert budget.num_ctx("gen", 3000) == 4096
+    # a smaller call right after keeps the loaded bucket, no reload
+    now[0] = 30
+    assert budget.num_ctx("gen", 1000) == 4096
+    assert budget.current("gen") == 4096
+    # other models have their own bucket
+    assert budget.num_ctx("translate", 1000) == 2048
+    # the larger bucket was last needed at t=0
+    now[0] = 61
+    assert budget.num_ctx("gen", 1000) == 2048
+    # requests larger than max_ctx get the largest bucket
+    assert budget.num_ctx("gen", 100000) == 8192
+
+    disabled = ContextBudget([2048], max_ctx=0)
+    assert not disabled.enabled
+    assert disabled.num_ctx("gen", 1000) is None
+    assert disabled.context_tokens(100, 100) is None
+
+
+def test_fit_texts_keeps_priority_order_within_budget():
+    """Test that texts are kept whole in priority order and the first one is truncated when nothing fits"""
+    texts = ["alpha " * 50, "beta " * 200, "gamma " * 10]
+    budget = estimate_tokens(texts[0]) + estimate_tokens(texts[2]) + 2
+
+    kept = fit_texts(texts, budget)
+    assert kept == [texts[0], None, texts[2]]
+
+    kept = fit_texts([texts[1]], 20)
+    assert kept[0] and texts[1].startswith(kept[0])
+    assert estimate_tokens(kept[0]) <= 19
+
+    assert truncate_to_tokens("short text", 100) == "short text"
+    assert truncate_to_tokens("word " * 100, 0) == ""
+
+
+def test_generation_prompt_is_trimmed_to_the_context_budget():
+    """Test that retrieved context is dropped to fit max_ctx while the leading section is kept"""
+    chunks = {
+        "company_chunk_1_section_1": {"filename": "company.pdf", "type": "description", "text": "# Company\n\nWe sell energy.", "section": 1},
+        "example_post_chunk_2": {"filename": "example_post.pdf", "type": "example", "text": "# Example\n\nPost."},
+    }
+    for i in range(2, 40):
+        chunks[f"company_chunk_{i + 1}_section_{i}"] = {"filename": "company.pdf", "type": "description", "text": f"## Part {i}\n\n" + "solar battery grid " * 200, "section": i}
+    generator = BlogGenerator(chunks=chunks)
+    generator.gen_model.model_parameters["num_predict"] = 256
+    generator.context_budget = ContextBudget([1024, 2048], max_ctx=2048, margin=1.15)
+
+    prompt, system_prompt, example = generator._generate_blog_request("solar battery")
+    required = generator.context_budget.required(estimate_messages_tokens(system_prompt, *example, prompt), 256)
+    assert required <= 2048
+    assert "We sell energy." in prompt
+    assert "## Part" in prompt
+    options = generator._call_options("generate", generator.gen_model, system_prompt, *example, prompt)
+    assert options == {"num_ctx": 2048}
+
+    # without a budget all top_k retrieved chunks are included
+    generator.context_budget = ContextBudget([], max_ctx=0)
+    untrimmed, _, _ = generator._generate_blog_request("solar battery")
+    assert len(untrimmed) > len(prompt)
+    assert generator._call_options("generate", generator.gen_model, untrimmed) is None
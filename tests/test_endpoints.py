@@ -2,8 +2,13 @@ import sys
 from pathlib import Path
 # sys.path.insert(0, str(Path(__file__).parent.parent))
 from fastapi.testclient import TestClient
+import asyncio
 import pytest
 from api.main import app
+from api.dependencies import blog_service, job_service
+from api.models.requests import BlogGenerationRequest
+from api.routers.generate import stream_blog_post
+from src.admission import AdmissionController
 
 
 client = TestClient(app)
@@ -15,6 +20,14 @@ def test_health_check():
     assert response.status_code == 200
     print(f"Health response: {response.json()}")
 
+def test_ready_check(): 
+    """Test that /ready answers separately from /health, 503 until the models are warmed up"""
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+
 def test_set_tone_endpoint():
     """Test the /tone endpoint with dummy data"""
     dummy_request = {
@@ -63,4 +76,56 @@ def test_invalid_requests():
     # Missing required field for tone
     response = client.post("/settings/tone", json={})
     assert response.status_code == 422
-    print(f"Missing tone error: {response.json()}")
\ No newline at end of file
+    print(f"Missing tone error: {response.json()}")
+
+
+def test_generate_is_rejected_when_the_queue_is_full(): 
+    """Test that /generate answers 429 with Retry-After right away when no request can be admitted"""
+    admission = blog_service.admission
+    blog_service.admission = AdmissionController(concurrency=0, max_queue=0)
+    try: 
+        response = client.post("/generate", json={"purpose": "Introduce smart televisions to our clients."})
+        stream_response = client.post("/generate/stream", json={"purpose": "Introduce smart televisions to our clients."})
+    finally: 
+        blog_service.admission = admission
+
+    assert response.status_code == 429 and stream_response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_job_of_another_tenant_is_not_found(tmp_path, monkeypatch): 
+    """Test that /jobs answers 404 for a job submitted by another tenant"""
+    monkeypatch.setattr("api.dependencies.TENANTS_DIR", tmp_path)
+    (tmp_path / "acme").mkdir()
+    monkeypatch.setattr(job_service, "jobs_dir", tmp_path)
+    monkeypatch.setitem(job_service.jobs, "acme_job", {"total": 1, "completed": set(), "failed": 0, "tenant_id": "acme"})
+
+    assert client.get("/jobs/acme_job", headers={"X-Tenant-ID": "acme"}).status_code == 200
+    assert client.get("/jobs/acme_job/results", headers={"X-Tenant-ID": "acme"}).json()["results"] == []
+    assert client.get("/jobs/acme_job").status_code == 404
+    assert client.get("/jobs/acme_job/results").status_code == 404
+
+
+def test_stream_client_leaving_while_queued_gives_up_its_place(): 
+    """Test that a disconnect before admission cancels the queued stream and answers 499"""
+    cancelled = []
+
+    class QueuedService(): 
+        async def stream_blog(self, purpose, language, tenant_id=None, session_id=None): 
+            try: 
+                await asyncio.sleep(10)    # waiting for admission
+            except asyncio.CancelledError: 
+                cancelled.append(purpose)
+                raise
+            yield {"event": "stage", "stage": "generate", "status": "started"}
+
+    class DisconnectedRequest(): 
+        async def receive(self): 
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+    request = BlogGenerationRequest(purpose="energy", language="english")
+    response = asyncio.run(asyncio.wait_for(stream_blog_post(request, DisconnectedRequest(), QueuedService(), "default", None, None), 1))
+
+    assert response.status_code == 499
+    assert cancelled == ["energy"]
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import pytest
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaServer
+from src.blog_generation import AsyncOllamaModel, BlogGenerator
+
+
+@pytest.fixture
+def server(): 
+    with FakeOllamaServer(FakeOllama(ttft=0, tokens_per_sec=0, output_tokens=30)) as server: 
+        yield server
+
+
+def test_stream_reports_response_stats(server): 
+    model = AsyncOllamaModel("mistral:latest", {"num_predict": 12}, host=server.url)
+    stats = {}
+
+    async def run(): 
+        return [piece async for piece in model.stream_chat("write a post", "be brief", ("q", "a"), stats)]
+
+    pieces = asyncio.run(run())
+
+    assert "".join(pieces).startswith("# Blog post")
+    assert stats["eval_count"] == 12 == len(pieces) - 1
+    assert stats["prompt_eval_count"] == 7   # words of the system prompt, example and prompt
+
+
+def test_pipeline_retries_non_markdown_and_failures(server): 
+    server.fake.non_markdown_rate = 0.3
+    server.fake.failure_rate = 0.1
+    generator = BlogGenerator(chunks={
+        "company_chunk_1_section_1": {"filename": "company.pdf", "type": "description", "text": "# Company\n\nWe sell energy.", "section": 1}, 
+        "example_post_chunk_2": {"filename": "example_post.pdf", "type": "example", "text": "# Example\n\nPost."}, 
+    })
+    generator.gen_model = AsyncOllamaModel(generator.gen_model.model_name, generator.gen_model.model_parameters, host=server.url)
+
+    async def run(): 
+        results = []
+        for i in range(10): 
+            try: 
+                results.append(await generator.generate_blog(f"post {i}"))
+            except RuntimeError: 
+                results.append(None)
+        return results
+
+    results = asyncio.run(run())
+    stats = generator.validation_stats["generate"]
+
+    assert all(result is None or result.startswith("# Blog post") for result in results)
+    assert stats["attempts"] == server.fake.stats["requests"]
+    assert stats["aborts"] == server.fake.stats["non_markdown"]
@@ -0,0 +1,129 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import io
+import json
+import pytest
+from api.batch import run_batch
+from api.services.job_service import JobService
+
+
+class FakeBlogService(): 
+    """Stand-in for BlogService that echoes the purpose and fails on request"""
+    def __init__(self): 
+        self.calls = []
+
+    async def generate_blog(self, purpose, language, tenant_id=None, priority="interactive"): 
+        self.calls.append(purpose)
+        await asyncio.sleep(0)
+        if purpose == "fail": 
+            raise ValueError("LLM output could not be parsed as markdown after retries.")
+        if purpose == "crash": 
+            raise TypeError("unexpected")
+        return {"markdown": f"# {purpose} ({language})"}
+
+
+async def wait_for(job_service, job_id): 
+    while job_service.status(job_id)["status"] != "completed": 
+        await asyncio.sleep(0.01)
+
+
+def test_job_runs_and_persists_results(tmp_path): 
+    """Test that a submitted job completes and its results are persisted in request order"""
+    async def scenario(): 
+        job_service = JobService(FakeBlogService(), jobs_dir=tmp_path, concurrency=2)
+        job = job_service.submit([{"purpose": "a", "language": "english"}, {"purpose": "fail", "language": "english"}, {"purpose": "c", "language": "dutch"}])
+        await wait_for(job_service, job["job_id"])
+        await job_service.stop()
+        return job_service, job["job_id"]
+
+    job_service, job_id = asyncio.run(scenario())
+
+    assert job_service.status(job_id) == {"job_id": job_id, "status": "completed", "total": 3, "completed": 3, "failed": 1}
+    assert [result.get("markdown") for result in job_service.results(job_id)] == ["# a (english)", None, "# c (dutch)"]
+    assert len((tmp_path / f"{job_id}.results.jsonl").read_text().splitlines()) == 3
+
+
+def test_restart_resumes_only_unfinished_items(tmp_path): 
+    """Test that items finished before a crash are not re-run after a restart"""
+    requests = [{"purpose": "a", "language": "english"}, {"purpose": "b", "language": "english"}]
+    (tmp_path / "job1.json").write_text(json.dumps({"job_id": "job1", "created_at": 0, "requests": requests}))
+    (tmp_path / "job1.results.jsonl").write_text(json.dumps({"index": 0, "markdown": "# a (english)"}) + "\n{\"index\": 1, \"mark")
+
+    blog_service = FakeBlogService()
+    async def scenario(): 
+        job_service = JobService(blog_service, jobs_dir=tmp_path, concurrency=1)
+        job_service.start()
+        await wait_for(job_service, "job1")
+        await job_service.stop()
+        return job_service
+
+    job_service = asyncio.run(scenario())
+
+    assert blog_service.calls == ["b"]
+    assert [result["markdown"] for result in job_service.results("job1")] == ["# a (english)", "# b (english)"]
+
+
+def test_unexpected_error_fails_the_item_and_keeps_the_worker(tmp_path): 
+    """Test that an error the pipeline does not handle fails only its item and the worker runs the rest of the queue"""
+    blog_service = FakeBlogService()
+    async def scenario(): 
+        job_service = JobService(blog_service, jobs_dir=tmp_path, concurrency=1)
+        job = job_service.submit([{"purpose": "crash", "language": "english"}, {"purpose": "b", "language": "english"}])
+        await asyncio.wait_for(wait_for(job_service, job["job_id"]), 1)
+        await job_service.stop()
+        return job_service, job["job_id"]
+
+    job_service, job_id = asyncio.run(scenario())
+
+    assert blog_service.calls == ["crash", "b"]
+    assert job_service.status(job_id)["failed"] == 1
+    results = job_service.results(job_id)
+    assert "unexpected" in results[0]["error"] and results[1]["markdown"] == "# b (english)"
+
+
+def test_jobs_are_only_visible_to_their_tenant(tmp_path): 
+    """Test that a job's status & results are unknown to other tenants, and tenantless jobs belong to the default tenant"""
+    job_service = JobService(FakeBlogService(), jobs_dir=tmp_path)
+    job_service.jobs = {
+        "acme_job": {"total": 1, "completed": set(), "failed": 0, "tenant_id": "acme"}, 
+        "old_job": {"total": 1, "completed": set(), "failed": 0, "tenant_id": None}, 
+    }
+
+    assert job_service.status("acme_job", "acme")["status"] == "running"
+    assert job_service.results("acme_job", "acme") == []
+    with pytest.raises(KeyError): 
+        job_service.status("acme_job", "default")
+    with pytest.raises(KeyError): 
+        job_service.results("acme_job", "globex")
+    assert job_service.status("old_job", "default")["total"] == 1
+    with pytest.raises(KeyError): 
+        job_service.status("old_job", "acme")
+
+
+def test_batch_cli_streams_jsonl(): 
+    """Test that the batch runner writes one result line per input line, keeping extra fields"""
+    lines = ['{"id": "x1", "purpose": "a"}\n', '\n', '{"language": "dutch"}\n', '{"id": "x3", "purpose": "c", "language": "dutch"}\n']
+    output = io.StringIO()
+
+    failed = asyncio.run(run_batch(FakeBlogService(), lines, output, concurrency=2))
+
+    records = sorted((json.loads(line) for line in output.getvalue().splitlines()), key=lambda record: record["index"])
+    assert failed == 1
+    assert records[0] == {"index": 0, "id": "x1", "markdown": "# a (english)"}
+    assert records[1]["index"] == 2 and "error" in records[1]
+    assert records[2] == {"index": 3, "id": "x3", "markdown": "# c (dutch)"}
+
+
+def test_batch_cli_survives_unexpected_errors(): 
+    """Test that an error the pipeline does not handle becomes an error line instead of stalling the batch"""
+    lines = [json.dumps({"purpose": purpose}) + "\n" for purpose in ["crash"] * 4 + ["a"]]
+    output = io.StringIO()
+
+    failed = asyncio.run(asyncio.wait_for(run_batch(FakeBlogService(), lines, output, concurrency=1), 1))
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert failed == 4
+    assert records[0] == {"index": 0, "error": "Internal error: unexpected"}
+    assert records[-1] == {"index": 4, "markdown": "# a (english)"}
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
+from src.markdown_stream import MarkdownStreamFilter, extract_markdown
+
+
+def stream(text: str, size: int) -> tuple: 
+    """Feed text through the filter in pieces of `size` characters"""
+    md_filter = MarkdownStreamFilter()
+    output = "".join(md_filter.feed(text[i:i + size]) for i in range(0, len(text), size))
+    output += md_filter.finish()
+    return output, md_filter
+
+
+@pytest.mark.parametrize("text", [
+    "  # Title\n\nBody text.\n\n", 
+    "```markdown\n# Title\n\nSome `code` here.\n```\n", 
+    "```markdown # Title ``` trailing ```", 
+])
+@pytest.mark.parametrize("size", [1, 3, 100])
+def test_stream_matches_extract_markdown(text, size): 
+    """Test that the incremental filter yields exactly what extract_markdown returns"""
+    output, md_filter = stream(text, size)
+
+    assert md_filter.valid and md_filter.terminated
+    assert output == extract_markdown(text)
+
+
+def test_preamble_is_rejected_early(): 
+    """Test that chatter before the markdown invalidates the stream on its first characters"""
+    md_filter = MarkdownStreamFilter()
+
+    assert md_filter.feed("Sure") == ""
+    assert md_filter.invalid
+
+
+def test_partial_fence_waits_for_more_output(): 
+    """Test that a prefix of ```markdown is neither emitted nor rejected"""
+    md_filter = MarkdownStreamFilter()
+
+    assert md_filter.feed("\n``") == ""
+    assert md_filter.mode == "undecided"
+    assert md_filter.feed("`markdown\n# T") == "# T"
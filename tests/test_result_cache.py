@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import os
+import time
+import pytest
+from src.result_cache import ResultCache, normalize_text
+
+
+def test_lru_eviction_and_counters(): 
+    """Test that the least recently used entry is evicted and hits/misses are counted"""
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"      # refreshes a
+    cache.put("c", "C")               # evicts b
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    assert cache.stats() == {"hits": 2, "disk_hits": 0, "misses": 1, "entries": 2}
+
+
+def test_ttl_expiry(monkeypatch): 
+    """Test that entries older than the ttl are treated as misses"""
+    cache = ResultCache(ttl=10)
+    cache.put("a", "A")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path): 
+    """Test that the on-disk tier serves entries to a fresh cache (e.g. after a restart)"""
+    ResultCache(disk_dir=tmp_path).put("a", "A")
+    cache = ResultCache(disk_dir=tmp_path)
+
+    assert cache.get("a") == "A"
+    assert cache.disk_hits == 1
+
+
+def test_malformed_disk_entries_are_misses(tmp_path): 
+    """Test that disk entries of another shape are dropped and treated as misses instead of raising"""
+    entries = {"list": "[1, 2]", "old": '{"value": "A"}', "number": '{"stored_at": 0, "value": 1}', "broken": '{"stored_'}
+    for key, content in entries.items(): 
+        (tmp_path / f"{key}.json").write_text(content)
+    cache = ResultCache(disk_dir=tmp_path)
+
+    assert [cache.get(key) for key in entries] == [None] * 4
+    assert cache.misses == 4 and not list(tmp_path.glob("*.json"))
+
+
+def test_key_covers_corpus_and_normalized_inputs(): 
+    """Test that keys change with the corpus but not with whitespace differences in the input"""
+    key = lambda purpose, corpus: ResultCache.make_key("generate", {"purpose": normalize_text(purpose)}, "mistral", {"seed": 42}, corpus)
+
+    assert key("Energy  tips ", "c1") == key("Energy tips", "c1")
+    assert key("Energy tips", "c1") != key("Energy tips", "c2")
+
+
+def test_disk_eviction_is_amortised_and_tolerates_vanished_files(tmp_path, monkeypatch): 
+    """Test that the disk tier is trimmed every evict_every puts, oldest first, even if another worker deletes files meanwhile"""
+    cache = ResultCache(disk_dir=tmp_path, max_disk_entries=2, evict_every=4)
+    for i, key in enumerate("abc"): 
+        cache.put(key, key.upper())
+        os.utime(tmp_path / f"{key}.json", (i, i))
+    assert cache._eviction is None and len(list(tmp_path.glob("*.json"))) == 3
+
+    stat = Path.stat
+    def vanishing_stat(path, *args, **kwargs): 
+        # "b" is evicted by another worker between the scan and the stat
+        if path.name == "b.json": 
+            path.unlink(missing_ok=True)
+        return stat(path, *args, **kwargs)
+    monkeypatch.setattr(Path, "stat", vanishing_stat)
+    cache.put("d", "D")
+    cache._eviction.join()
+    monkeypatch.undo()
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == ["c.json", "d.json"]
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
+from src.retrieval import Bm25Index
+
+
+@pytest.fixture
+def index(): 
+    """Small index over three section chunks"""
+    return Bm25Index({
+        "intro": "# Company\n\nWe publish consumer guides.", 
+        "energy": "## Energy\n\nHeat pumps, insulation and energy bills in winter.", 
+        "health": "## Health\n\nHealth insurance and choosing a policy.", 
+    })
+
+
+def test_search_ranks_relevant_chunk_first(index): 
+    """Test that the chunk sharing the query terms ranks first"""
+    assert index.search("How to keep the energy bill low in winter", k=1) == ["energy"]
+    assert index.search("compare health insurance", k=1) == ["health"]
+
+
+def test_search_without_matches_keeps_corpus_order(index): 
+    """Test that unmatched queries fall back to corpus order"""
+    assert index.search("quantum chromodynamics", k=2) == ["intro", "energy"]
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import pytest
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result_or_failure():
+    """Test that identical concurrent calls run once and all get its result, or all get its exception"""
+    flights = SingleFlight()
+    runs = []
+
+    async def call(result):
+        runs.append(result)
+        await asyncio.sleep(0.01)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def scenario():
+        ok = await asyncio.gather(*(flights.do("a", lambda: call("post")) for _ in range(5)))
+        failed = await asyncio.gather(*(flights.do("b", lambda: call(ValueError("bad"))) for _ in range(3)), return_exceptions=True)
+        # released once done, the next call runs again
+        again = await flights.do("a", lambda: call("post 2"))
+        return ok, failed, again
+
+    ok, failed, again = asyncio.run(scenario())
+
+    assert ok == ["post"] * 5
+    assert all(isinstance(error, ValueError) for error in failed) and len({id(error) for error in failed}) == 1
+    assert again == "post 2"
+    assert len(runs) == 3
+    assert flights.stats() == {"in_flight": 0, "started": 3, "coalesced": 6}
+
+
+def test_cancelled_callers_detach_and_the_last_one_cancels_the_call():
+    """Test that a cancelled caller does not affect the others, and the call stops once nobody waits for it"""
+    flights = SingleFlight()
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(0.05)
+            return "post"
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("a", call))
+        second = asyncio.ensure_future(flights.do("a", call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+
+        third = asyncio.ensure_future(flights.do("b", call))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0)
+        return first, result
+
+    first, result = asyncio.run(scenario())
+
+    assert first.cancelled() and result == "post"
+    assert cancelled == [True]
+    assert "b" not in flights
+
+
+def test_stream_readers_attaching_late_get_every_piece():
+    """Test that a reader attaching mid-stream replays the pieces so far, and a plain call gets the joined stream"""
+    flights = SingleFlight()
+    opened = []
+
+    async def pieces():
+        opened.append(True)
+        for piece in ["# Title", "\n\n", "Body"]:
+            await asyncio.sleep(0.01)
+            yield piece
+
+    async def read():
+        return [piece async for piece in flights.stream("a", pieces)]
+
+    async def scenario():
+        first = asyncio.ensure_future(read())
+        await asyncio.sleep(0.015)
+        late = asyncio.ensure_future(read())
+        joined = await flights.do("a", lambda: None)
+        return await first, await late, joined
+
+    first, late, joined = asyncio.run(scenario())
+
+    assert first == late == ["# Title", "\n\n", "Body"]
+    assert joined == "# Title\n\nBody"
+    assert opened == [True]
@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+# sys.path.insert(0, str(Path(__file__).parent.parent))
+import asyncio
+import gc
+import weakref
+import pytest
+from src.chunk_store import ChunkStore
+from src.corpus import Corpus
+from src.tenants import TenantRegistry, SessionSettings, valid_tenant_id
+
+
+def make_corpus(name, words=10): 
+    return Corpus({
+        f"{name}_chunk_1_section_1": {"filename": f"{name}.pdf", "type": "description", "text": f"# {name}\n\n" + " ".join([name] * words), "section": 1}, 
+    })
+
+
+def test_registry_shares_loads_and_evicts_least_recently_used(): 
+    """Test that concurrent requests share one load and the budget evicts the oldest tenants"""
+    loads = []
+
+    def loader(tenant_id): 
+        loads.append(tenant_id)
+        return make_corpus(tenant_id)
+
+    budget = make_corpus("a").estimate_bytes() * 2 + 10
+    registry = TenantRegistry(loader, max_bytes=budget)
+
+    async def scenario(): 
+        first, second = await asyncio.gather(registry.get("a"), registry.get("a"))
+        assert first is second
+        await registry.get("b")
+        await registry.get("a")   # a is now the most recently used 
+        await registry.get("c")   # evicts b 
+        await registry.get("a")
+
+    asyncio.run(scenario())
+
+    assert loads == ["a", "b", "c"]
+    assert registry.peek("b") is None and registry.peek("a") is not None
+    assert registry.stats()["evictions"] == 1
+    assert registry.bytes <= budget
+
+
+def test_evicted_store_is_released_when_its_last_request_finishes(tmp_path): 
+    """Test that an evicted corpus stays readable for requests holding it and its store is freed (connection closed) once they let go"""
+    def loader(tenant_id): 
+        chunks = make_corpus(tenant_id).chunks
+        return Corpus(ChunkStore.write(tmp_path / tenant_id / "chunks.db", chunks))
+    registry = TenantRegistry(loader, max_bytes=1)
+
+    async def scenario(): 
+        held = await registry.get("a")
+        dropped = weakref.ref((await registry.get("b")).chunks)   # evicts a 
+        registry.invalidate("b")
+        return held, weakref.ref(held.chunks), dropped
+
+    gc.disable()
+    try: 
+        held, store, dropped = asyncio.run(scenario())
+        assert registry.peek("a") is None and registry.stats()["tenants"] == 0
+        # nobody held b 
+        assert dropped() is None
+        # still usable by the request holding it 
+        assert held.chunks["a_chunk_1_section_1"]["text"].startswith("# a")
+        del held
+        # freed by reference counting alone, no garbage collection needed 
+        assert store() is None
+    finally: 
+        gc.enable()
+
+
+def test_registry_propagates_unknown_tenant(): 
+    def loader(tenant_id): 
+        raise FileNotFoundError(f"Unknown tenant: {tenant_id}")
+    registry = TenantRegistry(loader, max_bytes=1000)
+
+    with pytest.raises(FileNotFoundError): 
+        asyncio.run(registry.get("nobody"))
+    assert registry.stats()["tenants"] == 0
+
+
+def test_session_settings_fall_back_to_tenant(): 
+    settings = SessionSettings(max_sessions=2)
+    settings.set("acme", None, "formal")
+    settings.set("acme", "s1", "playful")
+
+    assert settings.get("acme", "s1") == "playful"
+    assert settings.get("acme", "s2") == "formal"
+    assert settings.get("other", "s1") is None
+
+    # sessions are bounded, tenant-wide values are kept 
+    settings.set("acme", "s2", "dry")
+    settings.set("acme", "s3", "dry")
+    assert settings.get("acme", "s1") == "formal"
+
+
+def test_tenant_ids_cannot_escape_the_tenants_dir(): 
+    assert valid_tenant_id("acme-energy_2")
+    assert not valid_tenant_id("../etc")
+    assert not valid_tenant_id("a/b")
+    assert not valid_tenant_id("")